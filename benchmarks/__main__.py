@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks: latencia, rendimiento, memoria y concurrencia
+
+Ejecuta los escenarios de benchmarks.suite, imprime un resumen y guarda el
+resultado en JSON. Con --comparar marca las métricas que empeoran respecto a
+un resultado anterior más que la tolerancia y sale con código 1 si hay alguna.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks --salida base.json
+    python -m benchmarks --comparar base.json --tolerancia 0.15
+    python -m benchmarks --rapido --escenarios latencia memoria
+"""
+
+import argparse
+import json
+import sys
+
+from benchmarks import suite
+
+
+def _formatear(valor: float) -> str:
+    return f"{valor:,.0f}" if abs(valor) >= 100 else f"{valor:,.2f}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--escenarios", nargs="+", choices=suite.ESCENARIOS, default=list(suite.ESCENARIOS))
+    parser.add_argument("--tamanos", nargs="+", type=int, default=list(suite.TAMANOS),
+                        help="número de cuentas de cada banco del escenario de rendimiento")
+    parser.add_argument("--operaciones", type=int, default=100_000)
+    parser.add_argument("--iteraciones", type=int, default=20_000,
+                        help="llamadas medidas por operación en el escenario de latencia")
+    parser.add_argument("--rapido", action="store_true",
+                        help="tamaños y operaciones reducidos, para una comprobación en segundos")
+    parser.add_argument("--salida", help="archivo JSON donde guardar el resultado")
+    parser.add_argument("--comparar", metavar="BASE", help="resultado JSON anterior con el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10,
+                        help="empeoramiento relativo admitido antes de marcar una regresión")
+    args = parser.parse_args()
+    if args.rapido:
+        args.tamanos = [1_000, 10_000]
+        args.operaciones = 10_000
+        args.iteraciones = 2_000
+
+    resultado = suite.ejecutar(args.escenarios, args.tamanos, args.operaciones, args.iteraciones,
+                               progreso=lambda escenario: print(f"... {escenario}", file=sys.stderr))
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, indent=2)
+
+    if not args.comparar:
+        for nombre, medida in resultado["metricas"].items():
+            print(f"{nombre:55} {_formatear(medida['valor']):>16} {medida['unidad']}")
+        return 0
+
+    with open(args.comparar, encoding="utf-8") as archivo:
+        base = json.load(archivo)
+    filas = suite.comparar(resultado, base, args.tolerancia)
+    for fila in filas:
+        marca = "REGRESIÓN" if fila["regresion"] else ""
+        print(f"{fila['metrica']:55} {_formatear(fila['base']):>14} -> {_formatear(fila['actual']):>14} "
+              f"{fila['unidad']:6} {fila['cambio']:+7.1%} {marca}")
+    regresiones = sum(fila["regresion"] for fila in filas)
+    print(f"\n{len(filas)} métricas comparadas, {regresiones} regresiones (tolerancia {args.tolerancia:.0%})")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark de estrés: transferencias concurrentes con candados por franjas
+
+Cada hilo transfiere entre su propio grupo de cuentas, de modo que las
+transferencias de hilos distintos no comparten cuentas. Se compara el banco
+con franjas frente a un único candado global (num_franjas=1).
+
+En CPython con GIL el rendimiento total apenas crece con los hilos; en un
+intérprete sin GIL (python3.13t o posterior) escala con los núcleos mientras
+no se usen franjas compartidas.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_concurrencia --operaciones 200000
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from src.banco import Banco, NUM_FRANJAS
+
+CUENTAS_POR_HILO = 16
+
+
+def medir(num_hilos: int, operaciones: int, num_franjas: int) -> float:
+    """Devuelve transferencias por segundo con el número de hilos indicado"""
+    banco = Banco("Banco Benchmark", num_franjas=num_franjas)
+    for hilo in range(num_hilos):
+        for i in range(CUENTAS_POR_HILO):
+            banco.crear_cuenta(f"{hilo}-{i}", f"Titular {hilo}-{i}", 1e12)
+
+    por_hilo = operaciones // num_hilos
+    barrera = threading.Barrier(num_hilos + 1)
+
+    def trabajador(hilo: int):
+        numeros = [f"{hilo}-{i}" for i in range(CUENTAS_POR_HILO)]
+        barrera.wait()
+        for op in range(por_hilo):
+            banco.transferir(numeros[op % CUENTAS_POR_HILO], numeros[(op + 1) % CUENTAS_POR_HILO], 1.0)
+
+    hilos = [threading.Thread(target=trabajador, args=(hilo,)) for hilo in range(num_hilos)]
+    for hilo in hilos:
+        hilo.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    assert banco.contador_transacciones == por_hilo * num_hilos
+    return por_hilo * num_hilos / duracion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--operaciones", type=int, default=200_000)
+    parser.add_argument("--hilos", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}  GIL {'activado' if gil else 'desactivado'}")
+    print(f"{'hilos':>6} {'franjas':>14} {'candado global':>16} {'escala':>8}")
+    base = None
+    for num_hilos in args.hilos:
+        con_franjas = medir(num_hilos, args.operaciones, NUM_FRANJAS)
+        global_ = medir(num_hilos, args.operaciones, 1)
+        base = base or con_franjas
+        print(f"{num_hilos:>6} {con_franjas:>12,.0f}/s {global_:>14,.0f}/s {con_franjas / base:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
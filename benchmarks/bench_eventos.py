@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark del bus de eventos: coste de publicar en transferir
+
+Mide el tiempo por transferencia sin bus, con un bus sin suscriptores, con
+un suscriptor síncrono y con un suscriptor por lotes lento (que duerme en
+cada lote), para comprobar que este último no se nota en transferir.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_eventos --operaciones 100000
+"""
+
+import argparse
+import time
+
+from src.banco import Banco
+from src.eventos import BusEventos
+
+
+def _ns_por_transferencia(banco: Banco, operaciones: int) -> float:
+    inicio = time.perf_counter_ns()
+    for _ in range(operaciones):
+        banco.transferir("1", "2", 1.0)
+    return (time.perf_counter_ns() - inicio) / operaciones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--operaciones", type=int, default=100_000)
+    parser.add_argument("--espera-lote", type=float, default=0.01,
+                        help="segundos que tarda el suscriptor lento en cada lote")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    def lento(lote):
+        time.sleep(args.espera_lote)
+
+    escenarios = {
+        "sin bus": lambda bus: None,
+        "bus sin suscriptores": lambda bus: None,
+        "suscriptor síncrono": lambda bus: bus.suscribir(lambda evento: None),
+        "suscriptor por lotes lento": lambda bus: bus.suscribir_lotes(lento, capacidad=4 * args.operaciones),
+    }
+    resultados = {nombre: float("inf") for nombre in escenarios}
+    vaciado = 0.0
+    for _ in range(args.repeticiones):
+        for nombre, suscribir in escenarios.items():
+            bus = None if nombre == "sin bus" else BusEventos()
+            banco = Banco("Banco Benchmark", eventos=bus)
+            banco.crear_cuenta("1", "Juan Pérez", 1e12)
+            banco.crear_cuenta("2", "Ana López", 0.0)
+            if bus is not None:
+                suscribir(bus)
+            resultados[nombre] = min(resultados[nombre], _ns_por_transferencia(banco, args.operaciones))
+            if bus is not None:
+                inicio = time.perf_counter()
+                bus.cerrar()
+                vaciado = max(vaciado, time.perf_counter() - inicio)
+
+    base = resultados["sin bus"]
+    print(f"Transferencias: {args.operaciones:,}")
+    for nombre in escenarios:
+        print(f"{nombre:28} {resultados[nombre]:8,.0f} ns/transferencia  ({resultados[nombre] / base - 1:+.1%})")
+    print(f"Vaciado de la cola al cerrar el bus: {vaciado:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
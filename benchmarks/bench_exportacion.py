@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark de exportación del historial: formato columnar frente a obtener_historial
+
+Compara recorrer obtener_historial() de cada cuenta y serializar las listas
+de diccionarios con pickle (lo que hacían los trabajos de análisis) con
+Banco.exportar_historial seguido de LectorHistorial.leer, con y sin zlib.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_exportacion --cuentas 10000 --transferencias 1000000
+"""
+
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import time
+
+from src.banco import Banco
+from src.exportacion import LectorHistorial
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cuentas", type=int, default=10_000)
+    parser.add_argument("--transferencias", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    generador = random.Random(1)
+    banco = Banco("Banco Benchmark")
+    banco.crear_cuentas_lote((str(i), f"Titular {i}", 1e9) for i in range(args.cuentas))
+    origenes = [str(generador.randrange(args.cuentas)) for _ in range(args.transferencias)]
+    destinos = [str(generador.randrange(args.cuentas)) for _ in range(args.transferencias)]
+    cantidades = [round(generador.uniform(0.01, 100), 2) for _ in range(args.transferencias)]
+    banco.transferir_lote(origenes, destinos, cantidades)
+    filas = 2 * args.transferencias
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "historial.pickle")
+        inicio = time.perf_counter()
+        with open(ruta, "wb") as archivo:
+            for numero, cuenta in banco.cuentas.items():
+                pickle.dump((numero, cuenta.obtener_historial()), archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        duracion = time.perf_counter() - inicio
+        print(f"Transacciones: {filas:,}")
+        print(f"{'obtener_historial + pickle':28s} {filas / duracion:14,.0f} filas/s  "
+              f"{os.path.getsize(ruta) / filas:6.1f} bytes/fila")
+
+        for comprimir in (False, True):
+            ruta = os.path.join(directorio, f"historial-{comprimir}.bin")
+            inicio = time.perf_counter()
+            banco.exportar_historial(ruta, comprimir=comprimir)
+            escritura = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            with LectorHistorial(ruta) as lector:
+                columnas = lector.leer()
+            lectura = time.perf_counter() - inicio
+            assert len(columnas["saldo"]) == filas
+            nombre = "exportar_historial" + (" (zlib)" if comprimir else "")
+            print(f"{nombre:28s} {filas / escritura:14,.0f} filas/s  "
+                  f"{os.path.getsize(ruta) / filas:6.1f} bytes/fila  lectura: {filas / lectura:14,.0f} filas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark del banco fragmentado: transferir_lote y transferir según el número de procesos
+
+Las filas se generan de modo que una fracción configurable cruza entre
+fragmentos (dos fases) y el resto es interna a un fragmento. Las filas
+internas de cada fragmento se aplican en paralelo, así que su rendimiento
+escala con los núcleos disponibles; las filas entre fragmentos se preparan y
+confirman con un mensaje por fragmento y lote. Además se mide el camino de
+una llamada por transferencia (transferir), con la misma fracción cruzada.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_fragmentos --filas 200000 --cruzadas 0.2 --fragmentos 1 2 4
+"""
+
+import argparse
+import os
+import random
+import time
+from typing import Tuple
+
+from src.banco import LOTE_OK
+from src.fragmentos import BancoFragmentado
+
+
+def medir(num_fragmentos: int, filas: int, cuentas: int, cruzadas: float, lotes: int,
+          llamadas: int) -> Tuple[float, float]:
+    """Devuelve transferencias por segundo en lotes y llamada a llamada con el número de fragmentos indicado"""
+    generador = random.Random(1)
+    with BancoFragmentado("Banco Benchmark", num_fragmentos=num_fragmentos) as banco:
+        por_fragmento = [[] for _ in range(num_fragmentos)]
+        for i in range(cuentas):
+            numero = str(i)
+            banco.crear_cuenta(numero, f"Titular {i}", 1e12)
+            por_fragmento[banco.fragmento_de(numero)].append(numero)
+        todas = [str(i) for i in range(cuentas)]
+
+        origenes, destinos = [], []
+        for _ in range(filas):
+            if generador.random() < cruzadas:
+                origen, destino = generador.sample(todas, 2)
+            else:
+                grupo = generador.choice(por_fragmento)
+                origen, destino = generador.choice(grupo), generador.choice(grupo)
+            origenes.append(origen)
+            destinos.append(destino)
+        cantidades = [1.0] * filas
+
+        tamano = filas // lotes
+        inicio = time.perf_counter()
+        for lote in range(lotes):
+            tramo = slice(lote * tamano, (lote + 1) * tamano)
+            estados = banco.transferir_lote(origenes[tramo], destinos[tramo], cantidades[tramo])
+            assert all(estado == LOTE_OK for estado in estados)
+        duracion = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        for origen, destino in zip(origenes[:llamadas], destinos[:llamadas]):
+            banco.transferir(origen, destino, 1.0)
+        duracion_llamadas = time.perf_counter() - inicio
+    return tamano * lotes / duracion, min(llamadas, filas) / duracion_llamadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--cuentas", type=int, default=10_000)
+    parser.add_argument("--cruzadas", type=float, default=0.2,
+                        help="fracción de filas entre fragmentos distintos")
+    parser.add_argument("--lotes", type=int, default=10)
+    parser.add_argument("--llamadas", type=int, default=5_000,
+                        help="transferencias hechas una a una con transferir")
+    parser.add_argument("--fragmentos", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"Núcleos: {os.cpu_count()}  filas: {args.filas}  cuentas: {args.cuentas}  "
+          f"cruzadas: {args.cruzadas:.0%}")
+    base = base_llamadas = None
+    for num_fragmentos in args.fragmentos:
+        rendimiento, por_llamada = medir(num_fragmentos, args.filas, args.cuentas, args.cruzadas,
+                                         args.lotes, args.llamadas)
+        base = base or rendimiento
+        base_llamadas = base_llamadas or por_llamada
+        print(f"{num_fragmentos:3d} fragmentos: lote {rendimiento:12,.0f} transf/s ({rendimiento / base:.2f}x)  "
+              f"transferir {por_llamada:10,.0f} transf/s ({por_llamada / base_llamadas:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark de importación masiva: crear_cuentas_lote frente a crear_cuenta
+
+Mide cuentas creadas por segundo llamando a crear_cuenta fila a fila,
+con crear_cuentas_lote sobre una lista en memoria y con importar_cuentas_csv
+leyendo un CSV temporal por bloques.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_importacion --cuentas 1000000
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from src.banco import Banco
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cuentas", type=int, default=1_000_000)
+    parser.add_argument("--centavos", action="store_true")
+    args = parser.parse_args()
+
+    filas = [(str(i), f"Titular {i}", 100.25) for i in range(args.cuentas)]
+
+    banco = Banco("Banco Benchmark", centavos=args.centavos)
+    inicio = time.perf_counter()
+    for numero, titular, saldo in filas:
+        banco.crear_cuenta(numero, titular, saldo)
+    una_a_una = args.cuentas / (time.perf_counter() - inicio)
+
+    banco = Banco("Banco Benchmark", centavos=args.centavos)
+    inicio = time.perf_counter()
+    errores = banco.crear_cuentas_lote(filas)
+    en_lote = args.cuentas / (time.perf_counter() - inicio)
+    assert not errores
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "cuentas.csv")
+        with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(["numero_cuenta", "titular", "saldo_inicial"])
+            escritor.writerows(filas)
+        del filas
+        banco = Banco("Banco Benchmark", centavos=args.centavos)
+        inicio = time.perf_counter()
+        errores = banco.importar_cuentas_csv(ruta)
+        desde_csv = args.cuentas / (time.perf_counter() - inicio)
+        assert not errores
+
+    print(f"Cuentas: {args.cuentas:,}  modo: {'céntimos' if args.centavos else 'float'}")
+    print(f"crear_cuenta:         {una_a_una:12,.0f} cuentas/s")
+    print(f"crear_cuentas_lote:   {en_lote:12,.0f} cuentas/s  ({en_lote / una_a_una:.1f}x)")
+    print(f"importar_cuentas_csv: {desde_csv:12,.0f} cuentas/s  ({desde_csv / una_a_una:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark del índice por saldo: consultas frente a ordenar todas las cuentas
+
+Mide top-N, rango, posición y percentil con el índice incremental del banco
+y con una ordenación completa de Banco.cuentas, además del coste que añade
+el índice a cada transferencia una vez construido.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_indice_saldos --cuentas 1000000
+"""
+
+import argparse
+import math
+import random
+import time
+
+from src.banco import Banco
+
+
+def cronometrar(funcion, repeticiones: int) -> float:
+    """Segundos por llamada"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def ordenar(banco: Banco):
+    return sorted(banco.cuentas.values(), key=lambda cuenta: cuenta.obtener_saldo())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cuentas", type=int, default=1_000_000)
+    parser.add_argument("--top", type=int, default=100)
+    parser.add_argument("--consultas", type=int, default=1000)
+    parser.add_argument("--transferencias", type=int, default=100_000)
+    args = parser.parse_args()
+
+    generador = random.Random(1)
+    banco = Banco("Banco Benchmark")
+    for i in range(args.cuentas):
+        banco.crear_cuenta(str(i), f"Titular {i}", round(generador.uniform(0, 1e6), 2))
+    numeros = [str(generador.randrange(args.cuentas)) for _ in range(args.transferencias)]
+
+    inicio = time.perf_counter()
+    for i in range(args.transferencias):
+        banco.transferir(numeros[i], numeros[i - 1], 0.01)
+    sin_indice = (time.perf_counter() - inicio) / args.transferencias
+
+    construccion = cronometrar(lambda: banco.obtener_mayores_saldos(1), 1)
+
+    inicio = time.perf_counter()
+    for i in range(args.transferencias):
+        banco.transferir(numeros[i - 1], numeros[i], 0.01)
+    con_indice = (time.perf_counter() - inicio) / args.transferencias
+
+    minimo, maximo = 500_000.0, 500_500.0
+    consultas = [
+        ("top-N", lambda: banco.obtener_mayores_saldos(args.top),
+         lambda: ordenar(banco)[:-args.top - 1:-1]),
+        ("rango", lambda: banco.obtener_cuentas_por_saldo(minimo, maximo),
+         lambda: [c for c in ordenar(banco) if minimo <= c.obtener_saldo() <= maximo]),
+        ("posición", lambda: banco.obtener_posicion_saldo("0"),
+         lambda: 1 + sum(c.obtener_saldo() > banco.cuentas["0"].obtener_saldo() for c in banco.cuentas.values())),
+        ("percentil 99", lambda: banco.obtener_percentil_saldo(99),
+         lambda: ordenar(banco)[math.ceil(0.99 * len(banco.cuentas)) - 1].obtener_saldo()),
+    ]
+
+    print(f"Cuentas: {args.cuentas:,}")
+    print(f"Construcción del índice: {construccion * 1e3:10.1f} ms")
+    print(f"transferir sin índice:   {sin_indice * 1e6:10.2f} µs")
+    print(f"transferir con índice:   {con_indice * 1e6:10.2f} µs")
+    for nombre, con_indice_fn, ordenando in consultas:
+        rapido = cronometrar(con_indice_fn, args.consultas)
+        lento = cronometrar(ordenando, 1)
+        print(f"{nombre:13s} índice: {rapido * 1e6:10.1f} µs   ordenando: {lento * 1e3:10.1f} ms   "
+              f"({lento / rapido:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark del coste de las métricas: operaciones con y sin Metricas
+
+Mide el tiempo por llamada de transferir, depositar y obtener_historial (de
+una cuenta con --historial transacciones) en un banco sin métricas, en otro
+que mide todas las llamadas y en otro que mide una de cada --muestreo, y el
+sobrecoste relativo de cada uno.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_metricas --operaciones 200000 --muestreo 64
+"""
+
+import argparse
+import time
+
+from src.banco import Banco
+from src.metricas import Metricas
+
+
+def _ns_por_llamada(operacion, operaciones: int, repeticiones: int) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter_ns()
+        for _ in range(operaciones):
+            operacion()
+        mejor = min(mejor, (time.perf_counter_ns() - inicio) / operaciones)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cuentas", type=int, default=1_000)
+    parser.add_argument("--operaciones", type=int, default=200_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--muestreo", type=int, default=64)
+    parser.add_argument("--historial", type=int, default=20, help="Transacciones en la cuenta consultada")
+    args = parser.parse_args()
+
+    resultados = {}
+    variantes = (("sin métricas", None), ("con métricas", Metricas()),
+                 (f"1 de cada {args.muestreo}", Metricas(muestreo=args.muestreo)))
+    for nombre, metricas in variantes:
+        banco = Banco("Banco Benchmark", metricas=metricas)
+        banco.crear_cuentas_lote((str(i), f"Titular {i}", 1e12) for i in range(args.cuentas))
+        cuenta = banco.obtener_cuenta("0")
+        for _ in range(args.historial):
+            cuenta.depositar(1.0)
+        resultados[nombre] = {
+            "transferir": _ns_por_llamada(lambda: banco.transferir("1", "2", 1.0), args.operaciones, args.repeticiones),
+            "depositar": _ns_por_llamada(lambda: banco.depositar("3", 1.0), args.operaciones, args.repeticiones),
+            "obtener_historial": _ns_por_llamada(cuenta.obtener_historial, args.operaciones // 10, args.repeticiones),
+        }
+
+    print(f"Cuentas: {args.cuentas:,}  operaciones: {args.operaciones:,}")
+    for operacion, sin in resultados["sin métricas"].items():
+        linea = f"{operacion:18} {sin:8,.0f} ns"
+        for nombre, _ in variantes[1:]:
+            con = resultados[nombre][operacion]
+            linea += f"  |  {nombre}: {con:8,.0f} ns ({con / sin - 1:+.1%})"
+        print(linea)
+
+
+if __name__ == "__main__":
+    main()
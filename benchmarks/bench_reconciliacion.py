@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la conciliación: reproducción vectorizada frente a un bucle
+
+Compara conciliar (con NumPy, sin NumPy y con varios procesos) con un bucle
+que recorre obtener_historial de cada cuenta comprobando la cadena de saldos.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_reconciliacion --cuentas 100000 --transacciones 20
+"""
+
+import argparse
+import random
+import time
+
+from src import reconciliacion
+from src.banco import Banco
+from src.reconciliacion import conciliar
+
+
+def _banco(cuentas: int, transacciones: int, centavos: bool) -> Banco:
+    banco = Banco("Banco Benchmark", centavos=centavos)
+    banco.crear_cuentas_lote((str(i), f"Titular {i}", 1_000.0) for i in range(cuentas))
+    aleatorio = random.Random(42)
+    for _ in range(transacciones):
+        origenes = [str(aleatorio.randrange(cuentas)) for _ in range(cuentas // 2)]
+        destinos = [str(aleatorio.randrange(cuentas)) for _ in range(cuentas // 2)]
+        banco.transferir_lote(origenes, destinos, [round(aleatorio.uniform(0.01, 5.0), 2)] * len(origenes))
+    return banco
+
+
+def _bucle(banco: Banco) -> int:
+    """Conciliación ingenua, entrada a entrada y en diccionarios"""
+    errores = 0
+    for cuenta in banco.cuentas.values():
+        anterior = None
+        for entrada in cuenta.obtener_historial():
+            if anterior is not None and abs(entrada["saldo_anterior"] - anterior) > 1e-6:
+                errores += 1
+            signo = -1 if entrada["tipo"] == "RETIRO" else 1
+            if abs(entrada["saldo_anterior"] + signo * entrada["cantidad"] - entrada["saldo_nuevo"]) > 1e-6:
+                errores += 1
+            anterior = entrada["saldo_nuevo"]
+        if anterior is not None and abs(anterior - cuenta.obtener_saldo()) > 1e-6:
+            errores += 1
+    return errores
+
+
+def _segundos(funcion) -> float:
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cuentas", type=int, default=100_000)
+    parser.add_argument("--transacciones", type=int, default=20,
+                        help="lotes de transferencias (cada uno mueve la mitad de las cuentas)")
+    parser.add_argument("--procesos", type=int, default=2)
+    parser.add_argument("--centavos", action="store_true")
+    args = parser.parse_args()
+
+    banco = _banco(args.cuentas, args.transacciones, args.centavos)
+    numpy = reconciliacion.np
+    resultados = {
+        "bucle sobre obtener_historial": _segundos(lambda: _bucle(banco)),
+        "conciliar (NumPy)": _segundos(lambda: conciliar(banco)),
+        f"conciliar ({args.procesos} procesos)": _segundos(
+            lambda: conciliar(banco, procesos=args.procesos, cuentas_por_bloque=args.cuentas // args.procesos + 1)),
+    }
+    reconciliacion.np = None
+    resultados["conciliar (sin NumPy)"] = _segundos(lambda: conciliar(banco))
+    reconciliacion.np = numpy
+
+    entradas = sum(len(cuenta.historial_transacciones) for cuenta in banco.cuentas.values())
+    base = resultados["bucle sobre obtener_historial"]
+    print(f"Cuentas: {args.cuentas:,}  entradas de historial: {entradas:,}")
+    for nombre, segundos in resultados.items():
+        print(f"{nombre:32} {segundos:8.3f} s  ({base / segundos:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
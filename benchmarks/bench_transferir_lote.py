@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Banco.transferir_lote frente a un bucle de Banco.transferir
+
+La aceleración frente al bucle depende de lo que cueste transferir en esta
+versión; con --referencia (filas/s de un bucle de transferir medido en otra
+versión, p. ej. la original) se compara también con esa cifra fija.
+
+Ejecutar desde la raíz del proyecto:
+    python -m benchmarks.bench_transferir_lote --filas 1000000 --cuentas 100000 [--sin-saldo 1]
+"""
+
+import argparse
+import random
+import time
+
+from src.banco import Banco, LOTE_OK
+from src.cuenta import SaldoInsuficienteError
+
+
+def crear_banco(num_cuentas: int) -> Banco:
+    """Crea un banco con saldo de sobra en todas las cuentas"""
+    banco = Banco("Banco Benchmark")
+    for i in range(num_cuentas):
+        banco.crear_cuenta(str(i), f"Titular {i}", 1e9)
+    return banco
+
+
+def generar_lote(num_filas: int, num_cuentas: int, semilla: int = 42, sin_saldo: int = 0):
+    """Genera columnas de origen, destino y cantidad; `sin_saldo` filas repartidas piden más que el saldo"""
+    generador = random.Random(semilla)
+    origenes = [str(generador.randrange(num_cuentas)) for _ in range(num_filas)]
+    destinos = [str(generador.randrange(num_cuentas)) for _ in range(num_filas)]
+    cantidades = [round(generador.uniform(0.01, 500.0), 2) for _ in range(num_filas)]
+    for fila in generador.sample(range(num_filas), sin_saldo):
+        cantidades[fila] = 1e12
+    return origenes, destinos, cantidades
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--cuentas", type=int, default=100_000)
+    parser.add_argument("--sin-saldo", type=int, default=0,
+                        help="filas del lote con un retiro mayor que el saldo")
+    parser.add_argument("--referencia", type=float, default=None,
+                        help="filas/s de un bucle de transferir medido en otra versión")
+    args = parser.parse_args()
+
+    origenes, destinos, cantidades = generar_lote(args.filas, args.cuentas, sin_saldo=args.sin_saldo)
+
+    banco = crear_banco(args.cuentas)
+    inicio = time.perf_counter()
+    for fila in zip(origenes, destinos, cantidades):
+        try:
+            banco.transferir(*fila)
+        except SaldoInsuficienteError:
+            pass
+    tiempo_bucle = time.perf_counter() - inicio
+
+    banco = crear_banco(args.cuentas)
+    inicio = time.perf_counter()
+    estados = banco.transferir_lote(origenes, destinos, cantidades)
+    tiempo_lote = time.perf_counter() - inicio
+    assert list(estados).count(LOTE_OK) == args.filas - args.sin_saldo
+
+    print(f"Filas: {args.filas:,}  Cuentas: {args.cuentas:,}")
+    print(f"transferir (bucle): {tiempo_bucle:8.3f} s  {args.filas / tiempo_bucle:12,.0f} filas/s")
+    print(f"transferir_lote:    {tiempo_lote:8.3f} s  {args.filas / tiempo_lote:12,.0f} filas/s")
+    print(f"Aceleración: {tiempo_bucle / tiempo_lote:.1f}x")
+    if args.referencia:
+        print(f"Aceleración frente a la referencia ({args.referencia:,.0f} filas/s): "
+              f"{args.filas / tiempo_lote / args.referencia:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Suite de benchmarks de los caminos críticos del banco
+
+Cada escenario devuelve métricas con nombre, valor, unidad y sentido
+("menor" o "mayor" es mejor), de modo que dos ejecuciones guardadas en JSON
+se pueden comparar para detectar regresiones. No usa servicios externos: la
+validación asíncrona corre sobre el servicio simulado en tiempo virtual.
+"""
+
+import gc
+import os
+import platform
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.banco import Banco
+from src.cuenta import Cuenta
+from src.simulacion import ServicioSimulado, latencia_constante
+
+ESCENARIOS = ("latencia", "rendimiento", "memoria", "concurrencia")
+PERCENTILES = (50, 90, 99, 99.9)
+TAMANOS = (1_000, 100_000, 1_000_000)
+SALDO_INICIAL = 1e12
+
+
+def metrica(valor: float, unidad: str, mejor: str) -> dict:
+    """Una métrica con el sentido en que mejora ("menor" o "mayor")"""
+    return {"valor": valor, "unidad": unidad, "mejor": mejor}
+
+
+def percentiles(muestras: List[int]) -> Dict[str, float]:
+    """Percentiles por rango más cercano de una lista de duraciones"""
+    ordenadas = sorted(muestras)
+    resultado = {}
+    for percentil in PERCENTILES:
+        posicion = max(0, min(len(ordenadas) - 1, int(len(ordenadas) * percentil / 100 + 0.5) - 1))
+        resultado[f"p{percentil:g}"] = ordenadas[posicion]
+    return resultado
+
+
+def _banco(num_cuentas: int, **opciones) -> Banco:
+    banco = Banco("Banco Benchmark", **opciones)
+    banco.crear_cuentas_lote((str(i), f"Titular {i}", SALDO_INICIAL) for i in range(num_cuentas))
+    return banco
+
+
+def _latencias(operacion: Callable[[int], object], iteraciones: int) -> List[int]:
+    """Duración en ns de cada llamada, tras un calentamiento"""
+    for i in range(min(iteraciones, 1000)):
+        operacion(i)
+    reloj = time.perf_counter_ns
+    muestras = [0] * iteraciones
+    for i in range(iteraciones):
+        inicio = reloj()
+        operacion(i)
+        muestras[i] = reloj() - inicio
+    return muestras
+
+
+def medir_latencia(iteraciones: int = 20_000, num_cuentas: int = 1_000) -> Dict[str, dict]:
+    """Percentiles de latencia por operación"""
+    banco = _banco(num_cuentas)
+    generador = random.Random(1)
+    pares = [(str(generador.randrange(num_cuentas)), str(generador.randrange(num_cuentas)))
+             for _ in range(iteraciones)]
+    con_historial = banco.obtener_cuenta("0")
+    for _ in range(100):
+        con_historial.depositar(1.0)
+
+    operaciones = {
+        "depositar": lambda i: banco.depositar(pares[i][0], 1.0),
+        "retirar": lambda i: banco.retirar(pares[i][0], 1.0),
+        "transferir": lambda i: banco.transferir(pares[i][0], pares[i][1], 1.0),
+        "obtener_total_depositado": lambda i: banco.obtener_total_depositado(),
+        "obtener_historial_100": lambda i: con_historial.obtener_historial(),
+    }
+    resultado = {}
+    for nombre, operacion in operaciones.items():
+        muestras = _latencias(operacion, iteraciones)
+        for percentil, valor in percentiles(muestras).items():
+            resultado[f"latencia.{nombre}.{percentil}"] = metrica(valor, "ns", "menor")
+    return resultado
+
+
+def _por_segundo(operacion: Callable[[int], object], operaciones: int) -> float:
+    inicio = time.perf_counter()
+    for i in range(operaciones):
+        operacion(i)
+    return operaciones / (time.perf_counter() - inicio)
+
+
+def medir_rendimiento(tamanos: Sequence[int] = TAMANOS, operaciones: int = 100_000) -> Dict[str, dict]:
+    """Operaciones por segundo con bancos de distintos tamaños"""
+    resultado = {}
+    for tamano in tamanos:
+        inicio = time.perf_counter()
+        banco = _banco(tamano)
+        creacion = tamano / (time.perf_counter() - inicio)
+        generador = random.Random(tamano)
+        origenes = [str(generador.randrange(tamano)) for _ in range(operaciones)]
+        destinos = [str(generador.randrange(tamano)) for _ in range(operaciones)]
+
+        medidas = {
+            "crear_cuentas_lote": creacion,
+            "depositar": _por_segundo(lambda i: banco.depositar(origenes[i], 1.0), operaciones),
+            "retirar": _por_segundo(lambda i: banco.retirar(origenes[i], 1.0), operaciones),
+            "transferir": _por_segundo(lambda i: banco.transferir(origenes[i], destinos[i], 1.0), operaciones),
+            "obtener_total_depositado": _por_segundo(lambda i: banco.obtener_total_depositado(),
+                                                     min(operaciones, 10_000)),
+        }
+        inicio = time.perf_counter()
+        banco.transferir_lote(origenes, destinos, [1.0] * operaciones)
+        medidas["transferir_lote"] = operaciones / (time.perf_counter() - inicio)
+        for nombre, valor in medidas.items():
+            resultado[f"rendimiento.{tamano}.{nombre}"] = metrica(valor, "ops/s", "mayor")
+        del banco
+        gc.collect()
+    return resultado
+
+
+def medir_memoria(num_cuentas: int = 100_000, entradas: int = 100_000) -> Dict[str, dict]:
+    """Bytes por cuenta (con su parte de los índices del banco) y por entrada de historial"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        banco = _banco(num_cuentas)
+        por_cuenta = (tracemalloc.get_traced_memory()[0] - antes) / num_cuentas
+        del banco
+
+        cuenta = Cuenta("1", "Juan Pérez", 0.0)
+        antes = tracemalloc.get_traced_memory()[0]
+        for _ in range(entradas):
+            cuenta.depositar(1.0)
+        por_entrada = (tracemalloc.get_traced_memory()[0] - antes) / entradas
+    finally:
+        tracemalloc.stop()
+    return {
+        "memoria.bytes_por_cuenta": metrica(por_cuenta, "bytes", "menor"),
+        "memoria.bytes_por_entrada_historial": metrica(por_entrada, "bytes", "menor"),
+    }
+
+
+def _transferencias_en_hilos(num_hilos: int, operaciones: int, compartidas: bool) -> float:
+    """Transferencias por segundo; con compartidas=True todos los hilos usan las mismas cuentas"""
+    cuentas_por_hilo = 16
+    banco = _banco(cuentas_por_hilo * (1 if compartidas else num_hilos))
+    por_hilo = operaciones // num_hilos
+    barrera = threading.Barrier(num_hilos + 1)
+
+    def trabajador(hilo: int):
+        base = 0 if compartidas else hilo * cuentas_por_hilo
+        numeros = [str(base + i) for i in range(cuentas_por_hilo)]
+        barrera.wait()
+        for op in range(por_hilo):
+            banco.transferir(numeros[op % cuentas_por_hilo], numeros[(op + 1) % cuentas_por_hilo], 1.0)
+
+    hilos = [threading.Thread(target=trabajador, args=(hilo,)) for hilo in range(num_hilos)]
+    for hilo in hilos:
+        hilo.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    return por_hilo * num_hilos / (time.perf_counter() - inicio)
+
+
+def medir_concurrencia(hilos: Sequence[int] = (1, 4), operaciones: int = 100_000,
+                       validaciones: int = 10_000) -> Dict[str, dict]:
+    """Transferencias desde varios hilos y validaciones asíncronas en tiempo virtual"""
+    resultado = {}
+    for num_hilos in hilos:
+        for compartidas in (False, True):
+            nombre = "compartidas" if compartidas else "separadas"
+            resultado[f"concurrencia.transferir.{num_hilos}_hilos.{nombre}"] = metrica(
+                _transferencias_en_hilos(num_hilos, operaciones, compartidas), "ops/s", "mayor")
+
+    servicio = ServicioSimulado(semilla=1, latencia=latencia_constante(0.05), probabilidad_fallo=0.0)
+    banco = _banco(validaciones, servicio=servicio)
+    numeros = [str(i) for i in range(validaciones)]
+    inicio = time.perf_counter()
+    servicio.reloj.ejecutar(banco.avalidar_cuentas(numeros, concurrencia=100))
+    resultado["concurrencia.avalidar_cuentas"] = metrica(
+        validaciones / (time.perf_counter() - inicio), "ops/s", "mayor")
+    return resultado
+
+
+def metadatos() -> dict:
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "implementacion": platform.python_implementation(),
+        "plataforma": platform.platform(),
+        "nucleos": os.cpu_count(),
+    }
+
+
+def ejecutar(escenarios: Sequence[str] = ESCENARIOS, tamanos: Sequence[int] = TAMANOS,
+             operaciones: int = 100_000, iteraciones: int = 20_000,
+             progreso: Optional[Callable[[str], None]] = None) -> dict:
+    """Ejecuta los escenarios pedidos y devuelve {"metadatos": ..., "metricas": ...}"""
+    medidores = {
+        "latencia": lambda: medir_latencia(iteraciones),
+        "rendimiento": lambda: medir_rendimiento(tamanos, operaciones),
+        "memoria": lambda: medir_memoria(min(max(tamanos), 100_000), operaciones),
+        "concurrencia": lambda: medir_concurrencia(operaciones=operaciones, validaciones=operaciones // 10),
+    }
+    metricas: Dict[str, dict] = {}
+    for escenario in escenarios:
+        if escenario not in medidores:
+            raise ValueError(f"Escenario desconocido: {escenario}")
+        if progreso is not None:
+            progreso(escenario)
+        metricas.update(medidores[escenario]())
+    return {"metadatos": metadatos(), "metricas": metricas}
+
+
+def comparar(actual: dict, base: dict, tolerancia: float = 0.10) -> List[dict]:
+    """
+    Compara dos resultados métrica a métrica.
+
+    Devuelve una fila por métrica común con el cambio relativo y si es una
+    regresión, es decir, si empeora más que `tolerancia` en su sentido.
+    """
+    filas = []
+    for nombre, medida in actual["metricas"].items():
+        anterior = base["metricas"].get(nombre)
+        if anterior is None or not anterior["valor"]:
+            continue
+        cambio = medida["valor"] / anterior["valor"] - 1
+        empeora = -cambio if medida["mejor"] == "mayor" else cambio
+        filas.append({"metrica": nombre, "base": anterior["valor"], "actual": medida["valor"],
+                      "unidad": medida["unidad"], "cambio": cambio, "regresion": empeora > tolerancia})
+    return filas
@@ -0,0 +1,61 @@
+"""
+Módulo de Agregados
+Acumuladores incrementales usados por el banco
+"""
+
+import math
+from typing import Iterable, List
+
+
+class SumaExacta:
+    """
+    Suma de números flotantes sin error de redondeo acumulado.
+
+    Guarda la suma como una lista corta de parciales que no se solapan
+    (algoritmo de Shewchuk, el mismo que usa ``math.fsum``), por lo que
+    ``valor()`` es siempre igual a ``math.fsum`` de todos los sumandos.
+    """
+
+    __slots__ = ("_parciales",)
+
+    def __init__(self):
+        self._parciales: List[float] = []
+
+    def agregar(self, x: float):
+        """Suma un valor al acumulado"""
+        parciales = self._parciales
+        i = 0
+        for y in parciales:
+            if abs(x) < abs(y):
+                x, y = y, x
+            alto = x + y
+            bajo = y - (alto - x)
+            if bajo:
+                parciales[i] = bajo
+                i += 1
+            x = alto
+        parciales[i:] = [x]
+
+    def cambiar(self, anterior: float, nuevo: float):
+        """Reemplaza un sumando ya acumulado por un valor nuevo"""
+        # TwoSum: diferencia + error es exactamente nuevo - anterior. El error
+        # casi siempre es 0 y entonces basta una pasada por los parciales
+        diferencia = nuevo - anterior
+        virtual = diferencia - nuevo
+        error = (nuevo - (diferencia - virtual)) - (anterior + virtual)
+        self.agregar(diferencia)
+        if error:
+            self.agregar(error)
+
+    def parciales(self) -> List[float]:
+        """Copia de los parciales cuya suma exacta es el acumulado"""
+        return list(self._parciales)
+
+    def valor(self) -> float:
+        """Devuelve la suma correctamente redondeada"""
+        return math.fsum(self._parciales)
+
+    @staticmethod
+    def combinar(sumas: Iterable["SumaExacta"]) -> float:
+        """Devuelve la suma correctamente redondeada de varios acumulados"""
+        return math.fsum(parcial for suma in sumas for parcial in suma._parciales)
@@ -3,10 +3,62 @@ Módulo de Banco
 Sistema para manejar múltiples cuentas y transferencias
 """
 
+import asyncio
+import csv
+import gc
+import math
 import random
+import threading
 import time
-from typing import Dict, Optional
-from .cuenta import Cuenta, SaldoInsuficienteError
+from array import array
+from datetime import datetime
+from itertools import islice, repeat
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from .agregados import SumaExacta
+from .cache import CacheValidacion
+from .circuito import Cortacircuitos
+from .coalescencia import GrupoVuelos, GrupoVuelosAsync
+from .cuenta import Cuenta, CuentaCentavos, SaldoInsuficienteError
+from .eventos import DEPOSITO, RETIRO, TRANSFERENCIA, BusEventos
+from .exportacion import TAMANO_BLOQUE, EscritorHistorial
+from .historial import CODIGOS_TIPO, fecha_a_ns, ns_a_fecha
+from .indice_saldos import IndiceSaldos
+from .metricas import OPERACIONES_BANCO, OPERACIONES_CRONOMETRADAS, OPERACIONES_CUENTA, Metricas
+from .reloj import RELOJ_SISTEMA, Reloj
+from .retencion import PoliticaRetencion
+from .simulacion import ServicioSimulado
+from .snapshot import CuentasDiferidas, Snapshot, escribir_snapshot
+from .wal import RegistroCorruptoError, RegistroWAL
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy es opcional
+    np = None
+
+
+# Códigos de estado por fila de Banco.transferir_lote
+LOTE_OK = 0
+LOTE_CANTIDAD_INVALIDA = 1
+LOTE_CUENTA_NO_ENCONTRADA = 2
+LOTE_SALDO_INSUFICIENTE = 3
+
+# Por debajo de este número de cuentas con movimientos en un mismo "turno",
+# transferir_lote acumula los saldos cuenta por cuenta en lugar de por turnos
+_LOTE_MIN_POR_TURNO = 256
+
+# Filas sin saldo que transferir_lote descarta recalculando solo sus cuentas
+# antes de seguir fila a fila con el resto del lote
+_LOTE_MAX_RECALCULOS = 32
+
+# Número de franjas de candados por defecto
+NUM_FRANJAS = 64
+
+# Filas por bloque de Banco.crear_cuentas_lote
+TAMANO_BLOQUE_IMPORTACION = 10_000
+
+# Servicio externo simulado: latencia en segundos y probabilidad de fallo
+LATENCIA_SERVICIO_EXTERNO = 0.1
+PROBABILIDAD_FALLO_SERVICIO = 0.1
 
 
 class CuentaNoEncontradaError(Exception):
@@ -19,59 +71,1177 @@ class ServicioExternoError(Exception):
     pass
 
 
+class CircuitoAbiertoError(ServicioExternoError):
+    """Error inmediato cuando el cortacircuitos del servicio externo está abierto"""
+    pass
+
+
+class TotalInconsistenteError(Exception):
+    """Error cuando el total incremental no coincide con la suma completa"""
+    pass
+
+
+class _PausaRecolector:
+    """
+    Desactiva el recolector de ciclos mientras dura un bloque with.
+    
+    Las pausas de varios hilos se solapan sin pisarse: el recolector vuelve a
+    activarse al salir de la última, y solo si estaba activo al entrar en la
+    primera.
+    """
+    
+    __slots__ = ("_candado", "_pausas", "_reactivar")
+    
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._pausas = 0
+        self._reactivar = False
+    
+    def __enter__(self):
+        with self._candado:
+            if self._pausas == 0:
+                self._reactivar = gc.isenabled()
+                gc.disable()
+            self._pausas += 1
+        return self
+    
+    def __exit__(self, *excepcion):
+        with self._candado:
+            self._pausas -= 1
+            if self._pausas == 0 and self._reactivar:
+                gc.enable()
+        return False
+
+
+_PAUSA_RECOLECTOR = _PausaRecolector()
+
+
+class _Franja:
+    """Candado y agregados de un subconjunto de las cuentas del banco"""
+    
+    __slots__ = ("candado", "total", "transacciones", "totales_titular", "pendientes_indice")
+    
+    def __init__(self):
+        self.candado = threading.Lock()
+        self.total = SumaExacta()
+        self.transacciones = 0
+        # Saldo de las cuentas de cada titular que pertenecen a esta franja
+        self.totales_titular: Dict[str, SumaExacta] = {}
+        # Cuentas cuyo saldo cambió desde la última consulta del índice por
+        # saldo -> saldo con el que figuran en él (None si aún no figuran)
+        self.pendientes_indice: Dict[Cuenta, Optional[float]] = {}
+
+
 class Banco:
-    """Clase que representa un banco con múltiples cuentas"""
+    """
+    Clase que representa un banco con múltiples cuentas.
+    
+    Las operaciones del banco son seguras entre hilos. Cada cuenta pertenece a
+    una franja según el hash de su número; una operación bloquea solo las
+    franjas de las cuentas que toca, siempre en orden creciente de índice para
+    que dos transferencias cruzadas no puedan bloquearse mutuamente.
+    
+    Con centavos=True las cuentas son CuentaCentavos: saldos, historiales y
+    total se llevan en enteros de céntimos y son exactos en cualquier orden.
+    Con una política de retención, el historial antiguo de cada cuenta se
+    archiva en disco (un directorio por cuenta, que se vacía al crearla).
     
-    def __init__(self, nombre: str):
+    Las consultas por saldo (mayores saldos, rangos, posición y percentiles)
+    construyen la primera vez un índice ordenado. Después cada franja anota,
+    bajo su propio candado, las cuentas cuyo saldo cambia, y la siguiente
+    consulta aplica esos cambios al índice.
+    
+    Con un BusEventos, cada cuenta publica sus depósitos y retiros y el banco
+    sus transferencias, bajo los mismos candados que las aplican.
+    
+    Con un objeto Metricas se miden latencias y errores de las operaciones
+    del banco ("banco.transferir"...) y de las consultas de historial de sus
+    cuentas ("cuenta.obtener_historial"...); sin él los métodos no llevan
+    ninguna envoltura.
+    """
+    
+    def __init__(self, nombre: str, verificar_total: bool = False, num_franjas: int = NUM_FRANJAS,
+                 cache_validacion: Optional[CacheValidacion] = None,
+                 cortacircuitos: Optional[Cortacircuitos] = None,
+                 wal: Optional[RegistroWAL] = None, centavos: bool = False,
+                 retencion: Optional[PoliticaRetencion] = None, reloj: Optional[Reloj] = None,
+                 servicio: Optional[ServicioSimulado] = None, metricas: Optional[Metricas] = None,
+                 eventos: Optional[BusEventos] = None):
         self.nombre = nombre
         self.cuentas: Dict[str, Cuenta] = {}
-        self.contador_transacciones = 0
+        # Índice secundario: titular -> {número de cuenta: cuenta}
+        self._cuentas_por_titular: Dict[str, Dict[str, Cuenta]] = {}
+        # Índice por saldo, creado con la primera consulta que lo necesita
+        self._indice_saldos: Optional[IndiceSaldos] = None
+        self._candado_indice = threading.Lock()
+        self.verificar_total = verificar_total
+        self.centavos = centavos
+        self._clase_cuenta = CuentaCentavos if centavos else Cuenta
+        self.retencion = retencion
+        self.reloj = RELOJ_SISTEMA if reloj is None else reloj
+        # Sin modelo simulado, el servicio externo duerme de verdad (time.sleep)
+        self.servicio = servicio
+        self.cache_validacion = cache_validacion
+        self.cortacircuitos = cortacircuitos
+        self.wal = wal
+        self._franjas = [_Franja() for _ in range(num_franjas)]
+        # Validaciones concurrentes de la misma cuenta comparten una sola consulta
+        self.vuelos_validacion = GrupoVuelos()
+        self.vuelos_validacion_async = GrupoVuelosAsync()
+        self.eventos = eventos
+        self.metricas = metricas
+        # Las operaciones más frecuentes se miden desde dentro: sin métricas
+        # solo cuesta comprobar que su cronómetro es None
+        self._cronometro_depositar = self._cronometro_retirar = self._cronometro_transferir = None
+        if metricas is not None:
+            metricas.instrumentar(self, OPERACIONES_BANCO, "banco.")
+            for operacion in OPERACIONES_CRONOMETRADAS:
+                setattr(self, f"_cronometro_{operacion}", metricas.cronometro("banco." + operacion))
+            self._clase_cuenta = metricas.clase_instrumentada(self._clase_cuenta, OPERACIONES_CUENTA, "cuenta.")
+    
+    @property
+    def contador_transacciones(self) -> int:
+        """Número de transferencias realizadas"""
+        return sum(franja.transacciones for franja in self._franjas)
+    
+    @contador_transacciones.setter
+    def contador_transacciones(self, valor: int):
+        for franja in self._franjas:
+            franja.transacciones = 0
+        self._franjas[0].transacciones = valor
+    
+    def _indice_franja(self, numero_cuenta: str) -> int:
+        """Índice de la franja a la que pertenece una cuenta"""
+        return hash(numero_cuenta) % len(self._franjas)
+    
+    def _bloquear(self, numeros_cuenta: Iterable[str]) -> List[int]:
+        """Adquiere en orden los candados de las cuentas; devuelve sus franjas"""
+        indices = sorted({self._indice_franja(numero) for numero in numeros_cuenta})
+        for indice in indices:
+            self._franjas[indice].candado.acquire()
+        return indices
+    
+    def _bloquear_par(self, numero_a: str, numero_b: str) -> List[int]:
+        """_bloquear para dos cuentas (transferir), sin conjunto ni ordenación"""
+        franjas = self._franjas
+        a = hash(numero_a) % len(franjas)
+        b = hash(numero_b) % len(franjas)
+        if a == b:
+            indices = [a]
+        elif a < b:
+            indices = [a, b]
+        else:
+            indices = [b, a]
+        for indice in indices:
+            franjas[indice].candado.acquire()
+        return indices
+    
+    def _bloquear_todo(self) -> List[int]:
+        """Adquiere en orden los candados de todas las franjas"""
+        indices = list(range(len(self._franjas)))
+        for indice in indices:
+            self._franjas[indice].candado.acquire()
+        return indices
+    
+    def _desbloquear(self, indices: List[int]):
+        """Libera los candados adquiridos con _bloquear"""
+        for indice in reversed(indices):
+            self._franjas[indice].candado.release()
     
     def crear_cuenta(self, numero_cuenta: str, titular: str, saldo_inicial: float = 0.0) -> Cuenta:
         """Crea una nueva cuenta bancaria"""
-        if numero_cuenta in self.cuentas:
-            raise ValueError(f"La cuenta {numero_cuenta} ya existe")
-        
-        cuenta = Cuenta(numero_cuenta, titular, saldo_inicial)
-        self.cuentas[numero_cuenta] = cuenta
+        franja = self._franjas[self._indice_franja(numero_cuenta)]
+        with franja.candado:
+            if numero_cuenta in self.cuentas:
+                raise ValueError(f"La cuenta {numero_cuenta} ya existe")
+            
+            cuenta = self._clase_cuenta(numero_cuenta, titular, saldo_inicial, self.reloj)
+            fecha = self._anotar("crear", cuenta=numero_cuenta, titular=titular, saldo=saldo_inicial)
+            if fecha is not None:
+                cuenta.fecha_creacion = fecha
+            self._registrar_cuentas((cuenta,), franja)
+        if self.cache_validacion is not None:
+            self.cache_validacion.invalidar(numero_cuenta)
         return cuenta
     
+    def crear_cuentas_lote(self, registros: Iterable[Sequence],
+                           tamano_bloque: int = TAMANO_BLOQUE_IMPORTACION,
+                           pausar_recolector: bool = True) -> List[Tuple[int, str]]:
+        """
+        Crea cuentas a partir de filas (numero_cuenta, titular, saldo_inicial).
+        
+        Las filas se consumen por bloques de `tamano_bloque`, así que
+        `registros` puede ser un generador o un csv.reader de un archivo de
+        cualquier tamaño. Una fila inválida (campos que faltan, saldo no
+        numérico, negativo o, en modo céntimos, con fracciones de céntimo) o
+        con un número de cuenta que ya existe o se repite en el lote no se
+        crea. Devuelve los errores como (posición de la fila, motivo) en
+        lugar de lanzar excepciones; el resto de filas se crean igualmente.
+        
+        Con `pausar_recolector` el recolector de ciclos de Python queda
+        desactivado en todo el proceso (también para otros hilos) hasta que
+        termina la importación, y después vuelve a su estado anterior. Las
+        cuentas sí forman ciclos (su observador apunta al banco, que las
+        contiene), pero todas siguen vivas en el banco: el recolector no
+        liberaría nada y solo recorrería una y otra vez los objetos ya
+        creados, lo que reduce el ritmo de importación a menos de la mitad.
+        """
+        errores: List[Tuple[int, str]] = []
+        filas = enumerate(registros)
+        if not pausar_recolector:
+            return self._crear_bloques(filas, tamano_bloque, errores)
+        with _PAUSA_RECOLECTOR:
+            return self._crear_bloques(filas, tamano_bloque, errores)
+    
+    def _crear_bloques(self, filas: Iterable[Tuple[int, Sequence]], tamano_bloque: int,
+                       errores: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        """Consume las filas numeradas de crear_cuentas_lote bloque a bloque"""
+        while True:
+            bloque = list(islice(filas, tamano_bloque))
+            if not bloque:
+                return errores
+            self._crear_bloque(bloque, errores)
+    
+    def importar_cuentas_csv(self, ruta: str, encabezado: bool = True,
+                             tamano_bloque: int = TAMANO_BLOQUE_IMPORTACION,
+                             pausar_recolector: bool = True) -> List[Tuple[int, str]]:
+        """
+        Crea las cuentas de un CSV con columnas numero_cuenta, titular y saldo_inicial.
+        
+        El archivo se lee por bloques; las posiciones de los errores cuentan
+        las filas de datos desde 0, sin el encabezado. `pausar_recolector` es
+        el de crear_cuentas_lote.
+        """
+        with open(ruta, newline="", encoding="utf-8") as archivo:
+            lector = csv.reader(archivo)
+            if encabezado:
+                next(lector, None)
+            return self.crear_cuentas_lote(lector, tamano_bloque, pausar_recolector)
+    
+    def _crear_bloque(self, bloque: List[Tuple[int, Sequence]], errores: List[Tuple[int, str]],
+                      fecha_ns: Optional[int] = None):
+        """Valida, construye y registra un bloque de filas de crear_cuentas_lote"""
+        clase = self._clase_cuenta
+        reloj = self.reloj
+        primer_error = len(errores)
+        posiciones: List[int] = []
+        cuentas: List[Cuenta] = []
+        for fila, registro in bloque:
+            try:
+                numero_cuenta, titular, saldo_inicial = registro
+                saldo_inicial = float(saldo_inicial)
+            except (TypeError, ValueError):
+                errores.append((fila, "La fila debe tener número de cuenta, titular y saldo inicial numérico"))
+                continue
+            if not numero_cuenta or not titular:
+                errores.append((fila, "El número de cuenta y el titular no pueden estar vacíos"))
+                continue
+            if not 0 <= saldo_inicial < math.inf:
+                errores.append((fila, f"Saldo inicial inválido: {saldo_inicial}"))
+                continue
+            try:
+                cuenta = clase(numero_cuenta, titular, saldo_inicial, reloj)
+            except ValueError as error:
+                errores.append((fila, str(error)))
+                continue
+            posiciones.append(fila)
+            cuentas.append(cuenta)
+        
+        franjas = self._bloquear(cuenta.numero_cuenta for cuenta in cuentas)
+        try:
+            nuevas: List[Cuenta] = []
+            vistas = set()
+            for fila, cuenta in zip(posiciones, cuentas):
+                numero_cuenta = cuenta.numero_cuenta
+                if numero_cuenta in vistas:
+                    errores.append((fila, f"La cuenta {numero_cuenta} está repetida en el lote"))
+                elif numero_cuenta in self.cuentas:
+                    errores.append((fila, f"La cuenta {numero_cuenta} ya existe"))
+                else:
+                    vistas.add(numero_cuenta)
+                    nuevas.append(cuenta)
+            if len(errores) > primer_error:
+                errores[primer_error:] = sorted(errores[primer_error:])
+            
+            if fecha_ns is None:
+                fecha_ns = reloj.ahora_ns()
+                if self.wal is not None and nuevas:
+                    fecha = self._anotar("crear_lote", filas=[
+                        [cuenta.numero_cuenta, cuenta.titular, cuenta.obtener_saldo()] for cuenta in nuevas])
+                    fecha_ns = fecha_a_ns(fecha)
+            por_franja: Dict[int, List[Cuenta]] = {}
+            for cuenta in nuevas:
+                cuenta._creacion_ns = fecha_ns
+                por_franja.setdefault(self._indice_franja(cuenta.numero_cuenta), []).append(cuenta)
+            for indice, cuentas_franja in por_franja.items():
+                self._registrar_cuentas(cuentas_franja, self._franjas[indice])
+        finally:
+            self._desbloquear(franjas)
+        
+        if self.cache_validacion is not None:
+            for cuenta in nuevas:
+                self.cache_validacion.invalidar(cuenta.numero_cuenta)
+    
+    def _registrar_cuentas(self, cuentas: Sequence[Cuenta], franja: _Franja):
+        """
+        Añade al banco cuentas nuevas de una misma franja y sus saldos al total.
+        
+        Quien llama tiene el candado de la franja y ya ha comprobado que los
+        números no existen.
+        """
+        for cuenta in cuentas:
+            self.cuentas[cuenta.numero_cuenta] = cuenta
+        self._adoptar_cuentas(cuentas, franja)
+        agregar = franja.total.agregar
+        for cuenta in cuentas:
+            agregar(cuenta._saldo)
+    
     def obtener_cuenta(self, numero_cuenta: str) -> Cuenta:
         """Obtiene una cuenta por su número"""
         if numero_cuenta not in self.cuentas:
             raise CuentaNoEncontradaError(f"Cuenta {numero_cuenta} no encontrada")
         return self.cuentas[numero_cuenta]
     
+    def depositar(self, numero_cuenta: str, cantidad: float) -> bool:
+        """Deposita dinero en una cuenta del banco"""
+        cronometro = self._cronometro_depositar
+        inicio = 0 if cronometro is None else cronometro.iniciar()
+        try:
+            return self._depositar_en(self.obtener_cuenta(numero_cuenta), cantidad)
+        except Exception as error:
+            if cronometro is not None:
+                cronometro.fallo(error)
+            raise
+        finally:
+            if inicio:
+                cronometro.terminar(inicio)
+    
+    def retirar(self, numero_cuenta: str, cantidad: float) -> bool:
+        """Retira dinero de una cuenta del banco"""
+        cronometro = self._cronometro_retirar
+        inicio = 0 if cronometro is None else cronometro.iniciar()
+        try:
+            return self._retirar_en(self.obtener_cuenta(numero_cuenta), cantidad)
+        except Exception as error:
+            if cronometro is not None:
+                cronometro.fallo(error)
+            raise
+        finally:
+            if inicio:
+                cronometro.terminar(inicio)
+    
+    def _depositar_en(self, cuenta: Cuenta, cantidad: float, fecha: Optional[datetime] = None) -> bool:
+        """Deposita en una cuenta del banco bajo su candado, anotándolo antes en el WAL si lo hay"""
+        with self._franjas[self._indice_franja(cuenta.numero_cuenta)].candado:
+            if self.wal is not None:
+                cuenta._validar_deposito(cantidad)
+                fecha = self._anotar("deposito", fecha, cuenta=cuenta.numero_cuenta, cantidad=cantidad)
+            return cuenta._depositar(cantidad, fecha)
+    
+    def _retirar_en(self, cuenta: Cuenta, cantidad: float, fecha: Optional[datetime] = None) -> bool:
+        """Retira de una cuenta del banco bajo su candado, anotándolo antes en el WAL si lo hay"""
+        with self._franjas[self._indice_franja(cuenta.numero_cuenta)].candado:
+            if self.wal is not None:
+                cuenta._validar_retiro(cantidad)
+                fecha = self._anotar("retiro", fecha, cuenta=cuenta.numero_cuenta, cantidad=cantidad)
+            return cuenta._retirar(cantidad, fecha)
+    
     def transferir(self, numero_cuenta_origen: str, numero_cuenta_destino: str, cantidad: float) -> bool:
         """Transfiere dinero entre dos cuentas"""
-        if cantidad <= 0:
-            raise ValueError("La cantidad a transferir debe ser positiva")
+        cronometro = self._cronometro_transferir
+        inicio = 0 if cronometro is None else cronometro.iniciar()
+        try:
+            if cantidad <= 0:
+                raise ValueError("La cantidad a transferir debe ser positiva")
+            
+            cuenta_origen = self.obtener_cuenta(numero_cuenta_origen)
+            cuenta_destino = self.obtener_cuenta(numero_cuenta_destino)
+            
+            franjas = self._bloquear_par(numero_cuenta_origen, numero_cuenta_destino)
+            try:
+                # En modo céntimos rechaza cantidades con fracciones de céntimo
+                cuenta_destino._validar_deposito(cantidad)
+                
+                # Verificar saldo suficiente
+                if cuenta_origen.obtener_saldo() < cantidad:
+                    raise SaldoInsuficienteError("Saldo insuficiente para la transferencia")
+                
+                fecha = self._anotar("transferencia", origen=numero_cuenta_origen,
+                                     destino=numero_cuenta_destino, cantidad=cantidad)
+                
+                # Realizar transferencia
+                cuenta_origen._retirar(cantidad, fecha)
+                cuenta_destino._depositar(cantidad, fecha)
+                if self.eventos is not None:
+                    self.eventos.publicar(TRANSFERENCIA, numero_cuenta_origen, float(cantidad), None,
+                                          self.reloj.ahora_ns() if fecha is None else fecha_a_ns(fecha),
+                                          numero_cuenta_destino)
+                
+                self._franjas[franjas[0]].transacciones += 1
+            finally:
+                self._desbloquear(franjas)
+            return True
+        except Exception as error:
+            if cronometro is not None:
+                cronometro.fallo(error)
+            raise
+        finally:
+            if inicio:
+                cronometro.terminar(inicio)
+    
+    def transferir_lote(self, numeros_origen: Sequence[str], numeros_destino: Sequence[str],
+                        cantidades: Sequence[float]):
+        """
+        Transfiere dinero para cada fila de un lote sin lanzar excepciones.
         
-        cuenta_origen = self.obtener_cuenta(numero_cuenta_origen)
-        cuenta_destino = self.obtener_cuenta(numero_cuenta_destino)
+        Las filas se aplican en orden, con el mismo resultado que llamar a
+        transferir una a una. Devuelve un código LOTE_* por fila (un array de
+        NumPy si está disponible, o un array('b') en caso contrario).
+        """
+        n = len(cantidades)
+        if len(numeros_origen) != n or len(numeros_destino) != n:
+            raise ValueError("El lote debe tener el mismo número de orígenes, destinos y cantidades")
+        importes = self._importes_lote(cantidades) if self.centavos else cantidades
         
-        # Verificar saldo suficiente
-        if cuenta_origen.obtener_saldo() < cantidad:
-            raise SaldoInsuficienteError("Saldo insuficiente para la transferencia")
+        # Índices densos para las cuentas del lote (-1 si no existe)
+        indices: Dict[str, int] = {}
+        cuentas: List[Cuenta] = []
+        for numero in set(numeros_origen).union(numeros_destino):
+            cuenta = self.cuentas.get(numero)
+            if cuenta is not None:
+                indices[numero] = len(cuentas)
+                cuentas.append(cuenta)
+        indices_origen = list(map(indices.get, numeros_origen, repeat(-1)))
+        indices_destino = list(map(indices.get, numeros_destino, repeat(-1)))
         
-        # Realizar transferencia
-        cuenta_origen.retirar(cantidad)
-        cuenta_destino.depositar(cantidad)
+        franjas = self._bloquear(indices)
+        try:
+            # El resultado se calcula sin tocar las cuentas: si el WAL falla al
+            # escribir, el lote no queda aplicado a medias
+            if np is not None:
+                estados, saldos, movimientos = self._transferir_lote_numpy(
+                    cuentas, indices_origen, indices_destino, importes)
+                exitosas = int(np.count_nonzero(estados == LOTE_OK))
+            else:
+                estados = array("b", bytes(n))
+                saldos, movimientos = self._transferir_lote_secuencial(
+                    cuentas, indices_origen, indices_destino, importes, estados)
+                exitosas = estados.count(LOTE_OK)
+            
+            if self.wal is not None and exitosas:
+                filas = [[str(numeros_origen[fila]), str(numeros_destino[fila]), float(cantidades[fila])]
+                         for fila, estado in enumerate(estados) if estado == LOTE_OK]
+                # La fecha anotada (µs) es la que se guarda, para que reproducir dé la misma
+                fecha_ns = fecha_a_ns(self._anotar("lote", filas=filas))
+            else:
+                fecha_ns = self.reloj.ahora_ns()
+            if exitosas:
+                previos = None if self.eventos is None else [cuenta._saldo for cuenta in cuentas]
+                if np is not None:
+                    self._volcar_lote_numpy(cuentas, *movimientos, fecha_ns)
+                else:
+                    self._volcar_lote_secuencial(cuentas, *movimientos, fecha_ns)
+                if previos is not None:
+                    self._publicar_lote(cuentas, previos, indices_origen, indices_destino, importes, estados,
+                                        fecha_ns)
+            
+            for cuenta, saldo in zip(cuentas, saldos):
+                if cuenta._saldo != saldo:
+                    cuenta._reemplazar_saldo(saldo)
+            if exitosas:
+                self._franjas[franjas[0]].transacciones += exitosas
+        finally:
+            self._desbloquear(franjas)
+        return estados
+    
+    def _publicar_lote(self, cuentas, saldos, indices_origen, indices_destino, importes, estados, fecha_ns):
+        """Publica, fila a fila, los movimientos de las transferencias aplicadas por transferir_lote"""
+        publicar = self.eventos.publicar
+        escala = self._clase_cuenta.ESCALA or 1
+        for fila, estado in enumerate(estados.tolist()):
+            if estado != LOTE_OK:
+                continue
+            origen = cuentas[indices_origen[fila]]
+            destino = cuentas[indices_destino[fila]]
+            importe = importes[fila]
+            cantidad = float(importe / escala)
+            saldos[indices_origen[fila]] -= importe
+            publicar(RETIRO, origen.numero_cuenta, cantidad, float(saldos[indices_origen[fila]] / escala),
+                     fecha_ns)
+            saldos[indices_destino[fila]] += importe
+            publicar(DEPOSITO, destino.numero_cuenta, cantidad, float(saldos[indices_destino[fila]] / escala),
+                     fecha_ns)
+            publicar(TRANSFERENCIA, origen.numero_cuenta, cantidad, None, fecha_ns, destino.numero_cuenta)
+    
+    def _importes_lote(self, cantidades: Sequence[float]) -> List[int]:
+        """Pasa las cantidades de un lote a céntimos (0, es decir inválida, si no se puede)"""
+        a_unidades = self._clase_cuenta.a_unidades
+        importes = []
+        for cantidad in cantidades:
+            try:
+                importes.append(a_unidades(float(cantidad)))
+            except (TypeError, ValueError):
+                importes.append(0)
+        return importes
+    
+    @staticmethod
+    def _transferir_lote_secuencial(cuentas, indices_origen, indices_destino, cantidades, estados,
+                                    saldos: Optional[List] = None):
+        """
+        Valida el lote fila a fila sin modificar las cuentas.
+        
+        Trabaja con la representación interna de los saldos (float, o enteros
+        de céntimos para CuentaCentavos, con las cantidades ya convertidas),
+        partiendo de los de las cuentas o de `saldos` si se indican. Devuelve los saldos finales y los movimientos de las filas aplicadas,
+        en orden: cuenta, cantidad y saldo resultante de cada retiro seguido
+        del depósito correspondiente.
+        """
+        if saldos is None:
+            saldos = [cuenta._saldo for cuenta in cuentas]
+        movimientos_cuenta: List[int] = []
+        movimientos_cantidad: List[float] = []
+        movimientos_saldo: List[float] = []
+        for fila, cantidad in enumerate(cantidades):
+            if estados[fila] != LOTE_OK:
+                continue
+            if not cantidad > 0:
+                estados[fila] = LOTE_CANTIDAD_INVALIDA
+                continue
+            origen = indices_origen[fila]
+            destino = indices_destino[fila]
+            if origen < 0 or destino < 0:
+                estados[fila] = LOTE_CUENTA_NO_ENCONTRADA
+                continue
+            saldo_origen = saldos[origen]
+            if saldo_origen < cantidad:
+                estados[fila] = LOTE_SALDO_INSUFICIENTE
+                continue
+            saldos[origen] = saldo_origen = saldo_origen - cantidad
+            saldos[destino] = saldo_destino = saldos[destino] + cantidad
+            movimientos_cuenta += (origen, destino)
+            movimientos_cantidad += (cantidad, cantidad)
+            movimientos_saldo += (saldo_origen, saldo_destino)
+        return saldos, (movimientos_cuenta, movimientos_cantidad, movimientos_saldo)
+    
+    @staticmethod
+    def _volcar_lote_secuencial(cuentas, movimientos_cuenta, movimientos_cantidad, movimientos_saldo, fecha_ns):
+        """Añade al historial de cada cuenta los movimientos de _transferir_lote_secuencial"""
+        historiales = [cuenta.historial_transacciones for cuenta in cuentas]
+        tipos = (CODIGOS_TIPO["RETIRO"], CODIGOS_TIPO["DEPOSITO"])
+        for posicion, (cuenta, cantidad, saldo) in enumerate(
+                zip(movimientos_cuenta, movimientos_cantidad, movimientos_saldo)):
+            historiales[cuenta].agregar_ns(tipos[posicion & 1], cantidad, fecha_ns, saldo)
+    
+    def _transferir_lote_numpy(self, cuentas, indices_origen, indices_destino, cantidades):
+        """
+        Versión vectorizada de _transferir_lote_secuencial.
+        
+        Calcula de forma optimista todas las filas con cantidad y cuentas válidas,
+        acumulando los saldos de cada cuenta en el mismo orden que el camino
+        secuencial (por lo que el resultado es idéntico bit a bit). Si un retiro
+        resulta no tener saldo suficiente, la primera fila en esa situación se
+        descarta y solo se recalculan los saldos de sus dos cuentas; tras
+        _LOTE_MAX_RECALCULOS filas descartadas, el resto del lote sigue por el
+        camino secuencial. En modo céntimos todo se calcula con int64. Los
+        movimientos se devuelven agrupados por cuenta (cuenta, tipo, cantidad y
+        saldo resultante), en el orden de las filas dentro de cada cuenta.
+        """
+        tipo_importe = np.int64 if self.centavos else np.float64
+        cantidad = np.asarray(cantidades, dtype=tipo_importe)
+        origen = np.asarray(indices_origen, dtype=np.int64)
+        destino = np.asarray(indices_destino, dtype=np.int64)
+        estados = np.zeros(len(cantidad), dtype=np.int8)
+        estados[~(cantidad > 0)] = LOTE_CANTIDAD_INVALIDA
+        estados[(estados == LOTE_OK) & ((origen < 0) | (destino < 0))] = LOTE_CUENTA_NO_ENCONTRADA
+        filas = np.flatnonzero(estados == LOTE_OK)
+        
+        # Cada fila válida genera un retiro seguido de un depósito
+        eventos = 2 * len(filas)
+        cuenta_evento = np.empty(eventos, dtype=np.int64)
+        cuenta_evento[0::2] = origen[filas]
+        cuenta_evento[1::2] = destino[filas]
+        delta = np.repeat(cantidad[filas], 2)
+        delta[0::2] *= -1
+        iniciales = np.array([cuenta._saldo for cuenta in cuentas], dtype=tipo_importe)
+        saldos = iniciales.copy()
+        orden, cuenta_evento, delta, antes, despues = self._acumular_lote_numpy(saldos, cuenta_evento, delta)
+        retiros = delta < 0
+        fallidos = retiros & (antes < -delta)
+        
+        resto = None
+        if fallidos.any():
+            # Posición en `filas` de cada evento y tramo de cada cuenta
+            fila_evento = orden // 2
+            inicios = np.flatnonzero(np.r_[True, cuenta_evento[1:] != cuenta_evento[:-1]])
+            fines = np.r_[inicios[1:], eventos]
+            grupo = np.empty(len(cuentas), dtype=np.int64)
+            grupo[cuenta_evento[inicios]] = np.arange(len(inicios))
+            validos = np.ones(eventos, dtype=bool)
+            for _ in range(_LOTE_MAX_RECALCULOS):
+                # La primera fila con un retiro sin saldo lo es también fila a
+                # fila: todo lo anterior ya está calculado como en ese camino
+                primera = int(fila_evento[np.flatnonzero(fallidos)].min())
+                estados[filas[primera]] = LOTE_SALDO_INSUFICIENTE
+                for cuenta in {int(origen[filas[primera]]), int(destino[filas[primera]])}:
+                    tramo = slice(inicios[grupo[cuenta]], fines[grupo[cuenta]])
+                    validos[tramo] &= fila_evento[tramo] != primera
+                    posiciones = tramo.start + np.flatnonzero(validos[tramo])
+                    acumulado = np.cumsum(np.r_[iniciales[cuenta], delta[posiciones]])
+                    antes[posiciones] = acumulado[:-1]
+                    despues[posiciones] = acumulado[1:]
+                    fallidos[tramo] = validos[tramo] & retiros[tramo] & (antes[tramo] < -delta[tramo])
+                if not fallidos.any():
+                    break
+            else:
+                # Demasiadas filas sin saldo: desde la siguiente, fila a fila
+                resto = filas[int(fila_evento[np.flatnonzero(fallidos)].min()):]
+                validos &= fila_evento < len(filas) - len(resto)
+            
+            cuenta_evento, delta, despues = cuenta_evento[validos], delta[validos], despues[validos]
+            ultimos = np.r_[cuenta_evento[1:] != cuenta_evento[:-1], True] if len(cuenta_evento) else \
+                np.empty(0, dtype=bool)
+            saldos = iniciales.copy()
+            saldos[cuenta_evento[ultimos]] = despues[ultimos]
+        
+        if resto is not None:
+            estados_resto = [LOTE_OK] * len(resto)
+            saldos_finales, (movimientos_cuenta, movimientos_cantidad, movimientos_saldo) = \
+                self._transferir_lote_secuencial(
+                    cuentas, origen[resto].tolist(), destino[resto].tolist(), cantidad[resto].tolist(),
+                    estados_resto, saldos.tolist())
+            estados[resto] = estados_resto
+            saldos = np.asarray(saldos_finales, dtype=tipo_importe)
+            delta_resto = np.asarray(movimientos_cantidad, dtype=tipo_importe)
+            delta_resto[0::2] *= -1
+            # Las dos partes van en orden de filas: un orden estable por cuenta basta
+            cuenta_evento = np.r_[cuenta_evento, np.asarray(movimientos_cuenta, dtype=np.int64)]
+            orden = np.argsort(cuenta_evento, kind="stable")
+            cuenta_evento = cuenta_evento[orden]
+            delta = np.r_[delta, delta_resto][orden]
+            despues = np.r_[despues, np.asarray(movimientos_saldo, dtype=tipo_importe)][orden]
+        
+        tipos = np.where(delta < 0, CODIGOS_TIPO["RETIRO"], CODIGOS_TIPO["DEPOSITO"]).astype(np.int8)
+        return estados, saldos.tolist(), (cuenta_evento, tipos, np.abs(delta), despues)
+    
+    @staticmethod
+    def _acumular_lote_numpy(saldos, cuenta_evento, delta):
+        """
+        Aplica a `saldos` los eventos del lote (en orden de filas) y los agrupa por cuenta.
+        
+        Devuelve la permutación usada para agrupar (posición de cada evento en
+        el orden de filas) y, ya agrupados, la cuenta, el importe con signo y
+        los saldos antes y después de cada evento.
+        """
+        eventos = len(cuenta_evento)
+        # Agrupar los eventos por cuenta conservando el orden dentro de cada cuenta
+        orden = np.argsort(cuenta_evento, kind="stable")
+        cuenta_evento = cuenta_evento[orden]
+        delta = delta[orden]
+        inicios = np.flatnonzero(np.r_[True, cuenta_evento[1:] != cuenta_evento[:-1]])
+        tamanos = np.diff(np.r_[inicios, eventos])
+        turno = np.arange(eventos) - np.repeat(inicios, tamanos)
+        antes = np.empty(eventos, dtype=saldos.dtype)
+        despues = np.empty(eventos, dtype=saldos.dtype)
+        
+        # El k-ésimo evento de todas las cuentas se aplica a la vez mientras
+        # haya suficientes cuentas activas; las colas largas, cuenta por cuenta
+        por_turno = np.argsort(turno, kind="stable")
+        limites = np.r_[0, np.cumsum(np.bincount(turno))]
+        k = 0
+        while k + 1 < len(limites) and limites[k + 1] - limites[k] >= _LOTE_MIN_POR_TURNO:
+            posiciones = por_turno[limites[k]:limites[k + 1]]
+            afectadas = cuenta_evento[posiciones]
+            antes[posiciones] = saldos[afectadas]
+            saldos[afectadas] += delta[posiciones]
+            despues[posiciones] = saldos[afectadas]
+            k += 1
+        largas = tamanos > k
+        for inicio, tamano in zip(inicios[largas].tolist(), tamanos[largas].tolist()):
+            cuenta = cuenta_evento[inicio]
+            tramo = slice(inicio + k, inicio + tamano)
+            acumulado = np.cumsum(np.r_[saldos[cuenta], delta[tramo]])
+            antes[tramo] = acumulado[:-1]
+            despues[tramo] = acumulado[1:]
+            saldos[cuenta] = acumulado[-1]
+        return orden, cuenta_evento, delta, antes, despues
+    
+    @staticmethod
+    def _volcar_lote_numpy(cuentas, cuenta_evento, tipos, cantidades, saldos, fecha_ns):
+        """Añade al historial de cada cuenta sus movimientos, ya agrupados por cuenta"""
+        eventos = len(cuenta_evento)
+        if not eventos:
+            return
+        inicios = np.flatnonzero(np.r_[True, cuenta_evento[1:] != cuenta_evento[:-1]])
+        tamanos = np.diff(np.r_[inicios, eventos])
+        tipos = memoryview(np.ascontiguousarray(tipos)).cast("B")
+        columnas = [memoryview(np.ascontiguousarray(columna)).cast("B") for columna in
+                    (cantidades, np.full(eventos, fecha_ns, dtype=np.int64), saldos)]
+        for cuenta, inicio, tamano in zip(cuenta_evento[inicios].tolist(), inicios.tolist(), tamanos.tolist()):
+            historial = cuentas[cuenta].historial_transacciones
+            historial.tipos.frombytes(tipos[inicio:inicio + tamano])
+            inicio *= 8
+            fin = inicio + 8 * tamano
+            historial.cantidades.frombytes(columnas[0][inicio:fin])
+            historial.fechas.frombytes(columnas[1][inicio:fin])
+            historial.saldos.frombytes(columnas[2][inicio:fin])
+            historial.aplicar_retencion()
+    
+    def _anotar(self, operacion: str, fecha: Optional[datetime] = None, **datos) -> Optional[datetime]:
+        """Escribe la operación en el WAL, si lo hay, y devuelve su fecha (la actual si no se indica)"""
+        if self.wal is None:
+            return fecha
+        if fecha is None:
+            fecha = self.reloj.ahora()
+        self.wal.escribir({"op": operacion, "fecha": fecha_a_ns(fecha), **datos})
+        return fecha
+    
+    @classmethod
+    def recuperar(cls, nombre: str, wal: RegistroWAL, snapshot: Optional[str] = None,
+                  **opciones) -> "Banco":
+        """
+        Reconstruye un banco reproduciendo su WAL.
         
-        self.contador_transacciones += 1
-        return True
+        Saldos, historiales (con sus fechas) y contador_transacciones quedan
+        igual que antes del reinicio, también tras depósitos y retiros hechos
+        directamente sobre una Cuenta del banco, que pasan por él y se anotan.
+        Con la ruta de una instantánea guardada con ese mismo WAL, el banco
+        parte de ella y solo reproduce los registros posteriores. El banco
+        devuelto sigue escribiendo en el mismo WAL.
+        """
+        # Los eventos se conectan al terminar: reproducir no vuelve a publicar
+        eventos = opciones.pop("eventos", None)
+        desde = 0
+        if snapshot is None:
+            banco = cls(nombre, **opciones)
+        else:
+            instantanea = Snapshot(snapshot)
+            desde = instantanea.posicion_wal
+            if desde is None or desde > wal.posicion:
+                instantanea.cerrar()
+                raise ValueError(f"La instantánea {snapshot} no corresponde a este WAL")
+            banco = cls._desde_snapshot(nombre, instantanea, **opciones)
+        for registro in wal.registros(desde):
+            banco._reproducir(registro)
+        banco.wal = wal
+        if eventos is not None:
+            banco.eventos = eventos
+            # Solo las cuentas ya construidas: las que sigan en la instantánea
+            # se enganchan al bus cuando se pidan (_adoptar_cuentas)
+            banco._adoptar_eventos(dict.values(banco.cuentas))
+        return banco
+    
+    def _reproducir(self, registro: dict):
+        """Aplica una operación leída del WAL"""
+        operacion = registro["op"]
+        fecha = ns_a_fecha(registro["fecha"])
+        if operacion == "crear":
+            cuenta = self.crear_cuenta(registro["cuenta"], registro["titular"], registro["saldo"])
+            cuenta.fecha_creacion = fecha
+        elif operacion == "crear_lote":
+            self._crear_bloque(list(enumerate(registro["filas"])), [], registro["fecha"])
+        elif operacion == "deposito":
+            self.cuentas[registro["cuenta"]]._depositar(registro["cantidad"], fecha)
+        elif operacion == "retiro":
+            self.cuentas[registro["cuenta"]]._retirar(registro["cantidad"], fecha)
+        elif operacion in ("transferencia", "lote"):
+            filas = registro["filas"] if operacion == "lote" else \
+                [(registro["origen"], registro["destino"], registro["cantidad"])]
+            for origen, destino, cantidad in filas:
+                self.cuentas[origen]._retirar(cantidad, fecha)
+                self.cuentas[destino]._depositar(cantidad, fecha)
+            self._franjas[0].transacciones += len(filas)
+        else:
+            raise RegistroCorruptoError(f"Operación desconocida en el WAL: {operacion}")
+    
+    def guardar_snapshot(self, ruta: str, con_historial: bool = True):
+        """Guarda el estado del banco en una instantánea binaria"""
+        self._materializar_cuentas()
+        franjas = self._bloquear_todo()
+        try:
+            parciales = [parcial for franja in self._franjas for parcial in franja.total.parciales()]
+            # Con todas las franjas bloqueadas no hay escrituras del WAL a medias
+            posicion_wal = None if self.wal is None else self.wal.posicion
+            escribir_snapshot(ruta, list(self.cuentas.values()), parciales,
+                              self.contador_transacciones, con_historial, self.centavos, posicion_wal)
+        finally:
+            self._desbloquear(franjas)
+    
+    def exportar_historial(self, ruta: str, comprimir: bool = False,
+                           tamano_bloque: int = TAMANO_BLOQUE) -> int:
+        """
+        Exporta el historial de todas las cuentas en formato columnar (ver LectorHistorial).
+        
+        Las cuentas se recorren una a una copiando sus columnas bajo el candado
+        de su franja, así que en memoria solo hay un historial y un bloque a la
+        vez. Devuelve el número de transacciones exportadas.
+        """
+        with EscritorHistorial(ruta, self._clase_cuenta.ESCALA, comprimir, tamano_bloque) as escritor:
+            for numero_cuenta in list(self.cuentas):
+                cuenta = self.cuentas[numero_cuenta]
+                with self._franjas[self._indice_franja(numero_cuenta)].candado:
+                    columnas = cuenta.historial_transacciones.columnas()
+                escritor.agregar(numero_cuenta, *columnas)
+        return escritor.num_filas
+    
+    @classmethod
+    def cargar_snapshot(cls, nombre: str, ruta: str, verificar: bool = True, **opciones) -> "Banco":
+        """
+        Abre un banco desde una instantánea sin leer sus cuentas.
+        
+        El archivo se mapea en memoria y cada cuenta se construye la primera
+        vez que se pide (por ejemplo con obtener_cuenta). El total depositado y
+        el contador de transacciones están disponibles desde el principio.
+        """
+        return cls._desde_snapshot(nombre, Snapshot(ruta, verificar=verificar), **opciones)
+    
+    @classmethod
+    def _desde_snapshot(cls, nombre: str, snapshot: Snapshot, **opciones) -> "Banco":
+        """Crea un banco cuyas cuentas se leen bajo demanda de una instantánea abierta"""
+        if opciones.setdefault("centavos", snapshot.en_centavos) != snapshot.en_centavos:
+            snapshot.cerrar()
+            raise ValueError("El modo céntimos no coincide con el de la instantánea")
+        banco = cls(nombre, **opciones)
+        banco.cuentas = CuentasDiferidas(snapshot, banco._adoptar_cuenta_cargada)
+        for parcial in snapshot.parciales_total:
+            banco._franjas[0].total.agregar(parcial)
+        banco.contador_transacciones = snapshot.contador_transacciones
+        return banco
+    
+    def _adoptar_cuentas(self, cuentas: Sequence[Cuenta], franja: _Franja):
+        """
+        Engancha al banco cuentas de una franja cuyos saldos ya están incluidos en el total.
+        
+        Quien llama tiene el candado de la franja.
+        """
+        observador = self._al_cambiar_saldo
+        reloj = self.reloj
+        por_titular = self._cuentas_por_titular
+        totales_titular = franja.totales_titular
+        for cuenta in cuentas:
+            cuenta._observador = observador
+            cuenta._banco = self
+            cuenta.reloj = reloj
+            titular = cuenta.titular
+            cuentas_titular = por_titular.get(titular)
+            if cuentas_titular is None:
+                # El índice es común a todas las franjas: setdefault es atómico
+                # y otra franja puede estar creando el mismo titular a la vez
+                cuentas_titular = por_titular.setdefault(titular, {})
+            cuentas_titular[cuenta.numero_cuenta] = cuenta
+            total_titular = totales_titular.get(titular)
+            if total_titular is None:
+                total_titular = totales_titular[titular] = SumaExacta()
+            total_titular.agregar(cuenta._saldo)
+        
+        if self._indice_saldos is not None:
+            pendientes = franja.pendientes_indice
+            for cuenta in cuentas:
+                pendientes[cuenta] = None
+        if self.retencion is not None:
+            for cuenta in cuentas:
+                cuenta.historial_transacciones.configurar_retencion(
+                    self.retencion, self.retencion.directorio_cuenta(cuenta.numero_cuenta))
+        if self.eventos is not None:
+            self._adoptar_eventos(cuentas)
+    
+    def _adoptar_eventos(self, cuentas: Iterable[Cuenta]):
+        """Hace que las cuentas publiquen sus movimientos en el bus del banco"""
+        for cuenta in cuentas:
+            cuenta._bus = self.eventos
+    
+    def _adoptar_cuenta_cargada(self, cuenta: Cuenta):
+        """Adopta una cuenta que se acaba de leer de una instantánea"""
+        franja = self._franjas[self._indice_franja(cuenta.numero_cuenta)]
+        if self.metricas is not None:
+            cuenta.__class__ = self._clase_cuenta
+        with franja.candado:
+            self._adoptar_cuentas((cuenta,), franja)
+    
+    def _materializar_cuentas(self):
+        """Construye las cuentas de la instantánea que aún no se han pedido"""
+        if isinstance(self.cuentas, CuentasDiferidas):
+            self.cuentas.materializar_todo()
+    
+    def obtener_cuentas_por_titular(self, titular: str) -> List[Cuenta]:
+        """Obtiene las cuentas de un titular sin recorrer el resto del banco"""
+        self._materializar_cuentas()
+        return list(self._cuentas_por_titular.get(titular, {}).values())
+    
+    def obtener_total_por_titular(self, titular: str) -> float:
+        """
+        Obtiene el saldo total de las cuentas de un titular.
+        
+        Se mantiene en cada operación, por franjas, así que la consulta solo
+        combina num_franjas acumulados, sea cual sea el tamaño del banco.
+        """
+        self._materializar_cuentas()
+        return self._combinar_totales(
+            franja.totales_titular[titular] for franja in self._franjas if titular in franja.totales_titular)
+    
+    def _indice_por_saldo(self) -> IndiceSaldos:
+        """Índice por saldo de todas las cuentas, construyéndolo si aún no existe"""
+        indice = self._indice_saldos
+        if indice is None:
+            self._materializar_cuentas()
+            franjas = self._bloquear_todo()
+            try:
+                if self._indice_saldos is None:
+                    self._indice_saldos = IndiceSaldos(
+                        (cuenta.obtener_saldo(), numero) for numero, cuenta in self.cuentas.items())
+                indice = self._indice_saldos
+            finally:
+                self._desbloquear(franjas)
+        return indice
+    
+    def _actualizar_indice(self, indice: IndiceSaldos):
+        """
+        Aplica al índice los cambios de saldo anotados por las franjas.
+        
+        Quien llama tiene _candado_indice, que se toma siempre antes que los
+        de las franjas: así dos consultas no aplican cambios de la misma
+        cuenta en distinto orden.
+        """
+        escala = CuentaCentavos.ESCALA if self.centavos else None
+        for franja in self._franjas:
+            if not franja.pendientes_indice:
+                continue
+            with franja.candado:
+                pendientes, franja.pendientes_indice = franja.pendientes_indice, {}
+                cambios = [(cuenta.numero_cuenta, anterior, cuenta._saldo)
+                           for cuenta, anterior in pendientes.items()]
+            for numero, anterior, nuevo in cambios:
+                if escala is not None:
+                    nuevo /= escala
+                    if anterior is not None:
+                        anterior /= escala
+                if anterior is None:
+                    indice.agregar(nuevo, numero)
+                elif anterior != nuevo:
+                    indice.cambiar(numero, anterior, nuevo)
+    
+    def obtener_mayores_saldos(self, n: int) -> List[Cuenta]:
+        """Obtiene las n cuentas con más saldo, de mayor a menor"""
+        indice = self._indice_por_saldo()
+        with self._candado_indice:
+            self._actualizar_indice(indice)
+            claves = indice.mayores(n)
+        return [self.cuentas[numero] for _, numero in claves]
+    
+    def obtener_cuentas_por_saldo(self, minimo: float, maximo: float) -> List[Cuenta]:
+        """Obtiene las cuentas con minimo <= saldo <= maximo, de menor a mayor saldo"""
+        indice = self._indice_por_saldo()
+        with self._candado_indice:
+            self._actualizar_indice(indice)
+            numeros = [numero for _, numero in indice.entre(minimo, maximo)]
+        return [self.cuentas[numero] for numero in numeros]
+    
+    def obtener_posicion_saldo(self, numero_cuenta: str) -> int:
+        """
+        Obtiene la posición de una cuenta ordenando por saldo de mayor a menor.
+        
+        La cuenta con más saldo es la 1; las cuentas con el mismo saldo
+        comparten posición.
+        """
+        cuenta = self.obtener_cuenta(numero_cuenta)
+        indice = self._indice_por_saldo()
+        with self._candado_indice:
+            self._actualizar_indice(indice)
+            return len(indice) - indice.contar_hasta(cuenta.obtener_saldo()) + 1
+    
+    def obtener_percentil_saldo(self, percentil: float) -> float:
+        """Obtiene el saldo en el percentil dado (0-100, por rango más cercano)"""
+        if not 0 <= percentil <= 100:
+            raise ValueError("El percentil debe estar entre 0 y 100")
+        indice = self._indice_por_saldo()
+        with self._candado_indice:
+            self._actualizar_indice(indice)
+            if not len(indice):
+                raise ValueError("El banco no tiene cuentas")
+            posicion = max(math.ceil(percentil / 100 * len(indice)) - 1, 0)
+            return indice.clave(posicion)[0]
+    
+    def _combinar_totales(self, sumas: Iterable[SumaExacta]) -> float:
+        """Suma exacta de varios acumulados de saldos (enteros en modo céntimos)"""
+        if self.centavos:
+            # Los parciales son enteros: su suma es exacta y no depende del orden
+            return sum(parcial for suma in sumas for parcial in suma.parciales()) / CuentaCentavos.ESCALA
+        return SumaExacta.combinar(sumas)
     
     def obtener_total_depositado(self) -> float:
         """Obtiene el total de dinero depositado en todas las cuentas"""
-        return sum(cuenta.obtener_saldo() for cuenta in self.cuentas.values())
+        total = self._combinar_totales(franja.total for franja in self._franjas)
+        if self.verificar_total:
+            total_completo = self._calcular_total_completo()
+            if total != total_completo:
+                raise TotalInconsistenteError(
+                    f"Total incremental {total} distinto de la suma completa {total_completo}"
+                )
+        return total
+    
+    def _calcular_total_completo(self) -> float:
+        """Suma los saldos de todas las cuentas recorriéndolas una a una"""
+        if self.centavos:
+            return sum(cuenta._saldo for cuenta in self.cuentas.values()) / CuentaCentavos.ESCALA
+        return math.fsum(cuenta.obtener_saldo() for cuenta in self.cuentas.values())
+    
+    def _al_cambiar_saldo(self, cuenta: Cuenta, saldo_anterior: float, saldo_nuevo: float):
+        """Mantiene el total del banco y el del titular cuando cambia el saldo de una cuenta"""
+        franja = self._franjas[self._indice_franja(cuenta.numero_cuenta)]
+        franja.total.cambiar(saldo_anterior, saldo_nuevo)
+        total_titular = franja.totales_titular.get(cuenta.titular)
+        if total_titular is not None:
+            total_titular.cambiar(saldo_anterior, saldo_nuevo)
+        if self._indice_saldos is not None:
+            # El índice se pone al día en la próxima consulta: aquí solo se
+            # anota, bajo el candado de la franja, el saldo con que figura
+            franja.pendientes_indice.setdefault(cuenta, saldo_anterior)
     
     def validar_cuenta_con_servicio_externo(self, numero_cuenta: str) -> bool:
         """Simula la validación de una cuenta con un servicio externo"""
-        # Simulamos latencia de red
-        time.sleep(0.1)
+        cache = self.cache_validacion
+        if cache is not None:
+            resultado = cache.obtener(numero_cuenta)
+            if resultado is not None:
+                return resultado
+            version = cache.version(numero_cuenta)
+        
+        resultado = self.vuelos_validacion.ejecutar(
+            numero_cuenta, self._consultar_servicio_externo, numero_cuenta)
+        if cache is not None:
+            cache.guardar(numero_cuenta, resultado, version)
+        return resultado
+    
+    async def avalidar_cuenta(self, numero_cuenta: str) -> bool:
+        """Versión asíncrona de validar_cuenta_con_servicio_externo"""
+        cache = self.cache_validacion
+        if cache is not None:
+            resultado = cache.obtener(numero_cuenta)
+            if resultado is not None:
+                return resultado
+            version = cache.version(numero_cuenta)
+        
+        resultado = await self.vuelos_validacion_async.ejecutar(
+            numero_cuenta, self._aconsultar_servicio_externo, numero_cuenta)
+        if cache is not None:
+            cache.guardar(numero_cuenta, resultado, version)
+        return resultado
+    
+    async def avalidar_cuentas(self, numeros_cuenta: Sequence[str], concurrencia: int = 100,
+                               return_exceptions: bool = False) -> List:
+        """
+        Valida varias cuentas con como mucho `concurrencia` peticiones en vuelo.
+        
+        Devuelve los resultados en el orden de entrada. Si alguna validación
+        falla con ServicioExternoError se lanza el primero de esos errores una
+        vez terminado el lote, salvo con return_exceptions=True, en cuyo caso
+        el error ocupa el lugar del resultado.
+        """
+        if concurrencia < 1:
+            raise ValueError("La concurrencia debe ser al menos 1")
+        
+        resultados: List = [None] * len(numeros_cuenta)
+        pendientes = iter(enumerate(numeros_cuenta))
+        
+        async def trabajador():
+            for indice, numero_cuenta in pendientes:
+                try:
+                    resultados[indice] = await self.avalidar_cuenta(numero_cuenta)
+                except ServicioExternoError as error:
+                    resultados[indice] = error
+        
+        await asyncio.gather(*(trabajador() for _ in range(min(concurrencia, len(numeros_cuenta)))))
+        if not return_exceptions:
+            for resultado in resultados:
+                if isinstance(resultado, ServicioExternoError):
+                    raise resultado
+        return resultados
+    
+    def _consultar_servicio_externo(self, numero_cuenta: str) -> bool:
+        """Consulta el servicio externo, a través del cortacircuitos si lo hay"""
+        circuito = self.cortacircuitos
+        if circuito is None:
+            # Simulamos latencia de red
+            self._esperar(self._latencia_servicio())
+            return self._respuesta_servicio_externo(numero_cuenta)
+        
+        intento = 0
+        while True:
+            if not circuito.permitir():
+                raise CircuitoAbiertoError("Servicio de validación no disponible (circuito abierto)")
+            try:
+                self._esperar(self._latencia_servicio())
+                resultado = self._respuesta_servicio_externo(numero_cuenta)
+            except ServicioExternoError:
+                circuito.registrar_fallo()
+                if intento >= circuito.reintentos:
+                    raise
+                self._esperar(circuito.espera_reintento(intento))
+                intento += 1
+            except BaseException:
+                # Cancelada o interrumpida: la prueba no cuenta, pero su hueco se libera
+                circuito.liberar_prueba()
+                raise
+            else:
+                circuito.registrar_exito()
+                return resultado
+    
+    async def _aconsultar_servicio_externo(self, numero_cuenta: str) -> bool:
+        """Versión asíncrona de _consultar_servicio_externo"""
+        circuito = self.cortacircuitos
+        if circuito is None:
+            # La latencia de red se espera sin bloquear el hilo
+            await self._aesperar(self._latencia_servicio())
+            return self._respuesta_servicio_externo(numero_cuenta)
         
+        intento = 0
+        while True:
+            if not circuito.permitir():
+                raise CircuitoAbiertoError("Servicio de validación no disponible (circuito abierto)")
+            try:
+                await self._aesperar(self._latencia_servicio())
+                resultado = self._respuesta_servicio_externo(numero_cuenta)
+            except ServicioExternoError:
+                circuito.registrar_fallo()
+                if intento >= circuito.reintentos:
+                    raise
+                await self._aesperar(circuito.espera_reintento(intento))
+                intento += 1
+            except BaseException:
+                # Cancelada o interrumpida: la prueba no cuenta, pero su hueco se libera
+                circuito.liberar_prueba()
+                raise
+            else:
+                circuito.registrar_exito()
+                return resultado
+    
+    def _latencia_servicio(self) -> float:
+        """Latencia de la próxima llamada al servicio externo"""
+        if self.servicio is None:
+            return LATENCIA_SERVICIO_EXTERNO
+        return self.servicio.latencia()
+    
+    def _esperar(self, segundos: float):
+        """Espera real, o simulada si hay un modelo del servicio"""
+        if self.servicio is None:
+            time.sleep(segundos)
+        else:
+            self.servicio.esperar(segundos)
+    
+    async def _aesperar(self, segundos: float):
+        """Versión asíncrona de _esperar"""
+        if self.servicio is None:
+            await asyncio.sleep(segundos)
+        else:
+            await self.servicio.aesperar(segundos)
+    
+    def _respuesta_servicio_externo(self, numero_cuenta: str) -> bool:
+        """Respuesta simulada del servicio externo, una vez pasada la latencia"""
         # Simulamos respuesta no determinística (flaky test)
-        if random.random() < 0.1:  # 10% de probabilidad de fallo
+        if self.servicio is None:
+            fallo = random.random() < PROBABILIDAD_FALLO_SERVICIO
+        else:
+            fallo = self.servicio.falla()
+        if fallo:
             raise ServicioExternoError("Servicio de validación no disponible")
         
         # Simulamos validación exitosa
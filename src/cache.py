@@ -0,0 +1,111 @@
+"""
+Módulo de Caché
+Caché de resultados de validación con caducidad y expulsión LRU
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# Las invalidaciones se cuentan por grupos de cuentas (según el hash del
+# número): invalidar una cuenta solo descarta los resultados en vuelo de su
+# grupo, y la memoria no crece con el número de cuentas invalidadas
+NUM_VERSIONES = 4096
+
+
+class CacheValidacion:
+    """
+    Caché LRU con caducidad (TTL) para resultados de validación de cuentas.
+
+    Guarda tanto los resultados positivos como los negativos ("la cuenta no
+    existe"), cada uno con su propio TTL. Nunca guarda errores del servicio.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entradas: int = 10_000,
+                 ttl_negativo: Optional[float] = None,
+                 reloj: Callable[[], float] = time.monotonic):
+        if max_entradas < 1:
+            raise ValueError("La caché debe admitir al menos una entrada")
+        self.ttl = ttl
+        self.ttl_negativo = ttl if ttl_negativo is None else ttl_negativo
+        self.max_entradas = max_entradas
+        self._reloj = reloj
+        self._entradas: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self._candado = threading.Lock()
+        # Sube con limpiar(); las de cada grupo de cuentas, con invalidar()
+        self.generacion = 0
+        self._versiones = [0] * NUM_VERSIONES
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.caducadas = 0
+        self.invalidaciones = 0
+
+    def obtener(self, numero_cuenta: str) -> Optional[bool]:
+        """Devuelve el resultado guardado, o None si no está o ha caducado"""
+        with self._candado:
+            entrada = self._entradas.get(numero_cuenta)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            resultado, caduca = entrada
+            if self._reloj() >= caduca:
+                del self._entradas[numero_cuenta]
+                self.caducadas += 1
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(numero_cuenta)
+            self.aciertos += 1
+            return resultado
+
+    def version(self, numero_cuenta: str) -> int:
+        """Versión de una cuenta: cambia al invalidarla (o a otra de su grupo) y al limpiar la caché"""
+        # Ambos contadores solo crecen, así que la suma cambia si cambia cualquiera
+        return self.generacion + self._versiones[hash(numero_cuenta) % NUM_VERSIONES]
+
+    def guardar(self, numero_cuenta: str, resultado: bool, version: Optional[int] = None):
+        """
+        Guarda un resultado de validación.
+
+        Si se indica la versión de la cuenta leída antes de consultar el
+        servicio y desde entonces la cuenta se ha invalidado, el resultado se
+        descarta.
+        """
+        with self._candado:
+            if version is not None and version != self.version(numero_cuenta):
+                return
+            ttl = self.ttl if resultado else self.ttl_negativo
+            self._entradas[numero_cuenta] = (resultado, self._reloj() + ttl)
+            self._entradas.move_to_end(numero_cuenta)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+
+    def invalidar(self, numero_cuenta: str):
+        """Elimina el resultado guardado para una cuenta"""
+        with self._candado:
+            self._versiones[hash(numero_cuenta) % NUM_VERSIONES] += 1
+            if self._entradas.pop(numero_cuenta, None) is not None:
+                self.invalidaciones += 1
+
+    def limpiar(self):
+        """Elimina todas las entradas"""
+        with self._candado:
+            self.generacion += 1
+            self._entradas.clear()
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Contadores de uso de la caché"""
+        with self._candado:
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "caducadas": self.caducadas,
+                "invalidaciones": self.invalidaciones,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entradas)
@@ -0,0 +1,133 @@
+"""
+Módulo de Cortacircuitos
+Protege las llamadas a un servicio externo degradado
+"""
+
+import random
+import threading
+import time
+from typing import Callable, List, Tuple
+
+# Estados del cortacircuitos
+CERRADO = "CERRADO"
+ABIERTO = "ABIERTO"
+SEMIABIERTO = "SEMIABIERTO"
+
+
+class Cortacircuitos:
+    """
+    Cortacircuitos (circuit breaker) con reintentos y espera exponencial.
+
+    - CERRADO: las llamadas pasan; tras `umbral_fallos` fallos seguidos se abre.
+    - ABIERTO: las llamadas se rechazan al instante durante `tiempo_apertura`.
+    - SEMIABIERTO: se dejan pasar hasta `max_pruebas` llamadas de prueba; un
+      éxito cierra el circuito y un fallo lo vuelve a abrir.
+
+    Los cambios de estado se notifican a los suscriptores como
+    (estado_anterior, estado_nuevo), ya sin el candado tomado, así que un
+    suscriptor puede consultar el cortacircuitos.
+    """
+
+    def __init__(self, umbral_fallos: int = 5, tiempo_apertura: float = 30.0,
+                 max_pruebas: int = 1, reintentos: int = 2,
+                 espera_base: float = 0.05, espera_maxima: float = 1.0,
+                 reloj: Callable[[], float] = time.monotonic,
+                 aleatorio: Callable[[], float] = random.random):
+        if umbral_fallos < 1:
+            raise ValueError("El umbral de fallos debe ser al menos 1")
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_apertura = tiempo_apertura
+        self.max_pruebas = max_pruebas
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self._reloj = reloj
+        self._aleatorio = aleatorio
+        self._candado = threading.Lock()
+        self._estado = CERRADO
+        self._fallos_seguidos = 0
+        self._abierto_hasta = 0.0
+        self._pruebas_en_curso = 0
+        self._suscriptores: List[Callable[[str, str], None]] = []
+        # Cambios de estado pendientes de notificar, en orden
+        self._transiciones: List[Tuple[str, str]] = []
+        self.aperturas = 0
+        self.rechazos = 0
+
+    @property
+    def estado(self) -> str:
+        """Estado actual, pasando a SEMIABIERTO si ya venció la apertura"""
+        with self._candado:
+            self._actualizar_estado()
+            estado = self._estado
+        self._notificar()
+        return estado
+
+    def suscribir(self, callback: Callable[[str, str], None]):
+        """Registra una función que recibe cada cambio de estado"""
+        self._suscriptores.append(callback)
+
+    def permitir(self) -> bool:
+        """Indica si una llamada puede pasar; cuenta el rechazo si no"""
+        with self._candado:
+            self._actualizar_estado()
+            if self._estado == CERRADO:
+                permitida = True
+            elif self._estado == SEMIABIERTO and self._pruebas_en_curso < self.max_pruebas:
+                self._pruebas_en_curso += 1
+                permitida = True
+            else:
+                self.rechazos += 1
+                permitida = False
+        self._notificar()
+        return permitida
+
+    def registrar_exito(self):
+        """Anota una llamada terminada con éxito"""
+        with self._candado:
+            self._fallos_seguidos = 0
+            if self._estado == SEMIABIERTO:
+                self._pruebas_en_curso = 0
+                self._cambiar_estado(CERRADO)
+        self._notificar()
+
+    def registrar_fallo(self):
+        """Anota una llamada fallida"""
+        with self._candado:
+            self._fallos_seguidos += 1
+            if self._estado == SEMIABIERTO or (
+                    self._estado == CERRADO and self._fallos_seguidos >= self.umbral_fallos):
+                self._pruebas_en_curso = 0
+                self._abierto_hasta = self._reloj() + self.tiempo_apertura
+                self.aperturas += 1
+                self._cambiar_estado(ABIERTO)
+        self._notificar()
+
+    def liberar_prueba(self):
+        """Devuelve el hueco de una prueba que terminó sin éxito ni fallo (p. ej. cancelada)"""
+        with self._candado:
+            if self._estado == SEMIABIERTO and self._pruebas_en_curso > 0:
+                self._pruebas_en_curso -= 1
+
+    def espera_reintento(self, intento: int) -> float:
+        """Espera antes del reintento `intento` (0, 1, ...): exponencial con jitter completo"""
+        return self._aleatorio() * min(self.espera_maxima, self.espera_base * (2 ** intento))
+
+    def _actualizar_estado(self):
+        if self._estado == ABIERTO and self._reloj() >= self._abierto_hasta:
+            self._cambiar_estado(SEMIABIERTO)
+
+    def _cambiar_estado(self, nuevo: str):
+        # Se llama con el candado tomado: el aviso queda pendiente para _notificar
+        anterior, self._estado = self._estado, nuevo
+        self._transiciones.append((anterior, nuevo))
+
+    def _notificar(self):
+        """Avisa a los suscriptores de los cambios pendientes; se llama sin el candado"""
+        if not self._transiciones:
+            return
+        with self._candado:
+            transiciones, self._transiciones = self._transiciones, []
+        for anterior, nuevo in transiciones:
+            for callback in self._suscriptores:
+                callback(anterior, nuevo)
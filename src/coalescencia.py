@@ -0,0 +1,121 @@
+"""
+Módulo de Coalescencia
+Agrupa llamadas concurrentes con la misma clave en una sola ejecución
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Vuelo:
+    """Llamada en curso compartida por todos los que piden la misma clave"""
+
+    __slots__ = ("terminado", "resultado", "error")
+
+    def __init__(self):
+        self.terminado = threading.Event()
+        self.resultado: Any = None
+        self.error: BaseException = None
+
+
+class GrupoVuelos:
+    """
+    Coalescencia de llamadas para código con hilos ("single flight").
+
+    Mientras haya una llamada en curso para una clave, el resto de hilos que
+    pidan esa clave esperan y reciben el mismo resultado o el mismo error.
+    """
+
+    def __init__(self):
+        self._vuelos: Dict[Hashable, _Vuelo] = {}
+        self._candado = threading.Lock()
+        self.llamadas = 0
+        self.compartidas = 0
+
+    def ejecutar(self, clave: Hashable, funcion: Callable[..., Any], *args) -> Any:
+        """Ejecuta funcion(*args) salvo que ya haya una llamada en curso para la clave"""
+        with self._candado:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[clave] = _Vuelo()
+                self.llamadas += 1
+            else:
+                self.compartidas += 1
+
+        if not lider:
+            vuelo.terminado.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado
+
+        try:
+            vuelo.resultado = funcion(*args)
+        except BaseException as error:
+            vuelo.error = error
+            raise
+        finally:
+            with self._candado:
+                del self._vuelos[clave]
+            vuelo.terminado.set()
+        return vuelo.resultado
+
+    def en_curso(self) -> int:
+        """Número de claves con una llamada en curso"""
+        return len(self._vuelos)
+
+
+class _VueloAsync:
+    """Tarea en curso compartida por todas las corrutinas que piden la misma clave"""
+
+    __slots__ = ("tarea", "esperando")
+
+    def __init__(self, tarea: asyncio.Task):
+        self.tarea = tarea
+        self.esperando = 0
+
+
+class GrupoVuelosAsync:
+    """
+    Coalescencia de llamadas para corrutinas de asyncio.
+
+    La llamada se ejecuta en una tarea propia que todos esperan a través de
+    asyncio.shield: si se cancela a quien la inició (por ejemplo, al vencer un
+    wait_for), el resto sigue esperando y recibe el resultado o el error. La
+    tarea solo se cancela cuando ya no la espera nadie.
+    """
+
+    def __init__(self):
+        self._vuelos: Dict[Hashable, _VueloAsync] = {}
+        self.llamadas = 0
+        self.compartidas = 0
+
+    async def ejecutar(self, clave: Hashable, funcion: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Espera funcion(*args) salvo que ya haya una llamada en curso para la clave"""
+        vuelo = self._vuelos.get(clave)
+        if vuelo is None or vuelo.tarea.done():
+            vuelo = self._vuelos[clave] = _VueloAsync(asyncio.ensure_future(funcion(*args)))
+            vuelo.tarea.add_done_callback(lambda tarea: self._terminar(clave, vuelo))
+            self.llamadas += 1
+        else:
+            self.compartidas += 1
+
+        vuelo.esperando += 1
+        try:
+            return await asyncio.shield(vuelo.tarea)
+        finally:
+            vuelo.esperando -= 1
+            if not vuelo.esperando and not vuelo.tarea.done():
+                vuelo.tarea.cancel()
+
+    def _terminar(self, clave: Hashable, vuelo: _VueloAsync):
+        if self._vuelos.get(clave) is vuelo:
+            del self._vuelos[clave]
+        if not vuelo.tarea.cancelled():
+            # Marca el error como consultado aunque nadie más esté esperando
+            vuelo.tarea.exception()
+
+    def en_curso(self) -> int:
+        """Número de claves con una llamada en curso"""
+        return len(self._vuelos)
@@ -3,8 +3,13 @@ Módulo de Cuenta Bancaria
 Sistema simple para el taller de testing
 """
 
+import math
 from datetime import datetime
-from typing import List
+from typing import Callable, List, Optional, Tuple
+
+from .eventos import BusEventos
+from .historial import CODIGOS_TIPO, HistorialTransacciones, VistaHistorial, fecha_a_ns, ns_a_fecha
+from .reloj import RELOJ_SISTEMA, Reloj
 
 
 class SaldoInsuficienteError(Exception):
@@ -15,49 +20,214 @@ class SaldoInsuficienteError(Exception):
 class Cuenta:
     """Clase que representa una cuenta bancaria básica"""
     
-    def __init__(self, numero_cuenta: str, titular: str, saldo_inicial: float = 0.0):
+    # Unidades mínimas por unidad de moneda; None si el saldo es un float
+    ESCALA: Optional[int] = None
+    
+    # Bus en el que publicar cada movimiento; como atributo de clase no ocupa
+    # memoria en las cuentas que no lo usan
+    _bus: Optional[BusEventos] = None
+    
+    # Banco al que pertenece: depositar y retirar pasan por él para hacerse
+    # bajo el candado de la franja de la cuenta (y anotarse en su WAL, si hay)
+    _banco = None
+    
+    def __init__(self, numero_cuenta: str, titular: str, saldo_inicial: float = 0.0,
+                 reloj: Optional[Reloj] = None):
         self.numero_cuenta = numero_cuenta
         self.titular = titular
-        self.saldo = saldo_inicial
-        self.historial_transacciones = []
-        self.fecha_creacion = datetime.now()
+        self._observador: Optional[Callable[["Cuenta", float, float], None]] = None
+        self._saldo = saldo_inicial
+        # Saldo del que parte el historial (en la representación interna)
+        self._saldo_apertura = saldo_inicial
+        self.historial_transacciones = HistorialTransacciones(self.ESCALA)
+        self.reloj = RELOJ_SISTEMA if reloj is None else reloj
+        self._creacion_ns = self.reloj.ahora_ns()
+    
+    @property
+    def fecha_creacion(self) -> datetime:
+        """Fecha de creación de la cuenta"""
+        return ns_a_fecha(self._creacion_ns)
+    
+    @fecha_creacion.setter
+    def fecha_creacion(self, fecha: datetime):
+        self._creacion_ns = fecha_a_ns(fecha)
+    
+    @property
+    def saldo(self) -> float:
+        """Saldo actual de la cuenta"""
+        return self._saldo
+    
+    @saldo.setter
+    def saldo(self, valor: float):
+        self._reemplazar_saldo(valor)
+    
+    def depositar(self, cantidad: float, fecha: Optional[datetime] = None) -> bool:
+        """Deposita dinero en la cuenta (con la fecha actual si no se indica)"""
+        if self._banco is not None:
+            return self._banco._depositar_en(self, cantidad, fecha)
+        return self._depositar(cantidad, fecha)
+    
+    def retirar(self, cantidad: float, fecha: Optional[datetime] = None) -> bool:
+        """Retira dinero de la cuenta (con la fecha actual si no se indica)"""
+        if self._banco is not None:
+            return self._banco._retirar_en(self, cantidad, fecha)
+        return self._retirar(cantidad, fecha)
+    
+    def _depositar(self, cantidad: float, fecha: Optional[datetime] = None) -> bool:
+        """Aplica un depósito sin pasar por el banco"""
+        self._validar_deposito(cantidad)
+        
+        saldo_anterior = self._saldo
+        self._saldo = saldo_anterior + cantidad
+        self._registrar_transaccion("DEPOSITO", cantidad, fecha)
+        if self._observador is not None:
+            self._observador(self, saldo_anterior, self._saldo)
+        return True
+    
+    def _retirar(self, cantidad: float, fecha: Optional[datetime] = None) -> bool:
+        """Aplica un retiro sin pasar por el banco"""
+        self._validar_retiro(cantidad)
+        
+        saldo_anterior = self._saldo
+        self._saldo = saldo_anterior - cantidad
+        self._registrar_transaccion("RETIRO", cantidad, fecha)
+        if self._observador is not None:
+            self._observador(self, saldo_anterior, self._saldo)
+        return True
+    
+    def obtener_saldo(self) -> float:
+        """Obtiene el saldo actual de la cuenta"""
+        return self._saldo
+    
+    def obtener_historial(self) -> List[dict]:
+        """Obtiene el historial de transacciones"""
+        return self.historial_transacciones.copy()
+    
+    def vista_historial(self) -> VistaHistorial:
+        """Obtiene una vista de solo lectura del historial, sin copiarlo"""
+        return VistaHistorial(self.historial_transacciones)
+    
+    def pagina_historial(self, cursor: Optional[int] = None,
+                         limite: int = 50) -> Tuple[List[dict], Optional[int]]:
+        """Obtiene una página del historial, de lo más reciente a lo más antiguo"""
+        return self.vista_historial().pagina(cursor, limite)
+    
+    def obtener_historial_entre(self, desde: datetime, hasta: datetime) -> List[dict]:
+        """Obtiene las transacciones con fecha en [desde, hasta)"""
+        return self.historial_transacciones.entre(desde, hasta)
+    
+    def saldo_en(self, fecha: datetime) -> float:
+        """Obtiene el saldo que tenía la cuenta en una fecha según su historial"""
+        saldo = self.historial_transacciones.saldo_en(fecha)
+        return self.obtener_saldo() if saldo is None else saldo
     
-    def depositar(self, cantidad: float) -> bool:
-        """Deposita dinero en la cuenta"""
+    def _validar_deposito(self, cantidad: float):
+        """Comprueba que un depósito es válido sin aplicarlo"""
         if cantidad <= 0:
             raise ValueError("La cantidad a depositar debe ser positiva")
+    
+    def _validar_retiro(self, cantidad: float):
+        """Comprueba que un retiro es válido sin aplicarlo"""
+        if cantidad <= 0:
+            raise ValueError("La cantidad a retirar debe ser positiva")
         
-        self.saldo += cantidad
-        self._registrar_transaccion("DEPOSITO", cantidad)
+        if cantidad > self._saldo:
+            raise SaldoInsuficienteError("Saldo insuficiente para realizar la operación")
+    
+    def _reemplazar_saldo(self, valor):
+        """Fija el saldo en su representación interna y avisa al observador"""
+        saldo_anterior = self._saldo
+        self._saldo = valor
+        if self._observador is not None:
+            self._observador(self, saldo_anterior, valor)
+    
+    def _registrar_transaccion(self, tipo: str, cantidad: float, fecha: Optional[datetime] = None):
+        """Registra una transacción en el historial"""
+        fecha_ns = self.reloj.ahora_ns() if fecha is None else fecha_a_ns(fecha)
+        self.historial_transacciones.agregar_ns(CODIGOS_TIPO[tipo], cantidad, fecha_ns, self._saldo)
+        if self._bus is not None:
+            escala = self.ESCALA or 1
+            self._bus.publicar(tipo, self.numero_cuenta, cantidad / escala, self._saldo / escala, fecha_ns)
+
+
+class CuentaCentavos(Cuenta):
+    """
+    Cuenta de punto fijo: guarda saldo e historial como enteros de céntimos.
+    
+    Los importes se convierten a céntimos al entrar y a float al salir, de modo
+    que las sumas y restas internas son exactas y no acumulan deriva. Una
+    cantidad con más decimales de los representables lanza ValueError.
+    """
+    
+    ESCALA = 100
+    
+    def __init__(self, numero_cuenta: str, titular: str, saldo_inicial: float = 0.0,
+                 reloj: Optional[Reloj] = None):
+        super().__init__(numero_cuenta, titular, 0, reloj)
+        self._saldo = self._saldo_apertura = self.a_unidades(saldo_inicial)
+    
+    @classmethod
+    def a_unidades(cls, cantidad: float) -> int:
+        """Convierte un importe en un número entero de unidades mínimas"""
+        escalada = cantidad * cls.ESCALA
+        if not math.isfinite(escalada):
+            raise ValueError(f"La cantidad {cantidad} no es un importe válido")
+        unidades = round(escalada)
+        if abs(escalada - unidades) > 1e-6 + abs(escalada) * 1e-15:
+            raise ValueError(f"La cantidad {cantidad} tiene más decimales de los admitidos")
+        return unidades
+    
+    @property
+    def saldo(self) -> float:
+        """Saldo actual de la cuenta"""
+        return self._saldo / self.ESCALA
+    
+    @saldo.setter
+    def saldo(self, valor: float):
+        self._reemplazar_saldo(self.a_unidades(valor))
+    
+    def _depositar(self, cantidad: float, fecha: Optional[datetime] = None) -> bool:
+        """Aplica un depósito sin pasar por el banco"""
+        if cantidad <= 0:
+            raise ValueError("La cantidad a depositar debe ser positiva")
+        unidades = self.a_unidades(cantidad)
+        
+        saldo_anterior = self._saldo
+        self._saldo = saldo_anterior + unidades
+        self._registrar_transaccion("DEPOSITO", unidades, fecha)
+        if self._observador is not None:
+            self._observador(self, saldo_anterior, self._saldo)
         return True
     
-    def retirar(self, cantidad: float) -> bool:
-        """Retira dinero de la cuenta"""
+    def _retirar(self, cantidad: float, fecha: Optional[datetime] = None) -> bool:
+        """Aplica un retiro sin pasar por el banco"""
         if cantidad <= 0:
             raise ValueError("La cantidad a retirar debe ser positiva")
+        unidades = self.a_unidades(cantidad)
         
-        if cantidad > self.saldo:
+        if unidades > self._saldo:
             raise SaldoInsuficienteError("Saldo insuficiente para realizar la operación")
         
-        self.saldo -= cantidad
-        self._registrar_transaccion("RETIRO", cantidad)
+        saldo_anterior = self._saldo
+        self._saldo = saldo_anterior - unidades
+        self._registrar_transaccion("RETIRO", unidades, fecha)
+        if self._observador is not None:
+            self._observador(self, saldo_anterior, self._saldo)
         return True
     
     def obtener_saldo(self) -> float:
         """Obtiene el saldo actual de la cuenta"""
-        return self.saldo
+        return self._saldo / self.ESCALA
     
-    def obtener_historial(self) -> List[dict]:
-        """Obtiene el historial de transacciones"""
-        return self.historial_transacciones.copy()
+    def _validar_deposito(self, cantidad: float):
+        """Comprueba que un depósito es válido sin aplicarlo"""
+        super()._validar_deposito(cantidad)
+        self.a_unidades(cantidad)
     
-    def _registrar_transaccion(self, tipo: str, cantidad: float):
-        """Registra una transacción en el historial"""
-        transaccion = {
-            "tipo": tipo,
-            "cantidad": cantidad,
-            "fecha": datetime.now(),
-            "saldo_anterior": self.saldo - cantidad if tipo == "DEPOSITO" else self.saldo + cantidad,
-            "saldo_nuevo": self.saldo
-        }
-        self.historial_transacciones.append(transaccion) 
+    def _validar_retiro(self, cantidad: float):
+        """Comprueba que un retiro es válido sin aplicarlo"""
+        if cantidad <= 0:
+            raise ValueError("La cantidad a retirar debe ser positiva")
+        
+        if self.a_unidades(cantidad) > self._saldo:
+            raise SaldoInsuficienteError("Saldo insuficiente para realizar la operación")
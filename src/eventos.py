@@ -0,0 +1,255 @@
+"""
+Módulo de Eventos
+Publicación de depósitos, retiros y transferencias a suscriptores
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Iterable, List, Optional, Tuple
+
+from .historial import ns_a_fecha
+
+# Tipos de evento
+DEPOSITO = "DEPOSITO"
+RETIRO = "RETIRO"
+TRANSFERENCIA = "TRANSFERENCIA"
+
+# Qué hace una suscripción en lotes cuando su cola está llena
+BLOQUEAR = "bloquear"                      # quien publica espera a que haya sitio
+DESCARTAR_NUEVOS = "descartar_nuevos"      # se descarta el evento que llega
+DESCARTAR_ANTIGUOS = "descartar_antiguos"  # se descarta el evento más antiguo de la cola
+POLITICAS = (BLOQUEAR, DESCARTAR_NUEVOS, DESCARTAR_ANTIGUOS)
+
+
+class Evento:
+    """
+    Un movimiento publicado por una cuenta o un banco.
+
+    DEPOSITO y RETIRO corresponden a cada entrada del historial de una cuenta
+    (también las de una transferencia), con su saldo resultante. TRANSFERENCIA
+    la publica el banco tras aplicar las dos entradas: `numero_cuenta` es el
+    origen, `contraparte` el destino y `saldo` es None.
+    """
+
+    __slots__ = ("tipo", "numero_cuenta", "cantidad", "saldo", "fecha_ns", "contraparte")
+
+    def __init__(self, tipo: str, numero_cuenta: str, cantidad: float, saldo: Optional[float],
+                 fecha_ns: int, contraparte: Optional[str] = None):
+        self.tipo = tipo
+        self.numero_cuenta = numero_cuenta
+        self.cantidad = cantidad
+        self.saldo = saldo
+        self.fecha_ns = fecha_ns
+        self.contraparte = contraparte
+
+    @property
+    def fecha(self) -> datetime:
+        return ns_a_fecha(self.fecha_ns)
+
+    def __repr__(self) -> str:
+        destino = f" -> {self.contraparte}" if self.contraparte is not None else ""
+        return f"Evento({self.tipo} {self.numero_cuenta}{destino} {self.cantidad} saldo={self.saldo})"
+
+
+class Suscripcion:
+    """
+    Suscriptor síncrono: se llama con cada evento desde el hilo que lo publica.
+
+    Se ejecuta dentro de la operación, con los candados de las cuentas
+    tomados, así que debe ser rápido y no volver a llamar al banco. Sus
+    excepciones no interrumpen la operación: se cuentan en `errores`.
+    """
+
+    def __init__(self, bus: "BusEventos", manejador: Callable, tipos: Optional[Iterable[str]] = None):
+        self._bus = bus
+        self.manejador = manejador
+        self.tipos = None if tipos is None else frozenset(tipos)
+        self.errores = 0
+        self.ultimo_error: Optional[Exception] = None
+
+    def recibir(self, evento: Evento):
+        if self.tipos is not None and evento.tipo not in self.tipos:
+            return
+        try:
+            self.manejador(evento)
+        except Exception as error:
+            self._anotar_error(error)
+
+    def _anotar_error(self, error: Exception):
+        self.errores += 1
+        self.ultimo_error = error
+
+    def cancelar(self):
+        """Deja de recibir eventos"""
+        self._bus._quitar(self)
+
+
+class SuscripcionLotes(Suscripcion):
+    """
+    Suscriptor que recibe listas de eventos desde un hilo propio.
+
+    Publicar solo añade el evento a una cola acotada, así que un suscriptor
+    lento no retrasa las operaciones mientras la cola tenga sitio. Cuando está
+    llena se aplica la política: BLOQUEAR (contrapresión; entonces el
+    manejador no debe llamar al banco, que espera con candados tomados),
+    DESCARTAR_NUEVOS o DESCARTAR_ANTIGUOS, que cuentan lo perdido en
+    `descartados`. Con varios hilos publicando a la vez la cola puede pasar
+    de la capacidad en unos pocos eventos. El hilo entrega de una vez todo lo
+    acumulado, hasta `tamano_lote` eventos, mientras el manejador atendía el
+    lote anterior.
+    """
+
+    def __init__(self, bus: "BusEventos", manejador: Callable[[List[Evento]], None],
+                 tipos: Optional[Iterable[str]] = None, capacidad: int = 10_000,
+                 tamano_lote: int = 1_000, politica: str = BLOQUEAR):
+        if capacidad < 1 or tamano_lote < 1:
+            raise ValueError("La capacidad y el tamaño de lote deben ser al menos 1")
+        if politica not in POLITICAS:
+            raise ValueError(f"Política desconocida: {politica}")
+        super().__init__(bus, manejador, tipos)
+        self.capacidad = capacidad
+        self.tamano_lote = tamano_lote
+        self.politica = politica
+        self.entregados = 0
+        self.descartados = 0
+        self._cola: Deque[Evento] = deque()
+        self._condicion = threading.Condition(threading.Lock())
+        self._en_curso = 0
+        self._esperando = False
+        self._cerrada = False
+        self._hilo = threading.Thread(target=self._despachar, name="eventos-lotes", daemon=True)
+        self._hilo.start()
+
+    def recibir(self, evento: Evento):
+        if self.tipos is not None and evento.tipo not in self.tipos:
+            return
+        cola = self._cola
+        if len(cola) < self.capacidad and not self._cerrada:
+            # Caso habitual sin candado: deque.append es atómico. El hilo
+            # marca _esperando antes de comprobar por última vez si la cola
+            # está vacía, así que o ve este evento o recibe el aviso
+            cola.append(evento)
+            if self._esperando:
+                with self._condicion:
+                    self._condicion.notify_all()
+            return
+        with self._condicion:
+            if self._cerrada:
+                self.descartados += 1
+                return
+            if len(cola) >= self.capacidad:
+                if self.politica == DESCARTAR_NUEVOS:
+                    self.descartados += 1
+                    return
+                if self.politica == DESCARTAR_ANTIGUOS:
+                    cola.popleft()
+                    self.descartados += 1
+                else:
+                    while len(cola) >= self.capacidad and not self._cerrada:
+                        self._condicion.wait()
+                    if self._cerrada:
+                        self.descartados += 1
+                        return
+            cola.append(evento)
+            self._condicion.notify_all()
+
+    def _despachar(self):
+        cola = self._cola
+        while True:
+            with self._condicion:
+                while not self._cerrada:
+                    self._esperando = True
+                    if cola:
+                        break
+                    self._condicion.wait()
+                self._esperando = False
+                if not cola:
+                    return
+                lote = [cola.popleft() for _ in range(min(len(cola), self.tamano_lote))]
+                self._en_curso = len(lote)
+                self._condicion.notify_all()
+            try:
+                self.manejador(lote)
+            except Exception as error:
+                self._anotar_error(error)
+            with self._condicion:
+                self.entregados += len(lote)
+                self._en_curso = 0
+                self._condicion.notify_all()
+
+    @property
+    def pendientes(self) -> int:
+        """Eventos en la cola o en el lote que se está entregando"""
+        return len(self._cola) + self._en_curso
+
+    def vaciar(self, espera_maxima: Optional[float] = None) -> bool:
+        """Espera a que se entreguen los eventos publicados hasta ahora; False si se agota la espera"""
+        limite = None if espera_maxima is None else time.monotonic() + espera_maxima
+        with self._condicion:
+            while self._cola or self._en_curso:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._condicion.wait(restante)
+        return True
+
+    def cancelar(self):
+        """Deja de recibir eventos, entrega los pendientes y para el hilo"""
+        super().cancelar()
+        with self._condicion:
+            self._cerrada = True
+            self._condicion.notify_all()
+        if threading.current_thread() is not self._hilo:
+            self._hilo.join()
+
+
+class BusEventos:
+    """
+    Bus de publicación y suscripción de eventos de cuentas y bancos.
+
+    Cuentas y bancos publican solo si se les ha dado un bus, y el evento solo
+    se construye si hay alguna suscripción. Los eventos de una misma cuenta se
+    publican en el orden de su historial.
+    """
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._suscripciones: Tuple[Suscripcion, ...] = ()
+
+    def suscribir(self, manejador: Callable[[Evento], None],
+                  tipos: Optional[Iterable[str]] = None) -> Suscripcion:
+        """Suscriptor síncrono (ver Suscripcion), opcionalmente solo para algunos tipos"""
+        return self._agregar(Suscripcion(self, manejador, tipos))
+
+    def suscribir_lotes(self, manejador: Callable[[List[Evento]], None], tipos: Optional[Iterable[str]] = None,
+                        capacidad: int = 10_000, tamano_lote: int = 1_000,
+                        politica: str = BLOQUEAR) -> SuscripcionLotes:
+        """Suscriptor asíncrono por lotes con cola acotada (ver SuscripcionLotes)"""
+        return self._agregar(SuscripcionLotes(self, manejador, tipos, capacidad, tamano_lote, politica))
+
+    def _agregar(self, suscripcion: Suscripcion) -> Suscripcion:
+        # Se sustituye la tupla entera para que publicar la recorra sin candado
+        with self._candado:
+            self._suscripciones = self._suscripciones + (suscripcion,)
+        return suscripcion
+
+    def _quitar(self, suscripcion: Suscripcion):
+        with self._candado:
+            self._suscripciones = tuple(otra for otra in self._suscripciones if otra is not suscripcion)
+
+    def publicar(self, tipo: str, numero_cuenta: str, cantidad: float, saldo: Optional[float],
+                 fecha_ns: int, contraparte: Optional[str] = None):
+        """Entrega un evento a todas las suscripciones"""
+        suscripciones = self._suscripciones
+        if not suscripciones:
+            return
+        evento = Evento(tipo, numero_cuenta, cantidad, saldo, fecha_ns, contraparte)
+        for suscripcion in suscripciones:
+            suscripcion.recibir(evento)
+
+    def cerrar(self):
+        """Cancela todas las suscripciones, entregando lo pendiente de las que van por lotes"""
+        for suscripcion in self._suscripciones:
+            suscripcion.cancelar()
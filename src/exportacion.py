@@ -0,0 +1,254 @@
+"""
+Módulo de Exportación
+Historial de transacciones de todo un banco en un formato binario columnar
+"""
+
+import struct
+import zlib
+from array import array
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy es opcional
+    np = None
+
+MAGIA = b"BNCHIST\0"
+VERSION = 1
+
+# Banderas de la cabecera
+COMPRIMIDO = 1
+
+# Filas por bloque por defecto
+TAMANO_BLOQUE = 65536
+
+# Columnas en el orden en que se guardan dentro de cada bloque. "cuenta" es
+# la posición del número de cuenta en la tabla de cuentas del pie
+COLUMNAS = ("cuenta", "tipo", "cantidad", "fecha", "saldo")
+
+# magia, versión, banderas y escala de los importes (0 si son float)
+_CABECERA = struct.Struct("<8sHHI")
+# Por bloque: número de filas y, por columna, bytes guardados y su CRC32
+_BLOQUE = struct.Struct("<I" + "II" * len(COLUMNAS))
+# Por bloque, en el pie: desplazamiento y número de filas
+_ENTRADA_BLOQUE = struct.Struct("<QI")
+# Al final del archivo: desplazamiento del pie, filas, bloques, cuentas y magia
+_COLA = struct.Struct("<QQQQ8s")
+
+
+class HistorialInvalidoError(Exception):
+    """Error cuando un archivo de historial exportado no es válido o está dañado"""
+    pass
+
+
+def _tipos_columnas(escala: Optional[int]) -> Tuple[str, ...]:
+    """Código de array de cada columna"""
+    importe = "d" if escala is None else "q"
+    return ("I", "b", importe, "q", importe)
+
+
+class EscritorHistorial:
+    """
+    Escribe historiales de cuentas, una detrás de otra, en bloques columnares.
+
+    Solo se guarda en memoria el bloque en curso (como mucho `tamano_bloque`
+    filas por columna); al llenarse se vuelca al archivo, comprimido con zlib
+    si se pide. La tabla de números de cuenta y el directorio de bloques se
+    escriben en el pie al cerrar.
+    """
+
+    def __init__(self, ruta: str, escala: Optional[int] = None, comprimir: bool = False,
+                 tamano_bloque: int = TAMANO_BLOQUE, nivel_compresion: int = 1):
+        if tamano_bloque < 1:
+            raise ValueError("El tamaño de bloque debe ser al menos 1")
+        self.ruta = ruta
+        self.escala = escala
+        self.comprimir = comprimir
+        self.tamano_bloque = tamano_bloque
+        self.nivel_compresion = nivel_compresion
+        self.cuentas: List[str] = []
+        self.num_filas = 0
+        self._columnas = [array(tipo) for tipo in _tipos_columnas(escala)]
+        self._bloques: List[Tuple[int, int]] = []
+        self._archivo: BinaryIO = open(ruta, "wb")
+        self._archivo.write(_CABECERA.pack(MAGIA, VERSION, COMPRIMIDO if comprimir else 0, escala or 0))
+
+    def agregar(self, numero_cuenta: str, tipos: array, cantidades: array, fechas: array, saldos: array):
+        """Añade el historial completo de una cuenta, en columnas como las de HistorialTransacciones"""
+        cuenta = len(self.cuentas)
+        self.cuentas.append(numero_cuenta)
+        columnas = self._columnas
+        inicio = 0
+        while inicio < len(tipos):
+            fin = min(len(tipos), inicio + self.tamano_bloque - len(columnas[0]))
+            columnas[0].extend(array("I", [cuenta]) * (fin - inicio))
+            for destino, origen in zip(columnas[1:], (tipos, cantidades, fechas, saldos)):
+                destino.extend(origen[inicio:fin])
+            if len(columnas[0]) == self.tamano_bloque:
+                self._volcar()
+            inicio = fin
+
+    def _volcar(self):
+        """Escribe el bloque en curso, si tiene filas"""
+        filas = len(self._columnas[0])
+        if not filas:
+            return
+        cabecera = [filas]
+        partes = []
+        for columna in self._columnas:
+            datos = columna.tobytes()
+            if self.comprimir:
+                datos = zlib.compress(datos, self.nivel_compresion)
+            cabecera += [len(datos), zlib.crc32(datos)]
+            partes.append(datos)
+            del columna[:]
+        self._bloques.append((self._archivo.tell(), filas))
+        self._archivo.write(_BLOQUE.pack(*cabecera))
+        for datos in partes:
+            self._archivo.write(datos)
+        self.num_filas += filas
+
+    def cerrar(self):
+        """Vuelca el último bloque, escribe el pie y cierra el archivo"""
+        if self._archivo.closed:
+            return
+        self._volcar()
+        inicio_pie = self._archivo.tell()
+        pie = bytearray()
+        for desplazamiento, filas in self._bloques:
+            pie += _ENTRADA_BLOQUE.pack(desplazamiento, filas)
+        for numero_cuenta in self.cuentas:
+            numero = numero_cuenta.encode("utf-8")
+            pie += struct.pack("<I", len(numero))
+            pie += numero
+        self._archivo.write(pie)
+        self._archivo.write(_COLA.pack(inicio_pie, self.num_filas, len(self._bloques), len(self.cuentas), MAGIA))
+        self._archivo.close()
+
+    def __enter__(self) -> "EscritorHistorial":
+        return self
+
+    def __exit__(self, tipo_excepcion, excepcion, traza):
+        if tipo_excepcion is None:
+            self.cerrar()
+        else:
+            # Sin pie, el lector rechaza el archivo a medio escribir
+            self._archivo.close()
+
+
+class LectorHistorial:
+    """
+    Lee un historial exportado por columnas, sin construir objetos por fila.
+
+    Con NumPy cada columna es un ndarray (los bloques sin comprimir se leen
+    con frombuffer); sin NumPy, un array.array. Los importes en modo céntimos
+    son enteros en unidades de `escala`; las fechas, nanosegundos desde la
+    época como en HistorialTransacciones.
+    """
+
+    def __init__(self, ruta: str, verificar: bool = True):
+        self.ruta = ruta
+        self.verificar = verificar
+        self._archivo: BinaryIO = open(ruta, "rb")
+        try:
+            self._leer_metadatos()
+        except (struct.error, UnicodeDecodeError, OSError):
+            self._archivo.close()
+            raise HistorialInvalidoError(f"{ruta} está truncado o dañado") from None
+        except HistorialInvalidoError:
+            self._archivo.close()
+            raise
+
+    def _leer_metadatos(self):
+        archivo = self._archivo
+        magia, version, banderas, escala = _CABECERA.unpack(archivo.read(_CABECERA.size))
+        if magia != MAGIA:
+            raise HistorialInvalidoError(f"{self.ruta} no es un historial exportado")
+        if version != VERSION:
+            raise HistorialInvalidoError(f"Versión de historial no soportada: {version}")
+        self.comprimido = bool(banderas & COMPRIMIDO)
+        self.escala: Optional[int] = escala or None
+        self._tipos = dict(zip(COLUMNAS, _tipos_columnas(self.escala)))
+
+        archivo.seek(-_COLA.size, 2)
+        inicio_pie, self.num_filas, num_bloques, num_cuentas, magia = _COLA.unpack(archivo.read(_COLA.size))
+        if magia != MAGIA:
+            raise HistorialInvalidoError(f"{self.ruta} no tiene pie: la exportación no terminó")
+        archivo.seek(inicio_pie)
+        pie = archivo.read()
+        self._bloques = [_ENTRADA_BLOQUE.unpack_from(pie, _ENTRADA_BLOQUE.size * i) for i in range(num_bloques)]
+        posicion = _ENTRADA_BLOQUE.size * num_bloques
+        self.cuentas: List[str] = []
+        for _ in range(num_cuentas):
+            (largo,) = struct.unpack_from("<I", pie, posicion)
+            posicion += 4
+            self.cuentas.append(pie[posicion:posicion + largo].decode("utf-8"))
+            posicion += largo
+
+    @property
+    def num_bloques(self) -> int:
+        return len(self._bloques)
+
+    def cerrar(self):
+        self._archivo.close()
+
+    def __enter__(self) -> "LectorHistorial":
+        return self
+
+    def __exit__(self, tipo_excepcion, excepcion, traza):
+        self.cerrar()
+
+    def _validar_columnas(self, columnas: Sequence[str]):
+        for nombre in columnas:
+            if nombre not in self._tipos:
+                raise ValueError(f"Columna desconocida: {nombre}")
+
+    def bloques(self, columnas: Sequence[str] = COLUMNAS) -> Iterator[Dict[str, Sequence]]:
+        """Recorre los bloques, leyendo de cada uno solo las columnas pedidas"""
+        self._validar_columnas(columnas)
+        for desplazamiento, _ in self._bloques:
+            yield self._leer_bloque(desplazamiento, columnas)
+
+    def leer(self, columnas: Sequence[str] = COLUMNAS) -> Dict[str, Sequence]:
+        """Columnas completas de todos los bloques"""
+        self._validar_columnas(columnas)
+        if np is not None:
+            resultado = {nombre: np.empty(self.num_filas, dtype=self._tipos[nombre]) for nombre in columnas}
+            inicio = 0
+            for desplazamiento, filas in self._bloques:
+                for nombre, datos in self._leer_bloque(desplazamiento, columnas).items():
+                    resultado[nombre][inicio:inicio + filas] = datos
+                inicio += filas
+            return resultado
+        resultado = {nombre: array(self._tipos[nombre]) for nombre in columnas}
+        for desplazamiento, _ in self._bloques:
+            for nombre, datos in self._leer_bloque(desplazamiento, columnas).items():
+                resultado[nombre].extend(datos)
+        return resultado
+
+    def _leer_bloque(self, desplazamiento: int, columnas: Sequence[str]) -> Dict[str, Sequence]:
+        archivo = self._archivo
+        archivo.seek(desplazamiento)
+        cabecera = _BLOQUE.unpack(archivo.read(_BLOQUE.size))
+        posicion = desplazamiento + _BLOQUE.size
+        resultado = {}
+        for i, nombre in enumerate(COLUMNAS):
+            largo, crc = cabecera[1 + 2 * i], cabecera[2 + 2 * i]
+            if nombre in columnas:
+                archivo.seek(posicion)
+                datos = archivo.read(largo)
+                if self.verificar and zlib.crc32(datos) != crc:
+                    raise HistorialInvalidoError(f"CRC incorrecto en la columna {nombre} del bloque en {desplazamiento}")
+                if self.comprimido:
+                    datos = zlib.decompress(datos)
+                resultado[nombre] = self._columna(nombre, datos)
+            posicion += largo
+        return resultado
+
+    def _columna(self, nombre: str, datos: bytes) -> Sequence:
+        tipo = self._tipos[nombre]
+        if np is not None:
+            return np.frombuffer(datos, dtype=tipo)
+        columna = array(tipo)
+        columna.frombytes(datos)
+        return columna
@@ -0,0 +1,481 @@
+"""
+Módulo de Banco Fragmentado
+Cuentas repartidas entre procesos, con transferencias entre fragmentos en dos fases
+"""
+
+import itertools
+import math
+import multiprocessing
+import os
+import threading
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .banco import (Banco, CuentaNoEncontradaError, LOTE_CANTIDAD_INVALIDA,
+                    LOTE_CUENTA_NO_ENCONTRADA, LOTE_OK, LOTE_SALDO_INSUFICIENTE)
+from .cuenta import Cuenta, CuentaCentavos, SaldoInsuficienteError
+
+
+def indice_fragmento(numero_cuenta: str, num_fragmentos: int) -> int:
+    """Fragmento de una cuenta (estable entre procesos, a diferencia de hash())"""
+    return zlib.crc32(numero_cuenta.encode("utf-8")) % num_fragmentos
+
+
+class _Fragmento:
+    """
+    Lado del proceso trabajador: un Banco más las reservas de las
+    transferencias entre fragmentos que están preparadas y sin confirmar.
+    """
+
+    def __init__(self, banco: Banco):
+        self.banco = banco
+        self.reservas: Dict[int, Tuple[str, str, float]] = {}
+        self.retenido: Dict[str, float] = {}
+        # Retiros preparados de cada cuenta, para saber cuándo deja de tener retenido
+        self.retiros_preparados: Dict[str, int] = {}
+
+    def _comprobar_retiro(self, numero_cuenta: str, cantidad: float):
+        """Valida un retiro teniendo en cuenta el saldo ya reservado"""
+        cuenta = self.banco.obtener_cuenta(numero_cuenta)
+        cuenta._validar_retiro(cantidad)
+        retenido = self.retenido.get(numero_cuenta)
+        if retenido:
+            cuenta._validar_retiro(cantidad + retenido)
+
+    def crear(self, numero_cuenta: str, titular: str, saldo_inicial: float) -> Cuenta:
+        return _copia(self.banco.crear_cuenta(numero_cuenta, titular, saldo_inicial))
+
+    def cuenta(self, numero_cuenta: str) -> Cuenta:
+        return _copia(self.banco.obtener_cuenta(numero_cuenta))
+
+    def depositar(self, numero_cuenta: str, cantidad: float) -> bool:
+        return self.banco.depositar(numero_cuenta, cantidad)
+
+    def retirar(self, numero_cuenta: str, cantidad: float) -> bool:
+        if numero_cuenta in self.retenido:
+            self._comprobar_retiro(numero_cuenta, cantidad)
+        return self.banco.retirar(numero_cuenta, cantidad)
+
+    def transferir(self, origen: str, destino: str, cantidad: float) -> bool:
+        if origen in self.retenido:
+            self._comprobar_retiro(origen, cantidad)
+        return self.banco.transferir(origen, destino, cantidad)
+
+    def transferir_lote(self, origenes: List[str], destinos: List[str], cantidades: List[float]) -> List[int]:
+        return self.banco.transferir_lote(origenes, destinos, cantidades).tolist()
+
+    def preparar_retiro(self, id_transaccion: int, numero_cuenta: str, cantidad: float):
+        """Fase 1 en el origen: comprueba y reserva el importe"""
+        self._comprobar_retiro(numero_cuenta, cantidad)
+        self.reservas[id_transaccion] = ("retiro", numero_cuenta, cantidad)
+        self.retenido[numero_cuenta] = self.retenido.get(numero_cuenta, 0.0) + cantidad
+        self.retiros_preparados[numero_cuenta] = self.retiros_preparados.get(numero_cuenta, 0) + 1
+
+    def preparar_deposito(self, id_transaccion: int, numero_cuenta: str, cantidad: float):
+        """Fase 1 en el destino: comprueba que el depósito se podrá aplicar"""
+        self.banco.obtener_cuenta(numero_cuenta)._validar_deposito(cantidad)
+        self.reservas[id_transaccion] = ("deposito", numero_cuenta, cantidad)
+
+    def preparar_lote(self, partes: List[Tuple[int, bool, str, float]]) -> List[Optional[Exception]]:
+        """
+        Fase 1 de varias transferencias a la vez: cada parte es (id, es_retiro,
+        número de cuenta, cantidad), en el orden de sus filas. Devuelve el
+        error de cada parte, o None si quedó preparada.
+        """
+        votos: List[Optional[Exception]] = []
+        for id_transaccion, es_retiro, numero_cuenta, cantidad in partes:
+            try:
+                if es_retiro:
+                    self.preparar_retiro(id_transaccion, numero_cuenta, cantidad)
+                else:
+                    self.preparar_deposito(id_transaccion, numero_cuenta, cantidad)
+                votos.append(None)
+            except Exception as error:
+                votos.append(error)
+        return votos
+
+    def resolver_lote(self, confirmadas: List[int], abortadas: List[int]):
+        """Fase 2 de varias transferencias: descarta unas y aplica otras, en orden"""
+        for id_transaccion in abortadas:
+            self.abortar(id_transaccion)
+        for id_transaccion in confirmadas:
+            self.confirmar(id_transaccion)
+
+    def confirmar(self, id_transaccion: int):
+        """Fase 2: aplica la parte preparada de la transferencia"""
+        operacion, numero_cuenta, cantidad = self._liberar(id_transaccion)
+        if operacion == "retiro":
+            self.banco.retirar(numero_cuenta, cantidad)
+            # La transferencia cuenta una vez, en el fragmento de origen
+            self.banco._franjas[0].transacciones += 1
+        else:
+            self.banco.depositar(numero_cuenta, cantidad)
+
+    def abortar(self, id_transaccion: int):
+        """Fase 2: descarta la parte preparada, si la hay"""
+        if id_transaccion in self.reservas:
+            self._liberar(id_transaccion)
+
+    def _liberar(self, id_transaccion: int) -> Tuple[str, str, float]:
+        reserva = self.reservas.pop(id_transaccion)
+        operacion, numero_cuenta, cantidad = reserva
+        if operacion == "retiro":
+            if self.retiros_preparados[numero_cuenta] > 1:
+                self.retiros_preparados[numero_cuenta] -= 1
+                self.retenido[numero_cuenta] -= cantidad
+            else:
+                del self.retiros_preparados[numero_cuenta]
+                del self.retenido[numero_cuenta]
+        return reserva
+
+    def agregados(self) -> Tuple[bool, List[float], int, int]:
+        """Parciales del total, número de cuentas y contador de transacciones"""
+        banco = self.banco
+        parciales = [parcial for franja in banco._franjas for parcial in franja.total.parciales()]
+        return banco.centavos, parciales, banco.obtener_numero_cuentas(), banco.contador_transacciones
+
+
+def _copia(cuenta: Cuenta) -> Cuenta:
+    """Copia de una cuenta sin enlace al banco, para devolverla a otro proceso"""
+    copia = type(cuenta)(cuenta.numero_cuenta, cuenta.titular)
+    copia._saldo = cuenta._saldo
+    copia._saldo_apertura = cuenta._saldo_apertura
+    copia._creacion_ns = cuenta._creacion_ns
+    historial = copia.historial_transacciones
+    for nombre in ("tipos", "cantidades", "fechas", "saldos"):
+        getattr(historial, nombre).extend(cuenta.historial_transacciones.columna(nombre))
+    return copia
+
+
+def _trabajador(conexion, nombre: str, opciones: dict):
+    """Bucle del proceso de un fragmento: atiende peticiones hasta recibir "cerrar" """
+    fragmento = _Fragmento(Banco(nombre, **opciones))
+    while True:
+        operacion, argumentos = conexion.recv()
+        if operacion == "cerrar":
+            conexion.close()
+            return
+        try:
+            respuesta = ("ok", getattr(fragmento, operacion)(*argumentos))
+        except Exception as error:
+            respuesta = ("error", error)
+        conexion.send(respuesta)
+
+
+class BancoFragmentado:
+    """
+    Banco cuyas cuentas se reparten entre procesos según el CRC32 de su número.
+
+    Cada fragmento es un Banco en su propio proceso, así que los fragmentos
+    trabajan en paralelo sin compartir el GIL. Las operaciones sobre un solo
+    fragmento se le reenvían tal cual; una transferencia entre fragmentos se
+    hace en dos fases (preparar en ambos, luego confirmar o abortar en ambos),
+    de modo que o se aplica entera o no se aplica. Los agregados se piden a
+    todos los fragmentos a la vez y se combinan.
+
+    Las cuentas devueltas (crear_cuenta, obtener_cuenta) son copias: operar
+    con ellas no cambia el banco.
+    """
+
+    def __init__(self, nombre: str, num_fragmentos: Optional[int] = None,
+                 contexto: Optional[str] = None, **opciones):
+        self.nombre = nombre
+        self.num_fragmentos = num_fragmentos or os.cpu_count() or 1
+        self.centavos = opciones.get("centavos", False)
+        mp = multiprocessing.get_context(contexto)
+        self._conexiones = []
+        self._procesos = []
+        for indice in range(self.num_fragmentos):
+            local, remota = mp.Pipe()
+            proceso = mp.Process(target=_trabajador, args=(remota, f"{nombre}#{indice}", opciones),
+                                 name=f"fragmento-{indice}", daemon=True)
+            proceso.start()
+            remota.close()
+            self._conexiones.append(local)
+            self._procesos.append(proceso)
+        self._candados = [threading.Lock() for _ in range(self.num_fragmentos)]
+        self._ids = itertools.count(1)
+        self._cerrado = False
+
+    def fragmento_de(self, numero_cuenta: str) -> int:
+        """Índice del fragmento al que pertenece una cuenta"""
+        return indice_fragmento(numero_cuenta, self.num_fragmentos)
+
+    # Comunicación con los fragmentos (los candados por fragmento se toman
+    # siempre en orden creciente, como las franjas de Banco)
+
+    def _enviar(self, indice: int, operacion: str, *argumentos):
+        self._conexiones[indice].send((operacion, argumentos))
+
+    def _recibir(self, indice: int):
+        estado, valor = self._conexiones[indice].recv()
+        if estado == "error":
+            raise valor
+        return valor
+
+    def _recibir_todas(self, indices) -> list:
+        """
+        Recoge la respuesta de cada fragmento y después lanza el primer error.
+
+        Leer todas antes de lanzar evita dejar respuestas pendientes en una
+        conexión, que la siguiente petición a ese fragmento tomaría como suya.
+        """
+        respuestas = [self._conexiones[indice].recv() for indice in indices]
+        for estado, valor in respuestas:
+            if estado == "error":
+                raise valor
+        return [valor for _, valor in respuestas]
+
+    def _llamar(self, indice: int, operacion: str, *argumentos):
+        with self._candados[indice]:
+            self._enviar(indice, operacion, *argumentos)
+            return self._recibir(indice)
+
+    def _bloquear(self, indices) -> List[int]:
+        indices = sorted(set(indices))
+        for indice in indices:
+            self._candados[indice].acquire()
+        return indices
+
+    def _desbloquear(self, indices: List[int]):
+        for indice in reversed(indices):
+            self._candados[indice].release()
+
+    def _difundir(self, operacion: str, *argumentos) -> list:
+        """Envía la misma petición a todos los fragmentos y recoge sus respuestas"""
+        indices = self._bloquear(range(self.num_fragmentos))
+        try:
+            for indice in indices:
+                self._enviar(indice, operacion, *argumentos)
+            return self._recibir_todas(indices)
+        finally:
+            self._desbloquear(indices)
+
+    # Operaciones
+
+    def crear_cuenta(self, numero_cuenta: str, titular: str, saldo_inicial: float = 0.0) -> Cuenta:
+        """Crea una nueva cuenta en su fragmento"""
+        return self._llamar(self.fragmento_de(numero_cuenta), "crear", numero_cuenta, titular, saldo_inicial)
+
+    def obtener_cuenta(self, numero_cuenta: str) -> Cuenta:
+        """Obtiene una copia de una cuenta"""
+        return self._llamar(self.fragmento_de(numero_cuenta), "cuenta", numero_cuenta)
+
+    def depositar(self, numero_cuenta: str, cantidad: float) -> bool:
+        """Deposita dinero en una cuenta"""
+        return self._llamar(self.fragmento_de(numero_cuenta), "depositar", numero_cuenta, cantidad)
+
+    def retirar(self, numero_cuenta: str, cantidad: float) -> bool:
+        """Retira dinero de una cuenta"""
+        return self._llamar(self.fragmento_de(numero_cuenta), "retirar", numero_cuenta, cantidad)
+
+    def transferir(self, numero_cuenta_origen: str, numero_cuenta_destino: str, cantidad: float) -> bool:
+        """Transfiere dinero entre dos cuentas, en dos fases si están en fragmentos distintos"""
+        if cantidad <= 0:
+            raise ValueError("La cantidad a transferir debe ser positiva")
+        origen = self.fragmento_de(numero_cuenta_origen)
+        destino = self.fragmento_de(numero_cuenta_destino)
+        if origen == destino:
+            return self._llamar(origen, "transferir", numero_cuenta_origen, numero_cuenta_destino, cantidad)
+
+        indices = self._bloquear((origen, destino))
+        try:
+            self._transferir_en_dos_fases(origen, destino, numero_cuenta_origen, numero_cuenta_destino, cantidad)
+        finally:
+            self._desbloquear(indices)
+        return True
+
+    def _transferir_en_dos_fases(self, origen: int, destino: int, numero_cuenta_origen: str,
+                                 numero_cuenta_destino: str, cantidad: float):
+        """Transferencia entre fragmentos; quien llama tiene los candados de ambos"""
+        id_transaccion = next(self._ids)
+        self._enviar(origen, "preparar_retiro", id_transaccion, numero_cuenta_origen, cantidad)
+        self._enviar(destino, "preparar_deposito", id_transaccion, numero_cuenta_destino, cantidad)
+        votos = []
+        for indice in (origen, destino):
+            try:
+                self._recibir(indice)
+                votos.append(None)
+            except Exception as error:
+                votos.append(error)
+
+        fase = "confirmar" if votos == [None, None] else "abortar"
+        for indice in (origen, destino):
+            self._enviar(indice, fase, id_transaccion)
+        self._recibir_todas((origen, destino))
+        for error in votos:
+            if error is not None:
+                raise error
+
+    def transferir_lote(self, numeros_origen: Sequence[str], numeros_destino: Sequence[str],
+                        cantidades: Sequence[float]) -> List[int]:
+        """
+        Transfiere un lote y devuelve un código LOTE_* por fila.
+
+        Las filas dentro de un mismo fragmento se envían como un lote a cada
+        fragmento y se aplican en paralelo; después se aplican, en orden, las
+        filas entre fragmentos. Por eso una fila entre fragmentos ve ya
+        aplicadas todas las filas internas del lote.
+
+        Las filas entre fragmentos no hacen una ronda de dos fases cada una:
+        cada fragmento recibe de una vez todas sus partes (ver
+        _transferir_cruzadas), con el mismo resultado que aplicarlas en orden.
+        """
+        n = len(cantidades)
+        if len(numeros_origen) != n or len(numeros_destino) != n:
+            raise ValueError("El lote debe tener el mismo número de orígenes, destinos y cantidades")
+
+        estados = [LOTE_OK] * n
+        internas: Dict[int, List[int]] = {}
+        cruzadas = []
+        for fila, (origen, destino) in enumerate(zip(numeros_origen, numeros_destino)):
+            fragmento_origen = self.fragmento_de(origen)
+            fragmento_destino = self.fragmento_de(destino)
+            if fragmento_origen == fragmento_destino:
+                internas.setdefault(fragmento_origen, []).append(fila)
+            elif not cantidades[fila] > 0:
+                estados[fila] = LOTE_CANTIDAD_INVALIDA
+            else:
+                cruzadas.append((fila, fragmento_origen, fragmento_destino))
+
+        indices = self._bloquear(range(self.num_fragmentos))
+        try:
+            for indice, filas in internas.items():
+                self._enviar(indice, "transferir_lote", [numeros_origen[f] for f in filas],
+                             [numeros_destino[f] for f in filas], [cantidades[f] for f in filas])
+            for filas, estados_fragmento in zip(internas.values(), self._recibir_todas(internas)):
+                for fila, estado in zip(filas, estados_fragmento):
+                    estados[fila] = estado
+            while cruzadas:
+                cruzadas = self._transferir_cruzadas(cruzadas, numeros_origen, numeros_destino,
+                                                     cantidades, estados)
+        finally:
+            self._desbloquear(indices)
+        return estados
+
+    def _transferir_cruzadas(self, cruzadas: List[Tuple[int, int, int]], numeros_origen: Sequence[str],
+                             numeros_destino: Sequence[str], cantidades: Sequence[float],
+                             estados: List[int]) -> List[Tuple[int, int, int]]:
+        """
+        Una ronda de dos fases para filas entre fragmentos (fila, origen, destino).
+
+        Cada fragmento prepara de una vez sus partes de todas las filas y luego
+        confirma o aborta de una vez. Al preparar, un retiro ve el saldo menos
+        lo reservado por filas anteriores, pero no los depósitos de filas
+        anteriores de la ronda, que aún no están aplicados. Un voto a favor es
+        por tanto definitivo; un saldo insuficiente solo lo es si ninguna fila
+        anterior de la ronda ingresa en esa cuenta ni libera una reserva suya
+        al abortarse. La ronda aplica las filas hasta la primera que no lo es y
+        devuelve las restantes, para otra ronda que ya vea esos cambios.
+
+        Quien llama tiene los candados de todos los fragmentos.
+        """
+        partes: Dict[int, List[Tuple[int, bool, str, float]]] = {}
+        posiciones: List[Tuple[int, int]] = []
+        ids = []
+        for fila, origen, destino in cruzadas:
+            id_transaccion = next(self._ids)
+            ids.append(id_transaccion)
+            por_origen = partes.setdefault(origen, [])
+            por_destino = partes.setdefault(destino, [])
+            posiciones.append((len(por_origen), len(por_destino)))
+            por_origen.append((id_transaccion, True, numeros_origen[fila], cantidades[fila]))
+            por_destino.append((id_transaccion, False, numeros_destino[fila], cantidades[fila]))
+        for indice, partes_fragmento in partes.items():
+            self._enviar(indice, "preparar_lote", partes_fragmento)
+        votos = dict(zip(partes, self._recibir_todas(partes)))
+
+        corte = len(cruzadas)
+        errores: List[Optional[Exception]] = []
+        ingresadas = set()
+        liberadas = set()
+        for posicion, ((fila, origen, destino), (en_origen, en_destino)) in enumerate(zip(cruzadas, posiciones)):
+            voto_origen = votos[origen][en_origen]
+            voto_destino = votos[destino][en_destino]
+            numero_origen = numeros_origen[fila]
+            # Como en Banco.transferir_lote: una cuenta inexistente o una
+            # cantidad no válida pesan más que la falta de saldo
+            error = voto_origen if not isinstance(voto_origen, SaldoInsuficienteError) else None
+            error = error or voto_destino or voto_origen
+            if isinstance(error, SaldoInsuficienteError) and (
+                    numero_origen in ingresadas or numero_origen in liberadas):
+                corte = posicion
+                break
+            if error is None:
+                ingresadas.add(numeros_destino[fila])
+            elif voto_origen is None:
+                liberadas.add(numero_origen)
+            errores.append(error)
+            if error is not None and not isinstance(
+                    error, (CuentaNoEncontradaError, SaldoInsuficienteError, ValueError)):
+                # Un error inesperado se propaga tras cerrar la ronda hasta esta fila
+                corte = posicion + 1
+                break
+
+        confirmadas: Dict[int, List[int]] = {indice: [] for indice in partes}
+        abortadas: Dict[int, List[int]] = {indice: [] for indice in partes}
+        for posicion, (id_transaccion, (_, origen, destino)) in enumerate(zip(ids, cruzadas)):
+            fase = confirmadas if posicion < corte and errores[posicion] is None else abortadas
+            fase[origen].append(id_transaccion)
+            fase[destino].append(id_transaccion)
+        for indice in partes:
+            self._enviar(indice, "resolver_lote", confirmadas[indice], abortadas[indice])
+        self._recibir_todas(partes)
+
+        for (fila, _, _), error in zip(cruzadas, errores):
+            if isinstance(error, CuentaNoEncontradaError):
+                estados[fila] = LOTE_CUENTA_NO_ENCONTRADA
+            elif isinstance(error, SaldoInsuficienteError):
+                estados[fila] = LOTE_SALDO_INSUFICIENTE
+            elif isinstance(error, ValueError):
+                estados[fila] = LOTE_CANTIDAD_INVALIDA
+            elif error is not None:
+                raise error
+        return cruzadas[corte:]
+
+    def _agregados(self) -> Tuple[float, int, int]:
+        total_parciales = []
+        cuentas = transacciones = 0
+        for _, parciales, num_cuentas, contador in self._difundir("agregados"):
+            total_parciales.extend(parciales)
+            cuentas += num_cuentas
+            transacciones += contador
+        if self.centavos:
+            total = sum(total_parciales) / CuentaCentavos.ESCALA
+        else:
+            total = math.fsum(total_parciales)
+        return total, cuentas, transacciones
+
+    def obtener_total_depositado(self) -> float:
+        """Total depositado en todos los fragmentos (suma exacta de sus parciales)"""
+        return self._agregados()[0]
+
+    def obtener_numero_cuentas(self) -> int:
+        """Número total de cuentas en todos los fragmentos"""
+        return self._agregados()[1]
+
+    @property
+    def contador_transacciones(self) -> int:
+        """Número de transferencias realizadas en todos los fragmentos"""
+        return self._agregados()[2]
+
+    def cerrar(self):
+        """Detiene los procesos de los fragmentos"""
+        if self._cerrado:
+            return
+        self._cerrado = True
+        indices = self._bloquear(range(self.num_fragmentos))
+        try:
+            for indice in indices:
+                self._enviar(indice, "cerrar")
+                self._conexiones[indice].close()
+        finally:
+            self._desbloquear(indices)
+        for proceso in self._procesos:
+            proceso.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
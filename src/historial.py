@@ -0,0 +1,292 @@
+"""
+Módulo de Historial de Transacciones
+Almacenamiento columnar y compacto del historial de una cuenta
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple, Union
+
+from .retencion import PoliticaRetencion, SegmentosHistorial
+
+
+# Códigos de tipo almacenados en la columna de tipos
+TIPOS = ("DEPOSITO", "RETIRO")
+CODIGOS_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS)}
+
+# Las fechas se guardan como nanosegundos desde esta época (hora local, sin zona)
+_EPOCA = datetime(1970, 1, 1)
+
+
+def fecha_a_ns(fecha: datetime) -> int:
+    """Convierte una fecha en nanosegundos desde la época"""
+    return ((fecha - _EPOCA) // timedelta(microseconds=1)) * 1000
+
+
+def ns_a_fecha(ns: int) -> datetime:
+    """Convierte nanosegundos desde la época en una fecha"""
+    return _EPOCA + timedelta(microseconds=ns // 1000)
+
+
+class HistorialTransacciones:
+    """
+    Historial de transacciones guardado en columnas tipadas paralelas.
+
+    Cada entrada ocupa unos 25 bytes (tipo, cantidad, fecha y saldo posterior)
+    en lugar de un diccionario con un datetime. La vista como diccionario se
+    construye solo cuando se lee.
+
+    Con `escala` (p. ej. 100), cantidades y saldos se guardan como enteros en
+    unidades mínimas y la vista los devuelve divididos por la escala.
+    """
+
+    __slots__ = ("tipos", "cantidades", "fechas", "saldos", "escala", "retencion", "archivo")
+
+    def __init__(self, escala: Optional[int] = None):
+        self.escala = escala
+        tipo_importe = "d" if escala is None else "q"
+        self.tipos = array("b")
+        self.cantidades = array(tipo_importe)
+        self.fechas = array("q")
+        self.saldos = array(tipo_importe)
+        # Con una política de retención, las entradas antiguas pasan a disco
+        self.retencion: Optional[PoliticaRetencion] = None
+        self.archivo: Optional[SegmentosHistorial] = None
+
+    @property
+    def archivadas(self) -> int:
+        """Número de entradas más antiguas que están en disco"""
+        return 0 if self.archivo is None else self.archivo.num_entradas
+
+    def configurar_retencion(self, politica: PoliticaRetencion, directorio: str):
+        """Activa la retención, archivando en `directorio` (que se vacía) lo que sobre"""
+        self.retencion = politica
+        self.archivo = SegmentosHistorial(directorio, self.escala, politica.tamano_segmento)
+        self.aplicar_retencion()
+
+    def aplicar_retencion(self):
+        """Archiva en disco las entradas que la política ya no deja en memoria"""
+        if self.retencion is None:
+            return
+        cuantas = self.retencion.a_archivar(self.fechas)
+        if cuantas:
+            columnas = (self.tipos, self.cantidades, self.fechas, self.saldos)
+            self.archivo.agregar(*(columna[:cuantas] for columna in columnas))
+            for columna in columnas:
+                del columna[:cuantas]
+
+    def agregar(self, tipo: str, cantidad: float, fecha: datetime, saldo_nuevo: float):
+        """Agrega una transacción al final del historial"""
+        self.agregar_ns(CODIGOS_TIPO[tipo], cantidad, fecha_a_ns(fecha), saldo_nuevo)
+
+    def agregar_ns(self, codigo_tipo: int, cantidad: float, fecha_ns: int, saldo_nuevo: float):
+        """Agrega una transacción con el tipo y la fecha ya codificados"""
+        self.tipos.append(codigo_tipo)
+        self.cantidades.append(cantidad)
+        self.fechas.append(fecha_ns)
+        self.saldos.append(saldo_nuevo)
+        if self.retencion is not None:
+            self.aplicar_retencion()
+
+    def append(self, transaccion: dict):
+        """Agrega una transacción a partir de su vista como diccionario"""
+        cantidad = transaccion["cantidad"]
+        saldo_nuevo = transaccion["saldo_nuevo"]
+        if self.escala is not None:
+            cantidad = round(cantidad * self.escala)
+            saldo_nuevo = round(saldo_nuevo * self.escala)
+        self.agregar(transaccion["tipo"], cantidad, transaccion["fecha"], saldo_nuevo)
+
+    def entrada(self, indice: int) -> dict:
+        """Construye la vista como diccionario de una entrada"""
+        archivadas = self.archivadas
+        if indice < archivadas:
+            return self._vista(*next(self.archivo.leer(indice, indice + 1)))
+        indice -= archivadas
+        return self._vista(self.tipos[indice], self.cantidades[indice],
+                           self.fechas[indice], self.saldos[indice])
+
+    def iterar(self, inicio: int, fin: int) -> Iterator[dict]:
+        """Recorre las entradas [inicio, fin) leyendo de una vez la parte archivada"""
+        archivadas = self.archivadas
+        if inicio < archivadas:
+            for fila in self.archivo.leer(inicio, min(fin, archivadas)):
+                yield self._vista(*fila)
+            inicio = archivadas
+        for i in range(inicio - archivadas, fin - archivadas):
+            yield self._vista(self.tipos[i], self.cantidades[i], self.fechas[i], self.saldos[i])
+
+    def _vista(self, codigo_tipo: int, cantidad: float, fecha_ns: int, saldo_nuevo: float) -> dict:
+        tipo = TIPOS[codigo_tipo]
+        saldo_anterior = saldo_nuevo - cantidad if tipo == "DEPOSITO" else saldo_nuevo + cantidad
+        if self.escala is not None:
+            cantidad /= self.escala
+            saldo_anterior /= self.escala
+            saldo_nuevo /= self.escala
+        return {
+            "tipo": tipo,
+            "cantidad": cantidad,
+            "fecha": ns_a_fecha(fecha_ns),
+            "saldo_anterior": saldo_anterior,
+            "saldo_nuevo": saldo_nuevo
+        }
+
+    def columna(self, nombre: str) -> array:
+        """Una columna completa ("tipos", "cantidades", "fechas" o "saldos"), incluida la parte archivada"""
+        en_memoria = getattr(self, nombre)
+        if not self.archivadas:
+            return en_memoria
+        archivada = self.archivo.columnas()[("tipos", "cantidades", "fechas", "saldos").index(nombre)]
+        return archivada + en_memoria
+
+    def columnas(self) -> Tuple[array, array, array, array]:
+        """Copia de las cuatro columnas (tipos, cantidades, fechas, saldos), leyendo lo archivado una sola vez"""
+        en_memoria = (self.tipos, self.cantidades, self.fechas, self.saldos)
+        if not self.archivadas:
+            return tuple(columna[:] for columna in en_memoria)
+        return tuple(archivada + columna for archivada, columna in zip(self.archivo.columnas(), en_memoria))
+
+    def posicion(self, fecha: datetime, incluida: bool = False) -> int:
+        """
+        Índice de la primera entrada posterior a una fecha (búsqueda binaria).
+        
+        Con incluida=True, el de la primera entrada en esa fecha o después.
+        Supone que las entradas se añaden en orden de fecha.
+        """
+        fecha_ns = fecha_a_ns(fecha)
+        indice = (bisect_left if incluida else bisect_right)(self.fechas, fecha_ns)
+        if indice == 0 and self.archivadas:
+            return self.archivo.posicion(fecha_ns, incluida)
+        return self.archivadas + indice
+
+    def entre(self, desde: datetime, hasta: datetime) -> List[dict]:
+        """Entradas con desde <= fecha < hasta, sin recorrer el resto del historial"""
+        return list(self.iterar(self.posicion(desde, incluida=True), self.posicion(hasta, incluida=True)))
+
+    def saldo_en(self, fecha: datetime) -> Optional[float]:
+        """
+        Saldo tras la última entrada anterior o igual a una fecha.
+        
+        Cada entrada guarda el saldo resultante, así que cualquier entrada sirve
+        de punto de control y la consulta es O(log n). Si la fecha es anterior
+        a todas las entradas devuelve el saldo previo a la primera, y None si
+        el historial está vacío.
+        """
+        if not len(self):
+            return None
+        indice = self.posicion(fecha)
+        if indice == 0:
+            return self.entrada(0)["saldo_anterior"]
+        return self.entrada(indice - 1)["saldo_nuevo"]
+
+    def copy(self) -> List[dict]:
+        """Devuelve una copia del historial como lista de diccionarios"""
+        return list(self.iterar(0, len(self)))
+
+    def clear(self):
+        """Elimina todas las entradas"""
+        for columna in (self.tipos, self.cantidades, self.fechas, self.saldos):
+            del columna[:]
+        if self.archivo is not None:
+            self.archivo.vaciar()
+
+    def __len__(self) -> int:
+        return self.archivadas + len(self.tipos)
+
+    def __getitem__(self, indice: Union[int, slice]):
+        if isinstance(indice, slice):
+            inicio, fin, paso = indice.indices(len(self))
+            if paso == 1:
+                return list(self.iterar(inicio, max(inicio, fin)))
+            return [self.entrada(i) for i in range(inicio, fin, paso)]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("Índice de historial fuera de rango")
+        return self.entrada(indice)
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.iterar(0, len(self))
+
+    def __eq__(self, otro) -> bool:
+        if isinstance(otro, HistorialTransacciones):
+            nombres = ("tipos", "cantidades", "fechas", "saldos")
+            return all(self.columna(nombre) == otro.columna(nombre) for nombre in nombres)
+        if isinstance(otro, list):
+            return self.copy() == otro
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HistorialTransacciones({len(self)} entradas)"
+
+    def memoria_bytes(self) -> int:
+        """Bytes ocupados en memoria por los datos de las columnas (sin lo archivado)"""
+        return sum(columna.itemsize * len(columna)
+                   for columna in (self.tipos, self.cantidades, self.fechas, self.saldos))
+
+
+class VistaHistorial:
+    """
+    Vista de solo lectura de un tramo del historial, sin copiarlo.
+
+    Comparte las columnas del historial y fija su tramo al crearse, así que
+    las transacciones añadidas después no aparecen en ella. Los cortes
+    devuelven otra vista; cada entrada se construye al leerla como un
+    diccionario nuevo, por lo que modificarla no altera el historial.
+    """
+
+    __slots__ = ("_historial", "_inicio", "_fin")
+
+    def __init__(self, historial: HistorialTransacciones, inicio: int = 0, fin: Optional[int] = None):
+        self._historial = historial
+        self._inicio = inicio
+        self._fin = len(historial) if fin is None else fin
+
+    def __len__(self) -> int:
+        return self._fin - self._inicio
+
+    def __getitem__(self, indice: Union[int, slice]):
+        if isinstance(indice, slice):
+            inicio, fin, paso = indice.indices(len(self))
+            if paso != 1:
+                return [self._historial.entrada(self._inicio + i) for i in range(inicio, fin, paso)]
+            return VistaHistorial(self._historial, self._inicio + inicio, self._inicio + max(inicio, fin))
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("Índice de historial fuera de rango")
+        return self._historial.entrada(self._inicio + indice)
+
+    def __iter__(self) -> Iterator[dict]:
+        return self._historial.iterar(self._inicio, self._fin)
+
+    def __reversed__(self) -> Iterator[dict]:
+        for i in range(self._fin - 1, self._inicio - 1, -1):
+            yield self._historial.entrada(i)
+
+    def __eq__(self, otro) -> bool:
+        if isinstance(otro, (VistaHistorial, list)):
+            return list(self) == list(otro)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"VistaHistorial({len(self)} entradas)"
+
+    def pagina(self, cursor: Optional[int] = None, limite: int = 50) -> Tuple[List[dict], Optional[int]]:
+        """
+        Página de hasta `limite` entradas, de la más reciente a la más antigua.
+
+        El cursor es la posición (exclusiva) donde termina la página; None
+        empieza por el final. Devuelve las entradas y el cursor de la página
+        siguiente, o None si no quedan más. El coste no depende de la
+        longitud del historial.
+        """
+        if limite <= 0:
+            raise ValueError("El límite de la página debe ser positivo")
+        fin = len(self) if cursor is None else min(max(cursor, 0), len(self))
+        inicio = max(fin - limite, 0)
+        entradas = list(self._historial.iterar(self._inicio + inicio, self._inicio + fin))
+        entradas.reverse()
+        return entradas, (inicio if inicio > 0 else None)
+
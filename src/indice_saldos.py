@@ -0,0 +1,238 @@
+"""
+Módulo de Índice de Saldos
+Lista ordenada por saldo con estadísticos de orden (top-N, rangos, percentiles)
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Tuple
+
+# Número de claves por cubo; un cubo se parte al doblar este tamaño
+CARGA_CUBO = 1000
+
+Clave = Tuple[float, str]
+
+
+class _Ultimo:
+    """Valor mayor que cualquier número de cuenta, para acotar un saldo por arriba"""
+
+    __slots__ = ()
+
+    def __lt__(self, otro):
+        return False
+
+    def __gt__(self, otro):
+        return True
+
+
+_ULTIMO = _Ultimo()
+
+
+class IndiceSaldos:
+    """
+    Claves (saldo, número de cuenta) ordenadas, con altas y bajas incrementales.
+
+    Las claves se reparten en cubos ordenados de unas CARGA_CUBO entradas.
+    Cada cubo guarda sus saldos en un array('d') contiguo y los números de
+    cuenta en una lista paralela (a igual saldo, ordenados por número). El
+    máximo de cada cubo está en una lista aparte para localizar una clave con
+    bisect, y un árbol de Fenwick con el tamaño de cada cubo pasa de posición
+    global a cubo (y al revés) en O(log n). Insertar o quitar solo desplaza
+    las claves de un cubo. No es seguro entre hilos: quien lo usa debe
+    serializar el acceso.
+    """
+
+    __slots__ = ("_saldos", "_numeros", "_maximos", "_arbol", "_longitud", "_carga")
+
+    def __init__(self, claves: Iterable[Clave] = (), carga: int = CARGA_CUBO):
+        self._carga = carga
+        ordenadas = sorted(claves)
+        self._saldos: List[array] = []
+        self._numeros: List[List[str]] = []
+        for i in range(0, len(ordenadas), carga):
+            tramo = ordenadas[i:i + carga]
+            self._saldos.append(array("d", [saldo for saldo, _ in tramo]))
+            self._numeros.append([numero for _, numero in tramo])
+        self._longitud = len(ordenadas)
+        self._reconstruir()
+
+    def _reconstruir(self):
+        """Recalcula máximos y árbol tras partir o eliminar un cubo"""
+        self._maximos = [(saldos[-1], numeros[-1]) for saldos, numeros in zip(self._saldos, self._numeros)]
+        arbol = [0] * (len(self._saldos) + 1)
+        for i, saldos in enumerate(self._saldos, 1):
+            arbol[i] += len(saldos)
+            padre = i + (i & -i)
+            if padre < len(arbol):
+                arbol[padre] += arbol[i]
+        self._arbol = arbol
+
+    def _sumar_tamano(self, cubo: int, delta: int):
+        arbol = self._arbol
+        i = cubo + 1
+        while i < len(arbol):
+            arbol[i] += delta
+            i += i & -i
+
+    def _anteriores(self, cubo: int) -> int:
+        """Número de claves en los cubos anteriores a `cubo`"""
+        arbol = self._arbol
+        total = 0
+        while cubo:
+            total += arbol[cubo]
+            cubo -= cubo & -cubo
+        return total
+
+    def _localizar(self, posicion: int) -> Tuple[int, int]:
+        """Cubo y posición dentro de él de la clave en la posición global dada"""
+        arbol = self._arbol
+        cubo = 0
+        paso = 1 << (len(arbol).bit_length() - 1)
+        while paso:
+            siguiente = cubo + paso
+            if siguiente < len(arbol) and arbol[siguiente] <= posicion:
+                cubo = siguiente
+                posicion -= arbol[siguiente]
+            paso >>= 1
+        return cubo, posicion
+
+    def _posicion_en_cubo(self, cubo: int, saldo: float, numero: str) -> int:
+        """Posición donde iría la clave dentro de un cubo"""
+        saldos = self._saldos[cubo]
+        inicio = bisect_left(saldos, saldo)
+        fin = bisect_right(saldos, saldo, inicio)
+        return bisect_left(self._numeros[cubo], numero, inicio, fin)
+
+    def __len__(self) -> int:
+        return self._longitud
+
+    def agregar(self, saldo: float, numero: str):
+        """Añade la cuenta con su saldo actual"""
+        if not self._saldos:
+            self._saldos.append(array("d", [saldo]))
+            self._numeros.append([numero])
+            self._longitud = 1
+            self._reconstruir()
+            return
+        indice = min(bisect_left(self._maximos, (saldo, numero)), len(self._saldos) - 1)
+        self._insertar(indice, saldo, numero)
+        self._longitud += 1
+        saldos = self._saldos[indice]
+        if len(saldos) > 2 * self._carga:
+            numeros = self._numeros[indice]
+            self._saldos[indice:indice + 1] = [saldos[:self._carga], saldos[self._carga:]]
+            self._numeros[indice:indice + 1] = [numeros[:self._carga], numeros[self._carga:]]
+            self._reconstruir()
+        else:
+            self._sumar_tamano(indice, 1)
+
+    def _insertar(self, indice: int, saldo: float, numero: str):
+        posicion = self._posicion_en_cubo(indice, saldo, numero)
+        self._saldos[indice].insert(posicion, saldo)
+        numeros = self._numeros[indice]
+        numeros.insert(posicion, numero)
+        if posicion == len(numeros) - 1:
+            self._maximos[indice] = (saldo, numero)
+
+    def _buscar(self, saldo: float, numero: str) -> Tuple[int, int]:
+        """Cubo y posición de una clave que debe estar en el índice"""
+        indice = bisect_left(self._maximos, (saldo, numero))
+        if indice < len(self._saldos):
+            posicion = self._posicion_en_cubo(indice, saldo, numero)
+            numeros = self._numeros[indice]
+            if posicion < len(numeros) and numeros[posicion] == numero and self._saldos[indice][posicion] == saldo:
+                return indice, posicion
+        raise KeyError(f"La cuenta {numero} no está en el índice con saldo {saldo}")
+
+    def _eliminar(self, indice: int, posicion: int):
+        saldos = self._saldos[indice]
+        numeros = self._numeros[indice]
+        del saldos[posicion]
+        del numeros[posicion]
+        if numeros and posicion == len(numeros):
+            self._maximos[indice] = (saldos[-1], numeros[-1])
+
+    def quitar(self, saldo: float, numero: str):
+        """Quita la cuenta, que debe estar en el índice con ese saldo"""
+        indice, posicion = self._buscar(saldo, numero)
+        self._eliminar(indice, posicion)
+        self._longitud -= 1
+        if not self._numeros[indice]:
+            del self._saldos[indice]
+            del self._numeros[indice]
+            self._reconstruir()
+        else:
+            self._sumar_tamano(indice, -1)
+
+    def cambiar(self, numero: str, anterior: float, nuevo: float):
+        """Mueve la cuenta de su saldo anterior al nuevo"""
+        if anterior == nuevo:
+            return
+        indice, posicion = self._buscar(anterior, numero)
+        clave = (nuevo, numero)
+        # Si la clave nueva cae en el mismo cubo, los tamaños no cambian
+        if (indice == 0 or self._maximos[indice - 1] < clave) and \
+                (indice == len(self._saldos) - 1 or clave < self._maximos[indice]):
+            self._eliminar(indice, posicion)
+            self._insertar(indice, nuevo, numero)
+        else:
+            self.quitar(anterior, numero)
+            self.agregar(nuevo, numero)
+
+    def clave(self, posicion: int) -> Clave:
+        """Clave en la posición dada en orden creciente (admite negativas)"""
+        if posicion < 0:
+            posicion += self._longitud
+        if not 0 <= posicion < self._longitud:
+            raise IndexError("Posición fuera del índice")
+        cubo, posicion = self._localizar(posicion)
+        return self._saldos[cubo][posicion], self._numeros[cubo][posicion]
+
+    def contar_menores(self, saldo: float) -> int:
+        """Número de cuentas con saldo estrictamente menor"""
+        indice = bisect_left(self._maximos, (saldo,))
+        if indice == len(self._saldos):
+            return self._longitud
+        return self._anteriores(indice) + bisect_left(self._saldos[indice], saldo)
+
+    def contar_hasta(self, saldo: float) -> int:
+        """Número de cuentas con saldo menor o igual"""
+        indice = bisect_left(self._maximos, (saldo, _ULTIMO))
+        if indice == len(self._saldos):
+            return self._longitud
+        return self._anteriores(indice) + bisect_right(self._saldos[indice], saldo)
+
+    def posicion(self, saldo: float, numero: str) -> int:
+        """Posición en orden creciente de una clave del índice"""
+        indice, posicion = self._buscar(saldo, numero)
+        return self._anteriores(indice) + posicion
+
+    def mayores(self, n: int) -> List[Clave]:
+        """Las n claves de mayor saldo, de mayor a menor"""
+        resultado: List[Clave] = []
+        for saldos, numeros in zip(reversed(self._saldos), reversed(self._numeros)):
+            faltan = n - len(resultado)
+            if faltan <= 0:
+                break
+            desde = max(len(numeros) - faltan, 0)
+            resultado.extend(zip(reversed(saldos[desde:]), reversed(numeros[desde:])))
+        return resultado
+
+    def entre(self, minimo: float, maximo: float) -> Iterator[Clave]:
+        """Claves con minimo <= saldo <= maximo, en orden creciente"""
+        indice = bisect_left(self._maximos, (minimo,))
+        if indice == len(self._saldos):
+            return
+        inicio = bisect_left(self._saldos[indice], minimo)
+        while indice < len(self._saldos):
+            saldos = self._saldos[indice]
+            fin = bisect_right(saldos, maximo, inicio)
+            yield from zip(saldos[inicio:fin], self._numeros[indice][inicio:fin])
+            if fin < len(saldos):
+                return
+            indice += 1
+            inicio = 0
+
+    def __iter__(self) -> Iterator[Clave]:
+        for saldos, numeros in zip(self._saldos, self._numeros):
+            yield from zip(saldos, numeros)
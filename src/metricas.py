@@ -0,0 +1,331 @@
+"""
+Módulo de Métricas
+Histogramas de latencia y contadores de errores por operación
+"""
+
+import functools
+import inspect
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Operaciones que se miden en un banco con métricas. Las más frecuentes
+# (OPERACIONES_CRONOMETRADAS) se miden desde dentro del propio método con un
+# Cronometro; el resto, más lentas o más raras, con una envoltura (medir).
+# De sus cuentas solo se miden las consultas de historial que construyen una
+# entrada por transacción: vista_historial y saldo_en no llegan al µs y
+# medirlas costaría más que ejecutarlas
+OPERACIONES_CRONOMETRADAS = ("depositar", "retirar", "transferir")
+OPERACIONES_BANCO = (
+    "crear_cuenta", "crear_cuentas_lote", "importar_cuentas_csv", "transferir_lote", "obtener_total_depositado",
+    "validar_cuenta_con_servicio_externo", "avalidar_cuenta",
+    "guardar_snapshot", "exportar_historial",
+)
+OPERACIONES_CUENTA = ("obtener_historial", "pagina_historial", "obtener_historial_entre")
+
+# Cubos fijos: exactos hasta 8 ns y a partir de ahí cuatro por cada potencia
+# de dos (error relativo menor del 25 %). El último recoge todo lo que pase
+# de 2**40 ns, unos 18 minutos
+NUM_CUBOS = (40 - 2) * 4 + 4
+_ULTIMO_CUBO = NUM_CUBOS - 1
+
+
+def indice_cubo(duracion_ns: int) -> int:
+    """Cubo en el que cae una duración"""
+    bits = duracion_ns.bit_length()
+    if bits <= 3:
+        return duracion_ns
+    return min(_ULTIMO_CUBO, (bits - 2) * 4 + ((duracion_ns >> (bits - 3)) & 3))
+
+
+def limites_cubo(indice: int) -> Tuple[int, int]:
+    """Duraciones [mínima, máxima) en ns que caen en un cubo"""
+    if indice < 8:
+        return indice, indice + 1
+    desplazamiento = indice // 4 - 1
+    return (4 + indice % 4) << desplazamiento, (5 + indice % 4) << desplazamiento
+
+
+class HistogramaLatencia:
+    """
+    Histograma de duraciones en nanosegundos con cubos de tamaño fijo.
+
+    Cada hilo cuenta en su propia lista (cubos y, en la última posición, la
+    suma de duraciones), así que registrar no toma ningún candado. Al leer se
+    suman las listas; las de hilos ya terminados se acumulan y se descartan.
+    Reiniciar guarda los totales actuales como base en lugar de poner a cero
+    listas que otro hilo puede estar incrementando.
+    """
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._local = threading.local()
+        self._hilos: List[Tuple[threading.Thread, List[int]]] = []
+        self._terminados = [0] * (NUM_CUBOS + 1)
+        self._base = [0] * (NUM_CUBOS + 1)
+
+    def cubos_hilo(self) -> List[int]:
+        """Contadores del hilo actual"""
+        try:
+            return self._local.cubos
+        except AttributeError:
+            cubos = self._local.cubos = [0] * (NUM_CUBOS + 1)
+            with self._candado:
+                self._hilos.append((threading.current_thread(), cubos))
+            return cubos
+
+    def registrar(self, duracion_ns: int, peso: int = 1):
+        """Anota una duración, como `peso` llamadas si solo se mide una de cada `peso`"""
+        try:
+            cubos = self._local.cubos
+        except AttributeError:
+            cubos = self.cubos_hilo()
+        # indice_cubo en línea: esto se ejecuta en cada llamada medida
+        bits = duracion_ns.bit_length()
+        if bits <= 3:
+            cubos[duracion_ns] += peso
+        elif bits < 40:
+            cubos[(bits - 2) * 4 + ((duracion_ns >> (bits - 3)) & 3)] += peso
+        else:
+            cubos[indice_cubo(duracion_ns)] += peso
+        cubos[NUM_CUBOS] += duracion_ns * peso
+
+    def _totales(self) -> List[int]:
+        """Suma de los contadores de todos los hilos; quien llama tiene el candado"""
+        vivos = []
+        totales = self._terminados
+        for hilo, cubos in self._hilos:
+            if hilo.is_alive():
+                vivos.append((hilo, cubos))
+            else:
+                totales = self._terminados = [a + b for a, b in zip(totales, cubos)]
+        self._hilos = vivos
+        for _, cubos in vivos:
+            totales = [a + b for a, b in zip(totales, cubos)]
+        return totales
+
+    def instantanea(self, reiniciar: bool = False) -> dict:
+        """Resumen desde el último reinicio; con reiniciar=True además empieza un periodo nuevo"""
+        with self._candado:
+            totales = self._totales()
+            actuales = [a - b for a, b in zip(totales, self._base)]
+            if reiniciar:
+                self._base = totales
+        cubos, total_ns = actuales[:NUM_CUBOS], actuales[NUM_CUBOS]
+        llamadas = sum(cubos)
+        return {
+            "llamadas": llamadas,
+            "total_ns": total_ns,
+            "media_ns": total_ns / llamadas if llamadas else 0.0,
+            "p50_ns": _percentil(cubos, llamadas, 50),
+            "p90_ns": _percentil(cubos, llamadas, 90),
+            "p99_ns": _percentil(cubos, llamadas, 99),
+            "cubos": [(limites_cubo(indice)[1], cantidad) for indice, cantidad in enumerate(cubos) if cantidad],
+        }
+
+    def percentil(self, percentil: float) -> int:
+        """Aproximación por exceso del percentil (0-100): límite superior de su cubo"""
+        if not 0 <= percentil <= 100:
+            raise ValueError("El percentil debe estar entre 0 y 100")
+        with self._candado:
+            actuales = [a - b for a, b in zip(self._totales(), self._base)]
+        return _percentil(actuales[:NUM_CUBOS], sum(actuales[:NUM_CUBOS]), percentil)
+
+
+def _percentil(cubos: List[int], llamadas: int, percentil: float) -> int:
+    if not llamadas:
+        return 0
+    objetivo = max(1, -(-llamadas * percentil // 100))
+    acumulado = 0
+    for indice, cantidad in enumerate(cubos):
+        acumulado += cantidad
+        if acumulado >= objetivo:
+            return limites_cubo(indice)[1] - 1
+    return 0
+
+
+class Cronometro:
+    """
+    Medida de una operación hecha desde dentro de su método, sin envoltura.
+
+    El método mide así, y sin métricas solo paga comprobar que no hay cronómetro:
+
+        inicio = cronometro.iniciar()
+        try:
+            ...
+        except Exception as error:
+            cronometro.fallo(error)
+            raise
+        finally:
+            cronometro.terminar(inicio)
+
+    iniciar() devuelve 0 para las llamadas que quedan fuera de la muestra, y
+    terminar(0) no anota nada.
+    """
+
+    __slots__ = ("operacion", "_metricas", "_registrar", "_muestreo", "_turnos")
+
+    def __init__(self, metricas: "Metricas", operacion: str):
+        self.operacion = operacion
+        self._metricas = metricas
+        self._registrar = metricas.histograma(operacion).registrar
+        self._muestreo = metricas.muestreo
+        self._turnos = itertools.count()
+
+    def iniciar(self) -> int:
+        """Instante de inicio en ns, o 0 si esta llamada no se mide"""
+        if self._muestreo > 1 and next(self._turnos) % self._muestreo:
+            return 0
+        return time.perf_counter_ns()
+
+    def terminar(self, inicio: int):
+        """Anota la duración de una llamada empezada con iniciar()"""
+        if inicio:
+            self._registrar(time.perf_counter_ns() - inicio, self._muestreo)
+
+    def fallo(self, error: BaseException):
+        """Cuenta un error de la operación, se mida la llamada o no"""
+        self._metricas.registrar_error(self.operacion, error)
+
+
+class Metricas:
+    """
+    Latencias y errores por operación de los objetos instrumentados.
+
+    Nada se mide hasta que se instrumenta un objeto o una clase, o un método
+    pide un Cronometro: sin métricas los métodos son los originales y no pagan
+    ningún coste. Con ellas, cada llamada medida cuesta dos lecturas del reloj
+    y dos incrementos en las listas del hilo, sin candados.
+
+    Con muestreo=N solo se mide una de cada N llamadas de cada operación, y
+    cuenta como N: llamadas y tiempo total pasan a ser estimaciones (múltiplos
+    de N) y los percentiles se calculan sobre la muestra. Los errores se
+    cuentan siempre, se mida la llamada o no.
+    """
+
+    def __init__(self, muestreo: int = 1):
+        if muestreo < 1:
+            raise ValueError("El muestreo debe ser de al menos una llamada de cada una")
+        self.muestreo = muestreo
+        self._candado = threading.Lock()
+        self._histogramas: Dict[str, HistogramaLatencia] = {}
+        self._errores: Dict[str, Dict[str, int]] = {}
+        self._clases: Dict[Tuple[type, Tuple[str, ...], str], type] = {}
+
+    def histograma(self, operacion: str) -> HistogramaLatencia:
+        """Histograma de una operación, creándolo si no existe"""
+        with self._candado:
+            return self._histogramas.setdefault(operacion, HistogramaLatencia())
+
+    def registrar_error(self, operacion: str, error: BaseException):
+        """Cuenta un error por operación y tipo"""
+        with self._candado:
+            errores = self._errores.setdefault(operacion, {})
+            tipo = type(error).__name__
+            errores[tipo] = errores.get(tipo, 0) + 1
+
+    def cronometro(self, operacion: str) -> Cronometro:
+        """Cronómetro para medir una operación desde dentro de su método"""
+        return Cronometro(self, operacion)
+
+    def medir(self, operacion: str, funcion: Callable) -> Callable:
+        """Envuelve una función (o corrutina) para medir su duración y sus errores"""
+        registrar = self.histograma(operacion).registrar
+        registrar_error = self.registrar_error
+        reloj = time.perf_counter_ns
+        muestreo = self.muestreo
+        # next() sobre un count es atómico: los hilos se reparten los turnos sin candado
+        turnos = itertools.count()
+
+        if inspect.iscoroutinefunction(funcion):
+            @functools.wraps(funcion)
+            async def medida_async(*args, **kwargs):
+                if muestreo > 1 and next(turnos) % muestreo:
+                    try:
+                        return await funcion(*args, **kwargs)
+                    except Exception as error:
+                        registrar_error(operacion, error)
+                        raise
+                inicio = reloj()
+                try:
+                    return await funcion(*args, **kwargs)
+                except Exception as error:
+                    registrar_error(operacion, error)
+                    raise
+                finally:
+                    registrar(reloj() - inicio, muestreo)
+            return medida_async
+
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            # Fuera de la muestra solo se cuentan los errores
+            if muestreo > 1 and next(turnos) % muestreo:
+                try:
+                    return funcion(*args, **kwargs)
+                except Exception as error:
+                    registrar_error(operacion, error)
+                    raise
+            inicio = reloj()
+            try:
+                return funcion(*args, **kwargs)
+            except Exception as error:
+                registrar_error(operacion, error)
+                raise
+            finally:
+                registrar(reloj() - inicio, muestreo)
+        return medida
+
+    def instrumentar(self, objeto, metodos: Iterable[str], prefijo: str = ""):
+        """Sustituye, solo en esta instancia, los métodos indicados por versiones medidas"""
+        for nombre in metodos:
+            setattr(objeto, nombre, self.medir(prefijo + nombre, getattr(objeto, nombre)))
+
+    def clase_instrumentada(self, clase: type, metodos: Iterable[str], prefijo: str = "") -> type:
+        """
+        Subclase de `clase` con los métodos indicados medidos.
+
+        Sirve para instrumentar muchas instancias (las cuentas de un banco) sin
+        crear envolturas por objeto. Se crea una vez por clase y métodos.
+        """
+        metodos = tuple(metodos)
+        clave = (clase, metodos, prefijo)
+        with self._candado:
+            instrumentada = self._clases.get(clave)
+        if instrumentada is None:
+            atributos = {nombre: self.medir(prefijo + nombre, getattr(clase, nombre)) for nombre in metodos}
+            atributos["__module__"] = clase.__module__
+            atributos["__doc__"] = clase.__doc__
+            instrumentada = type(clase.__name__, (clase,), atributos)
+            with self._candado:
+                instrumentada = self._clases.setdefault(clave, instrumentada)
+        return instrumentada
+
+    def instantanea(self, reiniciar: bool = False) -> Dict[str, dict]:
+        """
+        Resumen de las operaciones con llamadas o errores: latencias (ver
+        HistogramaLatencia.instantanea) y errores por tipo.
+
+        Con reiniciar=True cada histograma se lee y se reinicia a la vez, de
+        modo que ninguna llamada se cuenta dos veces ni se pierde entre lecturas.
+        """
+        with self._candado:
+            histogramas = list(self._histogramas.items())
+            errores = self._errores
+            if reiniciar:
+                self._errores = {}
+            else:
+                errores = {operacion: dict(por_tipo) for operacion, por_tipo in errores.items()}
+        resultado = {}
+        for operacion, histograma in histogramas:
+            resumen = histograma.instantanea(reiniciar)
+            if resumen["llamadas"]:
+                resumen["errores"] = errores.pop(operacion, {})
+                resultado[operacion] = resumen
+        for operacion, por_tipo in errores.items():
+            resultado.setdefault(operacion, {"llamadas": 0})["errores"] = por_tipo
+        return resultado
+
+    def reiniciar(self):
+        """Empieza un periodo de medida nuevo sin dejar de medir"""
+        self.instantanea(reiniciar=True)
@@ -0,0 +1,327 @@
+"""
+Módulo de Reconciliación
+Auditoría de un banco reproduciendo en bloque el historial de sus cuentas
+"""
+
+import math
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from typing import Dict, List, Optional, Tuple
+
+from .banco import Banco, TotalInconsistenteError
+from .cuenta import Cuenta
+from .historial import CODIGOS_TIPO, ns_a_fecha
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy es opcional
+    np = None
+
+# Tipos de discrepancia
+CADENA = "cadena"                        # saldo_nuevo distinto del anterior más/menos la cantidad
+SALDO_NEGATIVO = "saldo_negativo"        # una entrada deja la cuenta en negativo
+APERTURA_NEGATIVA = "apertura_negativa"  # el saldo de apertura, previo a la primera entrada, es negativo
+TIPO_DESCONOCIDO = "tipo_desconocido"    # código de tipo que no es DEPOSITO ni RETIRO
+SALDO_FINAL = "saldo_final"              # el historial reproducido no da el saldo actual
+TOTAL = "total"                          # la suma de saldos no da obtener_total_depositado
+
+# Cuentas por bloque de trabajo (la unidad que se reparte entre procesos)
+CUENTAS_POR_BLOQUE = 50_000
+
+# Holgura relativa en modo float, además de la absoluta: las sumas largas de
+# importes grandes acumulan redondeos del orden de su último dígito
+_HOLGURA_RELATIVA = 1e-12
+
+_RETIRO = CODIGOS_TIPO["RETIRO"]
+_DEPOSITO = CODIGOS_TIPO["DEPOSITO"]
+TIPOS_VALIDOS = tuple(CODIGOS_TIPO.values())
+
+# (tipo, posición de la cuenta en el bloque, índice en su historial o -1, fecha_ns o -1, esperado, registrado)
+_Hallazgo = Tuple[str, int, int, int, float, float]
+
+
+class Discrepancia:
+    """Una incoherencia encontrada, con la cuenta y la entrada del historial donde está"""
+
+    __slots__ = ("tipo", "numero_cuenta", "indice", "fecha", "esperado", "registrado")
+
+    def __init__(self, tipo: str, numero_cuenta: Optional[str], indice: Optional[int],
+                 fecha: Optional[datetime], esperado: float, registrado: float):
+        self.tipo = tipo
+        self.numero_cuenta = numero_cuenta
+        self.indice = indice
+        self.fecha = fecha
+        self.esperado = esperado
+        self.registrado = registrado
+
+    def __repr__(self) -> str:
+        lugar = "banco" if self.numero_cuenta is None else f"cuenta {self.numero_cuenta}"
+        if self.indice is not None:
+            lugar += f", entrada {self.indice} ({self.fecha})"
+        return f"Discrepancia({self.tipo} en {lugar}: esperado {self.esperado}, registrado {self.registrado})"
+
+
+class InformeConciliacion:
+    """Resultado de conciliar un banco"""
+
+    def __init__(self, cuentas: int, transacciones: int, total_depositado: float, total_saldos: float,
+                 discrepancias: List[Discrepancia]):
+        self.cuentas = cuentas
+        self.transacciones = transacciones
+        self.total_depositado = total_depositado
+        self.total_saldos = total_saldos
+        self.discrepancias = discrepancias
+
+    @property
+    def correcto(self) -> bool:
+        return not self.discrepancias
+
+    def por_tipo(self) -> Dict[str, int]:
+        """Número de discrepancias de cada tipo"""
+        cuenta: Dict[str, int] = {}
+        for discrepancia in self.discrepancias:
+            cuenta[discrepancia.tipo] = cuenta.get(discrepancia.tipo, 0) + 1
+        return cuenta
+
+
+class _Bloque:
+    """Historiales de un grupo de cuentas, concatenados en columnas"""
+
+    __slots__ = ("numeros", "saldos_actuales", "aperturas", "longitudes", "tipos", "cantidades", "fechas",
+                 "saldos")
+
+    def __init__(self, escala: Optional[int]):
+        importe = "d" if escala is None else "q"
+        self.numeros: List[str] = []
+        self.saldos_actuales = array(importe)
+        self.aperturas = array(importe)
+        self.longitudes = array("q")
+        self.tipos = array("b")
+        self.cantidades = array(importe)
+        self.fechas = array("q")
+        self.saldos = array(importe)
+
+
+def conciliar(banco: Banco, procesos: Optional[int] = None, tolerancia: float = 1e-6,
+              cuentas_por_bloque: int = CUENTAS_POR_BLOQUE) -> InformeConciliacion:
+    """
+    Reproduce el historial de todas las cuentas y comprueba que es coherente.
+
+    Para cada cuenta verifica la cadena de saldos (cada saldo_nuevo es el
+    anterior más o menos la cantidad), que ningún saldo sea negativo y que el
+    saldo de apertura más la suma de todos los movimientos dé el saldo
+    actual. Para el banco, que la suma de saldos coincida con
+    obtener_total_depositado. En modo céntimos todo es exacto; en modo float
+    se admite `tolerancia` más una holgura relativa mínima. La cadena parte
+    del saldo de apertura de la cuenta (el inicial, o el de la instantánea si
+    se guardó sin historial), así que la primera entrada se comprueba igual
+    que las demás.
+
+    El resultado corresponde a un instante (ver _copiar_bloques), aunque las
+    franjas solo están todas bloqueadas mientras se leen saldos y longitudes;
+    la comprobación se hace después, por bloques de cuentas, con NumPy si
+    está disponible y en `procesos` procesos si se pide más de uno.
+    """
+    escala = banco._clase_cuenta.ESCALA
+    bloques, total_depositado = _copiar_bloques(banco, escala, cuentas_por_bloque)
+    total_saldos, hallazgos_total = _comprobar_total(bloques, total_depositado, escala, tolerancia)
+
+    if procesos is not None and procesos > 1 and len(bloques) > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            resultados = list(ejecutor.map(_conciliar_bloque, bloques, repeat(escala), repeat(tolerancia)))
+    else:
+        resultados = [_conciliar_bloque(bloque, escala, tolerancia) for bloque in bloques]
+
+    unidad = escala or 1
+    discrepancias = []
+    for bloque, hallazgos in zip(bloques, resultados):
+        # Por cuenta y por entrada; lo que afecta a la cuenta entera, al final
+        hallazgos.sort(key=lambda hallazgo: (hallazgo[1], hallazgo[2] < 0, hallazgo[2], hallazgo[0]))
+        for tipo, cuenta, indice, fecha_ns, esperado, registrado in hallazgos:
+            if tipo == TIPO_DESCONOCIDO:
+                esperado = TIPOS_VALIDOS
+            else:
+                esperado, registrado = esperado / unidad, registrado / unidad
+            discrepancias.append(Discrepancia(
+                tipo, bloque.numeros[cuenta], None if indice < 0 else indice,
+                None if fecha_ns < 0 else ns_a_fecha(fecha_ns), esperado, registrado))
+    discrepancias.extend(hallazgos_total)
+    return InformeConciliacion(sum(len(bloque.numeros) for bloque in bloques),
+                               sum(len(bloque.tipos) for bloque in bloques),
+                               total_depositado, total_saldos, discrepancias)
+
+
+def _copiar_bloques(banco: Banco, escala: Optional[int], cuentas_por_bloque: int) -> Tuple[List[_Bloque], float]:
+    """
+    Copia saldos, historiales y el total del banco tal como estaban en un instante.
+
+    Con todas las franjas bloqueadas solo se leen saldos, total y longitud de
+    cada historial. Los historiales (con su parte archivada) se copian después
+    hasta esa longitud, con solo el candado de la franja de cada cuenta: solo
+    crecen por el final, así que lo copiado es lo que había en ese instante.
+    """
+    banco._materializar_cuentas()
+    bloques: List[_Bloque] = []
+    cuentas: List[Cuenta] = []
+    franjas = banco._bloquear_todo()
+    try:
+        for numero_cuenta, cuenta in banco.cuentas.items():
+            if not bloques or len(bloques[-1].numeros) == cuentas_por_bloque:
+                bloques.append(_Bloque(escala))
+            bloque = bloques[-1]
+            bloque.numeros.append(numero_cuenta)
+            bloque.saldos_actuales.append(cuenta._saldo)
+            bloque.aperturas.append(cuenta._saldo_apertura)
+            bloque.longitudes.append(len(cuenta.historial_transacciones))
+            cuentas.append(cuenta)
+        try:
+            total_depositado = banco.obtener_total_depositado()
+        except TotalInconsistenteError:
+            # Con verificar_total el banco ya detecta el desajuste; se informa igual
+            total_depositado = banco._combinar_totales(franja.total for franja in banco._franjas)
+    finally:
+        banco._desbloquear(franjas)
+
+    candados = [franja.candado for franja in banco._franjas]
+    pendientes = iter(cuentas)
+    for bloque in bloques:
+        destinos = (bloque.tipos, bloque.cantidades, bloque.fechas, bloque.saldos)
+        for numero_cuenta, longitud, cuenta in zip(bloque.numeros, bloque.longitudes, pendientes):
+            with candados[banco._indice_franja(numero_cuenta)]:
+                historial = cuenta.historial_transacciones
+                if historial.archivadas:
+                    columnas = historial.columnas()
+                else:
+                    columnas = (historial.tipos, historial.cantidades, historial.fechas, historial.saldos)
+                if len(columnas[0]) == longitud:
+                    for destino, columna in zip(destinos, columnas):
+                        destino.extend(columna)
+                else:
+                    for destino, columna in zip(destinos, columnas):
+                        destino.extend(columna[:longitud])
+    return bloques, total_depositado
+
+
+def _comprobar_total(bloques: List[_Bloque], total_depositado: float, escala: Optional[int],
+                     tolerancia: float) -> Tuple[float, List[Discrepancia]]:
+    """Compara la suma exacta de los saldos copiados con el total del banco"""
+    if escala is None:
+        total_saldos = math.fsum(saldo for bloque in bloques for saldo in bloque.saldos_actuales)
+    else:
+        total_saldos = sum(sum(bloque.saldos_actuales) for bloque in bloques) / escala
+    iguales = total_depositado == total_saldos if escala is not None else \
+        abs(total_depositado - total_saldos) <= tolerancia + _HOLGURA_RELATIVA * abs(total_saldos)
+    hallazgos = [] if iguales else [Discrepancia(TOTAL, None, None, None, total_saldos, total_depositado)]
+    return total_saldos, hallazgos
+
+
+def _conciliar_bloque(bloque: _Bloque, escala: Optional[int], tolerancia: float) -> List[_Hallazgo]:
+    """Comprueba las cuentas de un bloque; los importes se devuelven en unidades internas"""
+    if escala is not None:
+        tolerancia = 0
+    if np is not None:
+        return _conciliar_bloque_numpy(bloque, escala, tolerancia)
+    return _conciliar_bloque_secuencial(bloque, tolerancia)
+
+
+def _conciliar_bloque_numpy(bloque: _Bloque, escala: Optional[int], tolerancia: float) -> List[_Hallazgo]:
+    """
+    Versión vectorizada: los movimientos con signo de todo el bloque se
+    reproducen de una vez. La cadena se compara entrada a entrada con el
+    saldo anterior registrado, de modo que un error aparece solo donde está
+    y no en todas las entradas siguientes; el saldo final se reproduce
+    sumando por tramos los movimientos de cada cuenta a su saldo de apertura.
+    """
+    tipo_importe = np.float64 if escala is None else np.int64
+    tipos = np.frombuffer(bloque.tipos, dtype=np.int8)
+    cantidades = np.frombuffer(bloque.cantidades, dtype=tipo_importe)
+    fechas = np.frombuffer(bloque.fechas, dtype=np.int64)
+    saldos = np.frombuffer(bloque.saldos, dtype=tipo_importe)
+    actuales = np.frombuffer(bloque.saldos_actuales, dtype=tipo_importe)
+    aperturas = np.frombuffer(bloque.aperturas, dtype=tipo_importe)
+    longitudes = np.frombuffer(bloque.longitudes, dtype=np.int64)
+    inicios = np.cumsum(longitudes) - longitudes
+    cuenta_fila = np.repeat(np.arange(len(longitudes)), longitudes)
+    indice_fila = np.arange(len(tipos)) - inicios[cuenta_fila]
+
+    def fuera(diferencia, referencia):
+        if escala is not None:
+            return diferencia != 0
+        return np.abs(diferencia) > tolerancia + _HOLGURA_RELATIVA * np.abs(referencia)
+
+    hallazgos: List[_Hallazgo] = []
+
+    def anotar(tipo, filas, esperados, registrados):
+        for fila, esperado, registrado in zip(filas.tolist(), esperados.tolist(), registrados.tolist()):
+            hallazgos.append((tipo, int(cuenta_fila[fila]), int(indice_fila[fila]), int(fechas[fila]),
+                              esperado, registrado))
+
+    filas = np.flatnonzero((tipos != _DEPOSITO) & (tipos != _RETIRO))
+    anotar(TIPO_DESCONOCIDO, filas, np.full(len(filas), _DEPOSITO), tipos[filas])
+
+    movimientos = np.where(tipos == _RETIRO, -cantidades, cantidades)
+    anteriores = np.empty_like(saldos)
+    anteriores[1:] = saldos[:-1]
+    con_historial = longitudes > 0
+    primeras = inicios[con_historial]
+    anteriores[primeras] = aperturas[con_historial]
+    esperados = anteriores + movimientos
+    filas = np.flatnonzero(fuera(saldos - esperados, saldos))
+    anotar(CADENA, filas, esperados[filas], saldos[filas])
+
+    filas = np.flatnonzero(saldos < -tolerancia)
+    anotar(SALDO_NEGATIVO, filas, np.zeros(len(filas)), saldos[filas])
+    filas = primeras[anteriores[primeras] < -tolerancia]
+    anotar(APERTURA_NEGATIVA, filas, np.zeros(len(filas)), anteriores[filas])
+
+    reproducidos = aperturas.copy()
+    if len(primeras):
+        reproducidos[con_historial] += np.add.reduceat(movimientos, primeras)
+    malas = np.flatnonzero(fuera(actuales - reproducidos, actuales))
+    for cuenta, esperado, registrado in zip(malas.tolist(), reproducidos[malas].tolist(),
+                                            actuales[malas].tolist()):
+        hallazgos.append((SALDO_FINAL, cuenta, -1, -1, esperado, registrado))
+    negativas = np.flatnonzero(actuales < -tolerancia)
+    for cuenta, registrado in zip(negativas.tolist(), actuales[negativas].tolist()):
+        hallazgos.append((SALDO_NEGATIVO, cuenta, -1, -1, 0, registrado))
+    return hallazgos
+
+
+def _conciliar_bloque_secuencial(bloque: _Bloque, tolerancia: float) -> List[_Hallazgo]:
+    """Las mismas comprobaciones, cuenta por cuenta, sin NumPy"""
+    hallazgos: List[_Hallazgo] = []
+    exacto = bloque.saldos.typecode == "q"
+
+    def fuera(diferencia, referencia):
+        if exacto:
+            return diferencia != 0
+        return abs(diferencia) > tolerancia + _HOLGURA_RELATIVA * abs(referencia)
+
+    inicio = 0
+    for cuenta, longitud in enumerate(bloque.longitudes):
+        actual = bloque.saldos_actuales[cuenta]
+        anterior = reproducido = bloque.aperturas[cuenta]
+        if longitud and anterior < -tolerancia:
+            hallazgos.append((APERTURA_NEGATIVA, cuenta, 0, bloque.fechas[inicio], 0, anterior))
+        for indice in range(longitud):
+            fila = inicio + indice
+            tipo, cantidad, saldo = bloque.tipos[fila], bloque.cantidades[fila], bloque.saldos[fila]
+            fecha_ns = bloque.fechas[fila]
+            if tipo != _DEPOSITO and tipo != _RETIRO:
+                hallazgos.append((TIPO_DESCONOCIDO, cuenta, indice, fecha_ns, _DEPOSITO, tipo))
+            movimiento = -cantidad if tipo == _RETIRO else cantidad
+            esperado = anterior + movimiento
+            if fuera(saldo - esperado, saldo):
+                hallazgos.append((CADENA, cuenta, indice, fecha_ns, esperado, saldo))
+            if saldo < -tolerancia:
+                hallazgos.append((SALDO_NEGATIVO, cuenta, indice, fecha_ns, 0, saldo))
+            reproducido += movimiento
+            anterior = saldo
+        if fuera(actual - reproducido, actual):
+            hallazgos.append((SALDO_FINAL, cuenta, -1, -1, reproducido, actual))
+        if actual < -tolerancia:
+            hallazgos.append((SALDO_NEGATIVO, cuenta, -1, -1, 0, actual))
+        inicio += longitud
+    return hallazgos
@@ -0,0 +1,168 @@
+"""
+Módulo de Reloj
+Fuentes de tiempo intercambiables para fechar cuentas y transacciones
+"""
+
+import abc
+import asyncio
+import selectors
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .historial import fecha_a_ns, ns_a_fecha
+
+
+def _intervalo_a_ns(intervalo: timedelta) -> int:
+    return (intervalo // timedelta(microseconds=1)) * 1000
+
+
+class Reloj(abc.ABC):
+    """
+    Fuente de la hora usada por cuentas y bancos.
+
+    Las fechas se manejan como nanosegundos desde la época de historial.py
+    (hora local, sin zona) y solo se convierten a datetime al leerlas.
+    """
+
+    @abc.abstractmethod
+    def ahora_ns(self) -> int:
+        """Hora actual en nanosegundos desde la época"""
+
+    def ahora(self) -> datetime:
+        """Hora actual como datetime"""
+        return ns_a_fecha(self.ahora_ns())
+
+
+class RelojSistema(Reloj):
+    """
+    Reloj del sistema anclado a un contador monótono.
+
+    Lee la hora de pared una sola vez al crearse (o al reanclarlo) y a partir
+    de ahí suma time.monotonic_ns(), que es mucho más barato que
+    datetime.now() y nunca retrocede. Si la hora del sistema se ajusta, el
+    reloj no lo ve hasta que se llama a reanclar().
+    """
+
+    def __init__(self):
+        self.reanclar()
+
+    def reanclar(self):
+        """Vuelve a alinear el reloj con la hora de pared actual"""
+        self._base_ns = fecha_a_ns(datetime.now()) - time.monotonic_ns()
+
+    def ahora_ns(self) -> int:
+        return self._base_ns + time.monotonic_ns()
+
+
+class RelojManual(Reloj):
+    """
+    Reloj que solo avanza cuando se le indica, para tests y reproducciones.
+
+    Con `paso`, cada lectura devuelve la hora actual y luego avanza ese
+    intervalo, de modo que transacciones seguidas tienen fechas distintas.
+    """
+
+    def __init__(self, inicio: datetime = datetime(2024, 1, 1), paso: timedelta = timedelta(0)):
+        self._ns = fecha_a_ns(inicio)
+        self._paso_ns = _intervalo_a_ns(paso)
+
+    def ahora_ns(self) -> int:
+        ns = self._ns
+        self._ns += self._paso_ns
+        return ns
+
+    def avanzar(self, intervalo: timedelta):
+        """Adelanta el reloj un intervalo"""
+        self._ns += _intervalo_a_ns(intervalo)
+
+    def fijar(self, fecha: datetime):
+        """Pone el reloj en una fecha concreta"""
+        self._ns = fecha_a_ns(fecha)
+
+
+class RelojVirtual(Reloj):
+    """
+    Reloj simulado para tests y simulaciones de carga.
+
+    dormir() adelanta el reloj en lugar de esperar, y ejecutar() corre una
+    corrutina en un bucle de asyncio cuyo tiempo es el de este reloj: cuando
+    todas las tareas esperan, el bucle salta al siguiente temporizador. Así
+    las esperas concurrentes se solapan igual que en tiempo real.
+    """
+
+    def __init__(self, inicio: datetime = datetime(2024, 1, 1)):
+        self._inicio_ns = fecha_a_ns(inicio)
+        self._transcurrido_ns = 0
+        self._candado = threading.Lock()
+
+    def ahora_ns(self) -> int:
+        return self._inicio_ns + self._transcurrido_ns
+
+    def monotonic(self) -> float:
+        """Segundos simulados transcurridos (sustituto de time.monotonic)"""
+        return self._transcurrido_ns / 1e9
+
+    def dormir(self, segundos: float):
+        """Adelanta el reloj en lugar de esperar (sustituto de time.sleep)"""
+        if segundos > 0:
+            with self._candado:
+                self._transcurrido_ns += round(segundos * 1e9)
+
+    async def adormir(self, segundos: float):
+        """
+        Sustituto de asyncio.sleep que no espera tiempo real.
+
+        Solo funciona dentro de ejecutar(): en otro bucle cada corrutina
+        tendría que adelantar el reloj por su cuenta y las esperas
+        concurrentes se sumarían en lugar de solaparse.
+        """
+        if getattr(asyncio.get_running_loop(), "reloj", None) is not self:
+            raise RuntimeError("RelojVirtual.adormir solo puede usarse dentro de RelojVirtual.ejecutar")
+        await asyncio.sleep(segundos)
+
+    def ejecutar(self, corrutina):
+        """Como asyncio.run, pero con el tiempo de este reloj"""
+        bucle = _BucleVirtual(self)
+        try:
+            return bucle.run_until_complete(corrutina)
+        finally:
+            bucle.run_until_complete(bucle.shutdown_asyncgens())
+            bucle.close()
+
+
+class _SelectorVirtual(selectors.DefaultSelector):
+    """Selector que, si no hay nada listo, adelanta el reloj virtual en lugar de esperar"""
+
+    def __init__(self, reloj: RelojVirtual):
+        super().__init__()
+        self.reloj = reloj
+
+    def select(self, timeout=None):
+        if timeout is None or timeout <= 0:
+            return super().select(timeout)
+        eventos = super().select(0)
+        if not eventos:
+            self.reloj.dormir(timeout)
+        return eventos
+
+
+class _BucleVirtual(asyncio.SelectorEventLoop):
+    """
+    Bucle de eventos con el tiempo de un RelojVirtual.
+
+    Solo usa puntos de extensión documentados: el selector que recibe
+    SelectorEventLoop y el método time() del bucle. Sin nada listo, el
+    selector salta hasta el siguiente temporizador en lugar de esperarlo.
+    """
+
+    def __init__(self, reloj: RelojVirtual):
+        super().__init__(_SelectorVirtual(reloj))
+        self.reloj = reloj
+
+    def time(self) -> float:
+        return self.reloj.monotonic()
+
+
+# Reloj compartido por las cuentas y bancos a los que no se les indica otro
+RELOJ_SISTEMA = RelojSistema()
@@ -0,0 +1,168 @@
+"""
+Módulo de Retención del Historial
+Política de retención y segmentos en disco para las entradas antiguas
+"""
+
+import glob
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+# Una entrada por registro: tipo, cantidad, fecha (ns) y saldo posterior;
+# cantidad y saldo son enteros en los historiales con escala
+_ENTRADA_FLOAT = struct.Struct("<bdqd")
+_ENTRADA_ESCALA = struct.Struct("<bqqq")
+_DESPLAZAMIENTO_FECHA = 9
+
+
+class PoliticaRetencion:
+    """
+    Cuántas entradas del historial de cada cuenta se quedan en memoria.
+
+    Se conservan las `max_entradas` más recientes y/o las de los últimos
+    `max_dias` antes de la última transacción; el resto se archiva en
+    segmentos de disco bajo `directorio`. Para no mover las columnas en cada
+    transacción, se archiva por tandas de al menos `lote` entradas.
+    """
+
+    def __init__(self, directorio: str, max_entradas: Optional[int] = None,
+                 max_dias: Optional[float] = None, lote: int = 256,
+                 tamano_segmento: int = 65536):
+        if max_entradas is None and max_dias is None:
+            raise ValueError("La política de retención necesita max_entradas o max_dias")
+        if max_entradas is not None and max_entradas < 0:
+            raise ValueError("max_entradas no puede ser negativo")
+        if lote <= 0 or tamano_segmento <= 0:
+            raise ValueError("lote y tamano_segmento deben ser positivos")
+        self.directorio = directorio
+        self.max_entradas = max_entradas
+        self.max_dias = max_dias
+        self.lote = lote
+        self.tamano_segmento = tamano_segmento
+        self._ventana_ns = None if max_dias is None else \
+            (timedelta(days=max_dias) // timedelta(microseconds=1)) * 1000
+
+    def directorio_cuenta(self, numero_cuenta: str) -> str:
+        """Directorio de los segmentos de una cuenta"""
+        return os.path.join(self.directorio, "cuenta-" + quote(numero_cuenta, safe=""))
+
+    def a_archivar(self, fechas: array) -> int:
+        """Número de entradas más antiguas en memoria que toca archivar ahora"""
+        en_memoria = len(fechas)
+        if en_memoria < self.lote:
+            return 0
+        cuantas = 0
+        if self.max_entradas is not None and en_memoria >= self.max_entradas + self.lote:
+            cuantas = en_memoria - self.max_entradas
+        if self._ventana_ns is not None:
+            corte = fechas[-1] - self._ventana_ns
+            if fechas[self.lote - 1] < corte:
+                cuantas = max(cuantas, bisect_left(fechas, corte))
+        return cuantas
+
+
+class _FechasArchivadas:
+    """Secuencia de las fechas archivadas leídas del disco, para bisect"""
+
+    def __init__(self, segmentos: "SegmentosHistorial"):
+        self._segmentos = segmentos
+        self._archivo = None
+        self._numero = -1
+
+    def __len__(self) -> int:
+        return self._segmentos.num_entradas
+
+    def __getitem__(self, indice: int) -> int:
+        numero, posicion = divmod(indice, self._segmentos.tamano_segmento)
+        if numero != self._numero:
+            self.cerrar()
+            self._archivo = open(self._segmentos.ruta_segmento(numero), "rb")
+            self._numero = numero
+        self._archivo.seek(posicion * self._segmentos.formato.size + _DESPLAZAMIENTO_FECHA)
+        return struct.unpack("<q", self._archivo.read(8))[0]
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+            self._numero = -1
+
+
+class SegmentosHistorial:
+    """
+    Entradas archivadas de un historial en archivos de solo añadido.
+
+    Cada segmento guarda hasta `tamano_segmento` entradas de tamaño fijo, así
+    que la entrada i está en una posición calculable sin índice. Solo se
+    mantienen abiertos los archivos durante cada lectura o escritura.
+    """
+
+    def __init__(self, directorio: str, escala: Optional[int] = None, tamano_segmento: int = 65536):
+        self.directorio = directorio
+        self.tamano_segmento = tamano_segmento
+        self.formato = _ENTRADA_FLOAT if escala is None else _ENTRADA_ESCALA
+        self._tipo_importe = "d" if escala is None else "q"
+        self.num_entradas = 0
+        os.makedirs(directorio, exist_ok=True)
+        # Un historial nuevo empieza sin entradas archivadas
+        self.vaciar()
+
+    def ruta_segmento(self, numero: int) -> str:
+        """Ruta del archivo de un segmento"""
+        return os.path.join(self.directorio, f"segmento-{numero:06d}.bin")
+
+    def agregar(self, tipos: array, cantidades: array, fechas: array, saldos: array):
+        """Añade entradas al final del archivo, abriendo segmentos nuevos según se llenan"""
+        empaquetar = self.formato.pack
+        filas = list(zip(tipos, cantidades, fechas, saldos))
+        inicio = 0
+        while inicio < len(filas):
+            numero, posicion = divmod(self.num_entradas, self.tamano_segmento)
+            fin = inicio + min(self.tamano_segmento - posicion, len(filas) - inicio)
+            with open(self.ruta_segmento(numero), "ab") as archivo:
+                archivo.write(b"".join(empaquetar(*fila) for fila in filas[inicio:fin]))
+            self.num_entradas += fin - inicio
+            inicio = fin
+
+    def leer(self, inicio: int, fin: int) -> Iterator[Tuple[int, float, int, float]]:
+        """Recorre las entradas archivadas [inicio, fin) como (tipo, cantidad, fecha_ns, saldo)"""
+        tamano = self.formato.size
+        while inicio < fin:
+            numero, posicion = divmod(inicio, self.tamano_segmento)
+            cuantas = min(self.tamano_segmento - posicion, fin - inicio)
+            with open(self.ruta_segmento(numero), "rb") as archivo:
+                archivo.seek(posicion * tamano)
+                datos = archivo.read(cuantas * tamano)
+            yield from self.formato.iter_unpack(datos)
+            inicio += cuantas
+
+    def columnas(self) -> Tuple[array, array, array, array]:
+        """Las cuatro columnas (tipos, cantidades, fechas, saldos) de todo lo archivado"""
+        columnas = (array("b"), array(self._tipo_importe), array("q"), array(self._tipo_importe))
+        for fila in self.leer(0, self.num_entradas):
+            for columna, valor in zip(columnas, fila):
+                columna.append(valor)
+        return columnas
+
+    def posicion(self, fecha_ns: int, incluida: bool) -> int:
+        """Como bisect sobre las fechas archivadas, leyendo solo O(log n) entradas"""
+        fechas = _FechasArchivadas(self)
+        try:
+            return (bisect_left if incluida else bisect_right)(fechas, fecha_ns)
+        finally:
+            fechas.cerrar()
+
+    def vaciar(self):
+        """Borra todos los segmentos"""
+        for ruta in glob.glob(os.path.join(glob.escape(self.directorio), "segmento-*.bin")):
+            os.remove(ruta)
+        self.num_entradas = 0
+
+    def segmentos(self) -> List[str]:
+        """Rutas de los segmentos existentes"""
+        return [self.ruta_segmento(numero)
+                for numero in range((self.num_entradas + self.tamano_segmento - 1) // self.tamano_segmento)]
@@ -0,0 +1,87 @@
+"""
+Módulo de Simulación
+Modelo reproducible de latencia y fallos del servicio externo
+"""
+
+import math
+import random
+from array import array
+from typing import Callable, Optional
+
+from .reloj import RelojVirtual
+
+# Una distribución de latencia recibe el generador y devuelve segundos
+DistribucionLatencia = Callable[[random.Random], float]
+
+
+def latencia_constante(segundos: float) -> DistribucionLatencia:
+    """Siempre la misma latencia"""
+    return lambda generador: segundos
+
+
+def latencia_uniforme(minima: float, maxima: float) -> DistribucionLatencia:
+    """Latencia uniforme entre dos valores"""
+    return lambda generador: generador.uniform(minima, maxima)
+
+
+def latencia_lognormal(mediana: float, sigma: float = 0.5) -> DistribucionLatencia:
+    """Latencia lognormal: la mayoría cerca de la mediana y una cola larga de lentas"""
+    mu = math.log(mediana)
+    return lambda generador: generador.lognormvariate(mu, sigma)
+
+
+class ServicioSimulado:
+    """
+    Servicio externo simulado con semilla, latencia configurable y reloj virtual.
+
+    Las esperas adelantan el reloj virtual en lugar de dormir, por lo que
+    miles de validaciones tardan milisegundos reales. Las latencias sorteadas
+    se guardan para poder informar de la latencia simulada.
+    """
+
+    def __init__(self, semilla: Optional[int] = None,
+                 latencia: Optional[DistribucionLatencia] = None,
+                 probabilidad_fallo: float = 0.1,
+                 reloj: Optional[RelojVirtual] = None):
+        if not 0.0 <= probabilidad_fallo <= 1.0:
+            raise ValueError("La probabilidad de fallo debe estar entre 0 y 1")
+        self.generador = random.Random(semilla)
+        self.distribucion = latencia_lognormal(0.1) if latencia is None else latencia
+        self.probabilidad_fallo = probabilidad_fallo
+        self.reloj = RelojVirtual() if reloj is None else reloj
+        self.latencias = array("d")
+        self.fallos = 0
+
+    def latencia(self) -> float:
+        """Sortea la latencia de una llamada y la registra"""
+        segundos = max(0.0, self.distribucion(self.generador))
+        self.latencias.append(segundos)
+        return segundos
+
+    def falla(self) -> bool:
+        """Sortea si una llamada falla"""
+        if self.generador.random() < self.probabilidad_fallo:
+            self.fallos += 1
+            return True
+        return False
+
+    def esperar(self, segundos: float):
+        """Espera simulada: adelanta el reloj virtual"""
+        self.reloj.dormir(segundos)
+
+    async def aesperar(self, segundos: float):
+        """Versión asíncrona de esperar"""
+        await self.reloj.adormir(segundos)
+
+    @property
+    def llamadas(self) -> int:
+        """Número de llamadas simuladas"""
+        return len(self.latencias)
+
+    def percentil(self, p: float) -> float:
+        """Percentil p (0-100) de las latencias simuladas, por el método del rango más cercano"""
+        if not self.latencias:
+            raise ValueError("No hay latencias registradas")
+        ordenadas = sorted(self.latencias)
+        rango = max(1, math.ceil(p / 100 * len(ordenadas)))
+        return ordenadas[min(rango, len(ordenadas)) - 1]
@@ -0,0 +1,258 @@
+"""
+Módulo de Instantáneas
+Formato binario compacto del estado del banco con carga diferida vía mmap
+"""
+
+import mmap
+import struct
+import threading
+import zlib
+from typing import BinaryIO, Callable, Iterator, List, Optional, Sequence
+
+from .cuenta import Cuenta, CuentaCentavos
+
+MAGIA = b"BNCSNAP\0"
+VERSION = 3
+
+# Banderas de la cabecera
+CON_HISTORIAL = 1
+EN_CENTAVOS = 2
+CON_WAL = 4
+
+# magia, versión, banderas, nº de parciales del total, nº de cuentas,
+# contador de transacciones, nº de entradas de historial, desplazamientos de
+# registros, historial y cadenas, posición del WAL, CRC32 de todo lo que
+# sigue a la cabecera y CRC32 de la propia cabecera hasta ese campo
+_CABECERA = struct.Struct("<8sHHIQQQQQQQII")
+
+# Por cuenta: desplazamiento y longitud del número y del titular, saldo,
+# saldo de apertura, fecha de creación (ns) y primera entrada y número de
+# entradas de historial. En modo céntimos los saldos (y los parciales del
+# total) son enteros
+_REGISTRO = struct.Struct("<QIQIddqQQ")
+_REGISTRO_CENTAVOS = struct.Struct("<QIQIqqqQQ")
+
+
+class SnapshotInvalidoError(Exception):
+    """Error cuando un archivo de instantánea no es válido o está dañado"""
+    pass
+
+
+def escribir_snapshot(ruta: str, cuentas: Sequence[Cuenta], parciales_total: Sequence[float],
+                      contador_transacciones: int, con_historial: bool = True,
+                      en_centavos: bool = False, posicion_wal: Optional[int] = None):
+    """
+    Escribe una instantánea con las cuentas indicadas.
+
+    Las cuentas se guardan ordenadas por número para poder buscarlas sin
+    índice en memoria. Las columnas de historial de todas las cuentas se
+    concatenan, una detrás de otra, alineadas a 8 bytes. Con en_centavos los
+    saldos se guardan como los enteros de céntimos de CuentaCentavos. Sin
+    historial, el saldo actual pasa a ser el de apertura. Con posicion_wal se
+    guarda hasta qué byte del WAL refleja la instantánea.
+    """
+    registro = _REGISTRO_CENTAVOS if en_centavos else _REGISTRO
+    cuentas = sorted(cuentas, key=lambda cuenta: cuenta.numero_cuenta.encode("utf-8"))
+    cadenas = bytearray()
+    registros = bytearray()
+    entradas = 0
+    for cuenta in cuentas:
+        numero = cuenta.numero_cuenta.encode("utf-8")
+        titular = cuenta.titular.encode("utf-8")
+        num_entradas = len(cuenta.historial_transacciones) if con_historial else 0
+        registros += registro.pack(len(cadenas), len(numero), len(cadenas) + len(numero), len(titular),
+                                   cuenta._saldo, cuenta._saldo_apertura if con_historial else cuenta._saldo,
+                                   cuenta._creacion_ns, entradas, num_entradas)
+        cadenas += numero
+        cadenas += titular
+        entradas += num_entradas
+
+    parciales = struct.pack(f"<{len(parciales_total)}{'q' if en_centavos else 'd'}", *parciales_total)
+    inicio_registros = _CABECERA.size + len(parciales)
+    inicio_historial = inicio_registros + len(registros)
+    inicio_cadenas = inicio_historial + 25 * entradas
+
+    with open(ruta, "wb") as archivo:
+        archivo.write(b"\0" * _CABECERA.size)
+        crc = _escribir(archivo, parciales, 0)
+        crc = _escribir(archivo, registros, crc)
+        if con_historial:
+            for columna in ("cantidades", "fechas", "saldos", "tipos"):
+                for cuenta in cuentas:
+                    datos = cuenta.historial_transacciones.columna(columna).tobytes()
+                    crc = _escribir(archivo, datos, crc)
+        crc = _escribir(archivo, cadenas, crc)
+        archivo.seek(0)
+        banderas = (CON_HISTORIAL if con_historial else 0) | (EN_CENTAVOS if en_centavos else 0) | \
+            (CON_WAL if posicion_wal is not None else 0)
+        cabecera = _CABECERA.pack(MAGIA, VERSION, banderas,
+                                  len(parciales_total), len(cuentas), contador_transacciones,
+                                  entradas, inicio_registros, inicio_historial, inicio_cadenas,
+                                  posicion_wal or 0, crc, 0)
+        archivo.write(cabecera[:-4] + struct.pack("<I", zlib.crc32(cabecera[:-4])))
+
+
+def _escribir(archivo: BinaryIO, datos: bytes, crc: int) -> int:
+    archivo.write(datos)
+    return zlib.crc32(datos, crc)
+
+
+class Snapshot:
+    """
+    Instantánea abierta con mmap.
+
+    Abrirla solo lee la cabecera, cuyo CRC propio se comprueba siempre (el
+    del resto del archivo, si se pide); las cuentas se construyen una a una
+    bajo demanda buscándolas por número.
+    """
+
+    def __init__(self, ruta: str, verificar: bool = True):
+        self.ruta = ruta
+        with open(ruta, "rb") as archivo:
+            try:
+                self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotInvalidoError(f"{ruta} está vacío") from None
+        if len(self._mapa) < _CABECERA.size:
+            raise SnapshotInvalidoError(f"{ruta} es demasiado corto para ser una instantánea")
+        (magia, version, banderas, num_parciales, self.num_cuentas, self.contador_transacciones,
+         self.num_entradas, self._inicio_registros, self._inicio_historial, self._inicio_cadenas,
+         posicion_wal, crc, crc_cabecera) = _CABECERA.unpack_from(self._mapa)
+        if magia != MAGIA:
+            raise SnapshotInvalidoError(f"{ruta} no es una instantánea del banco")
+        if version != VERSION:
+            raise SnapshotInvalidoError(f"Versión de instantánea no soportada: {version}")
+        if zlib.crc32(self._mapa[:_CABECERA.size - 4]) != crc_cabecera:
+            raise SnapshotInvalidoError(f"CRC de la cabecera incorrecto en {ruta}")
+        if verificar and zlib.crc32(memoryview(self._mapa)[_CABECERA.size:]) != crc:
+            raise SnapshotInvalidoError(f"CRC incorrecto en {ruta}")
+        self.con_historial = bool(banderas & CON_HISTORIAL)
+        self.en_centavos = bool(banderas & EN_CENTAVOS)
+        # Byte del WAL hasta el que llega la instantánea; None si se guardó sin WAL
+        self.posicion_wal: Optional[int] = posicion_wal if banderas & CON_WAL else None
+        self._registro_struct = _REGISTRO_CENTAVOS if self.en_centavos else _REGISTRO
+        self.parciales_total: List[float] = list(struct.unpack_from(
+            f"<{num_parciales}{'q' if self.en_centavos else 'd'}", self._mapa, _CABECERA.size))
+
+    def cerrar(self):
+        """Libera el mapeo en memoria"""
+        self._mapa.close()
+
+    def buscar(self, numero_cuenta: str) -> int:
+        """Posición de una cuenta en la instantánea, o -1 si no está (búsqueda binaria)"""
+        clave = numero_cuenta.encode("utf-8")
+        bajo, alto = 0, self.num_cuentas
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            actual = self._numero(medio)
+            if actual < clave:
+                bajo = medio + 1
+            elif actual > clave:
+                alto = medio
+            else:
+                return medio
+        return -1
+
+    def numeros(self) -> Iterator[str]:
+        """Números de cuenta en el orden de la instantánea"""
+        for posicion in range(self.num_cuentas):
+            yield self._numero(posicion).decode("utf-8")
+
+    def cuenta(self, posicion: int) -> Cuenta:
+        """Construye la cuenta guardada en una posición"""
+        (inicio_numero, largo_numero, inicio_titular, largo_titular, saldo, apertura, creacion_ns,
+         primera, num_entradas) = self._registro(posicion)
+        base = self._inicio_cadenas
+        clase = CuentaCentavos if self.en_centavos else Cuenta
+        cuenta = clase(bytes(self._mapa[base + inicio_numero:base + inicio_numero + largo_numero]).decode("utf-8"),
+                       bytes(self._mapa[base + inicio_titular:base + inicio_titular + largo_titular]).decode("utf-8"))
+        cuenta._saldo = saldo
+        cuenta._saldo_apertura = apertura
+        cuenta._creacion_ns = creacion_ns
+        if num_entradas:
+            historial = cuenta.historial_transacciones
+            total = self.num_entradas
+            columnas = ((historial.cantidades, 8, 0), (historial.fechas, 8, 8 * total),
+                        (historial.saldos, 8, 16 * total), (historial.tipos, 1, 24 * total))
+            for columna, tamano, desplazamiento in columnas:
+                inicio = self._inicio_historial + desplazamiento + tamano * primera
+                columna.frombytes(self._mapa[inicio:inicio + tamano * num_entradas])
+        return cuenta
+
+    def _registro(self, posicion: int) -> tuple:
+        return self._registro_struct.unpack_from(self._mapa, self._inicio_registros + _REGISTRO.size * posicion)
+
+    def _numero(self, posicion: int) -> bytes:
+        inicio, largo = struct.unpack_from("<QI", self._mapa, self._inicio_registros + _REGISTRO.size * posicion)
+        inicio += self._inicio_cadenas
+        return self._mapa[inicio:inicio + largo]
+
+
+class CuentasDiferidas(dict):
+    """
+    Diccionario de cuentas respaldado por una instantánea.
+
+    Las cuentas de la instantánea se construyen la primera vez que se piden;
+    recorrer el diccionario (values, items, iteración) las construye todas.
+    """
+
+    def __init__(self, snapshot: Snapshot, al_materializar: Callable[[Cuenta], None]):
+        super().__init__()
+        self._snapshot = snapshot
+        self._al_materializar = al_materializar
+        self._candado = threading.Lock()
+        self._materializadas = 0
+
+    def __missing__(self, numero_cuenta: str) -> Cuenta:
+        with self._candado:
+            cuenta = dict.get(self, numero_cuenta)
+            if cuenta is not None:
+                return cuenta
+            posicion = self._snapshot.buscar(numero_cuenta)
+            if posicion < 0:
+                raise KeyError(numero_cuenta)
+            cuenta = self._snapshot.cuenta(posicion)
+            dict.__setitem__(self, numero_cuenta, cuenta)
+            self._materializadas += 1
+            self._al_materializar(cuenta)
+            return cuenta
+
+    def __contains__(self, numero_cuenta) -> bool:
+        return dict.__contains__(self, numero_cuenta) or self._snapshot.buscar(numero_cuenta) >= 0
+
+    def get(self, numero_cuenta, defecto=None):
+        try:
+            return self[numero_cuenta]
+        except KeyError:
+            return defecto
+
+    def __len__(self) -> int:
+        return dict.__len__(self) + self._snapshot.num_cuentas - self._materializadas
+
+    def materializar_todo(self):
+        """Construye todas las cuentas que aún no se han pedido"""
+        if self._materializadas < self._snapshot.num_cuentas:
+            for numero_cuenta in self._snapshot.numeros():
+                self[numero_cuenta]
+
+    def __iter__(self):
+        self.materializar_todo()
+        return dict.__iter__(self)
+
+    def keys(self):
+        self.materializar_todo()
+        return dict.keys(self)
+
+    def values(self):
+        self.materializar_todo()
+        return dict.values(self)
+
+    def items(self):
+        self.materializar_todo()
+        return dict.items(self)
+
+    def __eq__(self, otro) -> bool:
+        self.materializar_todo()
+        return dict.__eq__(self, otro)
+
+    __hash__ = None
@@ -0,0 +1,177 @@
+"""
+Módulo de Registro de Escritura Anticipada (WAL)
+Registro en disco, solo de añadido, de las operaciones del banco
+"""
+
+import json
+import os
+import threading
+import zlib
+from typing import Iterator, List
+
+# Modos de sincronización con el disco
+SINCRONIZAR_CADA_OPERACION = "cada_operacion"
+SINCRONIZAR_EN_GRUPO = "grupo"
+SINCRONIZAR_NUNCA = "nunca"
+MODOS_SINCRONIZACION = (SINCRONIZAR_CADA_OPERACION, SINCRONIZAR_EN_GRUPO, SINCRONIZAR_NUNCA)
+
+
+class RegistroCorruptoError(Exception):
+    """Error cuando el registro tiene una entrada dañada antes del final"""
+    pass
+
+
+def _codificar(registro: dict) -> bytes:
+    """Codifica un registro como una línea "crc32 json" """
+    datos = json.dumps(registro, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(datos), datos)
+
+
+def _decodificar(linea: bytes):
+    """Decodifica una línea; devuelve None si está incompleta o dañada"""
+    if not linea.endswith(b"\n") or len(linea) < 10 or linea[8:9] != b" ":
+        return None
+    datos = linea[9:-1]
+    try:
+        if int(linea[:8], 16) != zlib.crc32(datos):
+            return None
+        return json.loads(datos)
+    except ValueError:
+        return None
+
+
+class RegistroWAL:
+    """
+    Registro de escritura anticipada con confirmación en grupo.
+
+    Cada operación se añade como una línea con su CRC32. escribir() no vuelve
+    hasta que la línea es duradera según el modo de sincronización:
+
+    - "cada_operacion": un fsync por operación.
+    - "grupo": los hilos que escriben mientras otro hace fsync se agrupan y
+      el siguiente fsync cubre a todos (group commit).
+    - "nunca": se deja la escritura al sistema operativo.
+
+    Al abrir un registro existente se descarta una posible última línea
+    incompleta, que corresponde a una operación nunca confirmada.
+    """
+
+    def __init__(self, ruta: str, sincronizacion: str = SINCRONIZAR_EN_GRUPO):
+        if sincronizacion not in MODOS_SINCRONIZACION:
+            raise ValueError(f"Modo de sincronización desconocido: {sincronizacion}")
+        self.ruta = ruta
+        self.sincronizacion = sincronizacion
+        self._truncar_cola_incompleta()
+        self._archivo = open(ruta, "ab")
+        # Fin del último registro escrito (o pendiente de escribir)
+        self._fin = self._archivo.tell()
+        self._condicion = threading.Condition()
+        self._pendientes: List[bytes] = []
+        self._escritas = 0
+        self._duraderas = 0
+        self._escribiendo = False
+        self._error = None
+        self.operaciones = 0
+        self.sincronizaciones = 0
+
+    def escribir(self, registro: dict):
+        """Añade un registro y espera a que sea duradero"""
+        linea = _codificar(registro)
+        if self.sincronizacion != SINCRONIZAR_EN_GRUPO:
+            with self._condicion:
+                self._archivo.write(linea)
+                self._archivo.flush()
+                if self.sincronizacion == SINCRONIZAR_CADA_OPERACION:
+                    os.fsync(self._archivo.fileno())
+                    self.sincronizaciones += 1
+                self.operaciones += 1
+                self._fin += len(linea)
+            return
+
+        with self._condicion:
+            self._pendientes.append(linea)
+            self._fin += len(linea)
+            self._escritas += 1
+            self.operaciones += 1
+            mi_numero = self._escritas
+            while self._duraderas < mi_numero:
+                if self._error is not None:
+                    raise self._error
+                if self._escribiendo:
+                    self._condicion.wait()
+                    continue
+                # Este hilo pasa a escribir todo lo pendiente, incluido lo suyo
+                self._escribiendo = True
+                lote, self._pendientes = self._pendientes, []
+                hasta = self._escritas
+                self._condicion.release()
+                try:
+                    self._archivo.write(b"".join(lote))
+                    self._archivo.flush()
+                    os.fsync(self._archivo.fileno())
+                except OSError as error:
+                    self._error = error
+                finally:
+                    self._condicion.acquire()
+                    self._escribiendo = False
+                    self._condicion.notify_all()
+                if self._error is None:
+                    self._duraderas = hasta
+                    self.sincronizaciones += 1
+
+    @property
+    def posicion(self) -> int:
+        """
+        Byte del archivo en el que acaba el último registro escrito.
+
+        Sin escrituras en curso (por ejemplo, con todas las franjas del banco
+        bloqueadas) es el punto hasta el que el estado ya está anotado.
+        """
+        with self._condicion:
+            return self._fin
+
+    def registros(self, desde: int = 0) -> Iterator[dict]:
+        """Recorre los registros válidos del archivo a partir del byte `desde` (el inicio de uno)"""
+        return leer_registros(self.ruta, desde)
+
+    def cerrar(self):
+        """Cierra el archivo del registro"""
+        with self._condicion:
+            self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
+
+    def _truncar_cola_incompleta(self):
+        """Recorta el archivo tras el último registro válido"""
+        if not os.path.exists(self.ruta):
+            return
+        with open(self.ruta, "r+b") as archivo:
+            fin_valido = 0
+            for linea in archivo:
+                if _decodificar(linea) is None:
+                    break
+                fin_valido += len(linea)
+            resto = archivo.read()
+            archivo.seek(0, os.SEEK_END)
+            if archivo.tell() != fin_valido:
+                if resto.strip():
+                    raise RegistroCorruptoError(
+                        f"Registro dañado en el byte {fin_valido} de {self.ruta}")
+                archivo.truncate(fin_valido)
+
+
+def leer_registros(ruta: str, desde: int = 0) -> Iterator[dict]:
+    """Recorre los registros válidos de un archivo WAL, parando en el primero dañado"""
+    if not os.path.exists(ruta):
+        return
+    with open(ruta, "rb") as archivo:
+        archivo.seek(desde)
+        for linea in archivo:
+            registro = _decodificar(linea)
+            if registro is None:
+                return
+            yield registro
@@ -0,0 +1,33 @@
+"""
+Fixtures y utilidades comunes a varios módulos de tests
+"""
+
+import pytest
+
+import src.banco as modulo_banco
+
+
+class RelojFalso:
+    """Reloj controlado por el test"""
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj_falso():
+    return RelojFalso()
+
+
+@pytest.fixture(params=["numpy", "python"])
+def modo_lote(request, monkeypatch):
+    """Ejecuta cada test con y sin NumPy"""
+    if request.param == "numpy":
+        if modulo_banco.np is None:
+            pytest.skip("NumPy no está instalado")
+    else:
+        monkeypatch.setattr(modulo_banco, "np", None)
+    return request.param
@@ -0,0 +1,139 @@
+"""
+Tests de la caché de validaciones con el servicio externo
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.banco import Banco, ServicioExternoError
+from src.cache import CacheValidacion
+
+
+@pytest.fixture
+def sin_latencia():
+    with patch('src.banco.time.sleep') as dormir:
+        yield dormir
+
+
+class TestCacheValidacion:
+    """Tests de CacheValidacion y su uso desde el banco"""
+
+    def test_segunda_validacion_no_llama_al_servicio(self, sin_latencia):
+        """
+        GIVEN: Un banco con caché de validaciones
+        WHEN: Se valida dos veces la misma cuenta
+        THEN: Solo la primera paga la latencia del servicio
+        """
+        # Given
+        cache = CacheValidacion(ttl=60)
+        banco = Banco("Banco Nacional", cache_validacion=cache)
+        banco.crear_cuenta("123456", "Juan Pérez", 100.0)
+
+        # When
+        with patch('src.banco.random.random', return_value=0.5):
+            primero = banco.validar_cuenta_con_servicio_externo("123456")
+            segundo = banco.validar_cuenta_con_servicio_externo("123456")
+
+        # Then
+        assert primero is True and segundo is True
+        assert sin_latencia.call_count == 1
+        assert cache.estadisticas()["aciertos"] == 1
+        assert cache.estadisticas()["fallos"] == 1
+
+    def test_cache_negativa_se_invalida_al_crear_la_cuenta(self, sin_latencia):
+        """
+        GIVEN: Una validación negativa guardada en caché
+        WHEN: Se crea la cuenta
+        THEN: La siguiente validación vuelve a consultar el servicio
+        """
+        # Given
+        banco = Banco("Banco Nacional", cache_validacion=CacheValidacion())
+        with patch('src.banco.random.random', return_value=0.5):
+            assert banco.validar_cuenta_con_servicio_externo("123456") is False
+            assert banco.validar_cuenta_con_servicio_externo("123456") is False
+
+            # When
+            banco.crear_cuenta("123456", "Juan Pérez", 100.0)
+
+            # Then
+            assert banco.validar_cuenta_con_servicio_externo("123456") is True
+        assert sin_latencia.call_count == 2
+
+    def test_solo_la_invalidacion_de_la_misma_cuenta_descarta_el_resultado(self, sin_latencia):
+        """
+        GIVEN: Un banco con caché que da de alta cuentas mientras hay validaciones en vuelo
+        WHEN: Durante la consulta de una cuenta se crean otras cuentas, o la propia cuenta
+        THEN: El resultado se guarda salvo si la cuenta consultada se invalidó entretanto
+        """
+        # Given
+        cache = CacheValidacion()
+        banco = Banco("Banco Nacional", cache_validacion=cache)
+        banco.crear_cuenta("A", "Juan Pérez", 100.0)
+        altas = iter([[("B", "Ana López", 1.0), ("C", "Luis Gómez", 2.0)], [("D", "Eva Ruiz", 3.0)]])
+        sin_latencia.side_effect = lambda _: banco.crear_cuentas_lote(next(altas))
+
+        # When
+        with patch('src.banco.random.random', return_value=0.5):
+            banco.validar_cuenta_con_servicio_externo("A")
+            assert banco.validar_cuenta_con_servicio_externo("D") is True
+
+        # Then
+        assert len(cache) == 1
+        assert cache.obtener("A") is True
+        assert cache.obtener("D") is None
+
+    def test_errores_del_servicio_no_se_guardan(self, sin_latencia):
+        """
+        GIVEN: Un servicio que falla una vez
+        WHEN: Se reintenta la validación
+        THEN: El reintento consulta de nuevo el servicio
+        """
+        banco = Banco("Banco Nacional", cache_validacion=CacheValidacion())
+        banco.crear_cuenta("123456", "Juan Pérez", 100.0)
+
+        with patch('src.banco.random.random', side_effect=[0.05, 0.5]):
+            with pytest.raises(ServicioExternoError):
+                banco.validar_cuenta_con_servicio_externo("123456")
+            assert banco.validar_cuenta_con_servicio_externo("123456") is True
+        assert sin_latencia.call_count == 2
+
+    def test_caducidad_y_expulsion_lru(self, reloj_falso):
+        """
+        GIVEN: Una caché de dos entradas con TTL de 10 segundos
+        WHEN: Se añaden entradas, se consultan y pasa el tiempo
+        THEN: Se expulsa la menos usada y las caducadas dejan de devolverse
+        """
+        # Given
+        cache = CacheValidacion(ttl=10, ttl_negativo=2, max_entradas=2, reloj=reloj_falso)
+
+        # When
+        cache.guardar("a", True)
+        cache.guardar("b", False)
+        cache.obtener("a")
+        cache.guardar("c", True)
+
+        # Then
+        assert cache.obtener("b") is None
+        assert cache.obtener("a") is True
+        assert cache.estadisticas()["expulsiones"] == 1
+        reloj_falso.ahora = 10.0
+        assert cache.obtener("a") is None
+        assert cache.estadisticas()["caducadas"] == 1
+
+    def test_validacion_asincrona_usa_la_cache(self):
+        """
+        GIVEN: Un banco con caché y una validación asíncrona previa
+        WHEN: Se vuelve a validar la cuenta
+        THEN: Se responde desde la caché
+        """
+        cache = CacheValidacion()
+        banco = Banco("Banco Nacional", cache_validacion=cache)
+        banco.crear_cuenta("123456", "Juan Pérez", 100.0)
+
+        with patch('src.banco.random.random', return_value=0.5):
+            asyncio.run(banco.avalidar_cuentas(["123456", "999"]))
+            asyncio.run(banco.avalidar_cuentas(["123456", "999"]))
+
+        assert cache.estadisticas()["aciertos"] == 2
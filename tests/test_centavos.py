@@ -0,0 +1,217 @@
+"""
+Tests del modo de punto fijo en céntimos
+"""
+
+import random
+
+import pytest
+
+from src.banco import Banco, LOTE_CANTIDAD_INVALIDA, LOTE_OK, LOTE_SALDO_INSUFICIENTE
+from src.cuenta import Cuenta, CuentaCentavos, SaldoInsuficienteError
+from src.wal import RegistroWAL, SINCRONIZAR_NUNCA
+
+
+def _estado(banco):
+    return (
+        {numero: (cuenta.titular, cuenta.obtener_saldo(), cuenta.fecha_creacion, cuenta.obtener_historial())
+         for numero, cuenta in banco.cuentas.items()},
+        banco.contador_transacciones,
+        banco.obtener_total_depositado(),
+    )
+
+
+def _saldos_e_historiales(banco):
+    return {
+        numero: (cuenta._saldo,
+                 [(t["tipo"], t["cantidad"], t["saldo_anterior"], t["saldo_nuevo"])
+                  for t in cuenta.obtener_historial()])
+        for numero, cuenta in banco.cuentas.items()
+    }
+
+
+class TestCuentaCentavos:
+    """Tests de la cuenta con saldo entero en céntimos"""
+
+    def test_depositos_repetidos_no_acumulan_deriva(self):
+        """
+        GIVEN: Una cuenta float y una cuenta en céntimos vacías
+        WHEN: Se depositan diez veces 0.1 en cada una
+        THEN: Solo la cuenta en céntimos tiene exactamente 1.0
+        """
+        # Given
+        cuenta_float = Cuenta("1", "Juan Pérez")
+        cuenta_centavos = CuentaCentavos("2", "Juan Pérez")
+
+        # When
+        for _ in range(10):
+            cuenta_float.depositar(0.1)
+            cuenta_centavos.depositar(0.1)
+
+        # Then
+        assert cuenta_float.obtener_saldo() != 1.0
+        assert cuenta_centavos.obtener_saldo() == 1.0
+        assert cuenta_centavos.saldo == 1.0
+        assert cuenta_centavos._saldo == 100
+
+    def test_historial_en_unidades_de_moneda(self):
+        """
+        GIVEN: Una cuenta en céntimos con saldo inicial
+        WHEN: Se deposita y se retira
+        THEN: El historial muestra cantidades y saldos exactos en moneda
+        """
+        # Given
+        cuenta = CuentaCentavos("1", "Juan Pérez", 0.3)
+
+        # When
+        cuenta.depositar(0.1)
+        cuenta.retirar(0.2)
+
+        # Then
+        historial = cuenta.obtener_historial()
+        assert [(t["tipo"], t["cantidad"], t["saldo_anterior"], t["saldo_nuevo"]) for t in historial] == [
+            ("DEPOSITO", 0.1, 0.3, 0.4),
+            ("RETIRO", 0.2, 0.4, 0.2),
+        ]
+
+    def test_fracciones_de_centimo_deben_fallar(self):
+        """
+        GIVEN: Una cuenta en céntimos
+        WHEN: Se opera con una cantidad con fracciones de céntimo
+        THEN: Se lanza ValueError y el saldo no cambia
+        """
+        # Given
+        cuenta = CuentaCentavos("1", "Juan Pérez", 10.0)
+
+        # When/Then
+        with pytest.raises(ValueError):
+            cuenta.depositar(0.001)
+        with pytest.raises(ValueError):
+            cuenta.retirar(1.005)
+        with pytest.raises(ValueError):
+            CuentaCentavos("2", "Ana López", 0.125)
+        assert cuenta.obtener_saldo() == 10.0
+        assert cuenta.historial_transacciones == []
+
+    def test_retiro_mayor_al_saldo_debe_fallar(self):
+        """
+        GIVEN: Una cuenta en céntimos con 0.3
+        WHEN: Se retira 0.31
+        THEN: Se lanza SaldoInsuficienteError
+        """
+        cuenta = CuentaCentavos("1", "Juan Pérez", 0.3)
+
+        with pytest.raises(SaldoInsuficienteError):
+            cuenta.retirar(0.31)
+
+
+class TestBancoCentavos:
+    """Tests del banco en modo céntimos"""
+
+    def test_total_no_depende_del_orden_de_las_operaciones(self):
+        """
+        GIVEN: Las mismas operaciones con decimales en dos órdenes distintos
+        WHEN: Se aplican en dos bancos en modo céntimos
+        THEN: Saldos y total depositado son idénticos
+        """
+        # Given
+        generador = random.Random(11)
+        operaciones = [(str(generador.randrange(20)), round(generador.uniform(0.01, 99.99), 2))
+                       for _ in range(2000)]
+        bancos = [Banco("Banco Nacional", centavos=True, verificar_total=True) for _ in range(2)]
+        for banco in bancos:
+            for i in range(20):
+                banco.crear_cuenta(str(i), f"Titular {i}", 0.1)
+
+        # When
+        for numero, cantidad in operaciones:
+            bancos[0].depositar(numero, cantidad)
+        for numero, cantidad in reversed(operaciones):
+            bancos[1].depositar(numero, cantidad)
+
+        # Then
+        assert bancos[0].obtener_total_depositado() == bancos[1].obtener_total_depositado()
+        assert all(bancos[0].obtener_cuenta(str(i)).obtener_saldo() == bancos[1].obtener_cuenta(str(i)).obtener_saldo()
+                   for i in range(20))
+        esperado = sum(round(cantidad * 100) for _, cantidad in operaciones) + 20 * 10
+        assert bancos[0].obtener_total_depositado() == esperado / 100
+
+    def test_transferencia_con_fraccion_de_centimo_debe_fallar(self):
+        """
+        GIVEN: Un banco en modo céntimos con dos cuentas
+        WHEN: Se transfiere una cantidad con fracciones de céntimo
+        THEN: Se lanza ValueError y los saldos no cambian
+        """
+        # Given
+        banco = Banco("Banco Nacional", centavos=True)
+        banco.crear_cuenta("1", "Juan Pérez", 10.0)
+        banco.crear_cuenta("2", "Ana López", 0.0)
+
+        # When/Then
+        with pytest.raises(ValueError):
+            banco.transferir("1", "2", 0.015)
+        assert banco.obtener_cuenta("1").obtener_saldo() == 10.0
+        assert banco.obtener_total_depositado() == 10.0
+
+    def test_lote_coincide_con_transferir_fila_a_fila(self, modo_lote):
+        """
+        GIVEN: Dos bancos en modo céntimos con los mismos saldos
+        WHEN: Se aplica un lote en uno y las mismas transferencias una a una en el otro
+        THEN: Estados, saldos, historiales y total coinciden
+        """
+        # Given
+        generador = random.Random(5)
+        bancos = [Banco("Banco Nacional", centavos=True) for _ in range(2)]
+        for banco in bancos:
+            for i in range(30):
+                banco.crear_cuenta(str(i), f"Titular {i}", i * 0.37)
+        filas = [(str(generador.randrange(30)), str(generador.randrange(30)),
+                  round(generador.uniform(0.01, 8), 2)) for _ in range(1500)]
+        filas[3] = ("0", "1", 0.001)
+
+        # When
+        estados = bancos[0].transferir_lote(*zip(*filas))
+        esperados = []
+        for origen, destino, cantidad in filas:
+            try:
+                bancos[1].transferir(origen, destino, cantidad)
+                esperados.append(LOTE_OK)
+            except SaldoInsuficienteError:
+                esperados.append(LOTE_SALDO_INSUFICIENTE)
+            except ValueError:
+                esperados.append(LOTE_CANTIDAD_INVALIDA)
+
+        # Then
+        assert list(estados) == esperados
+        assert estados[3] == LOTE_CANTIDAD_INVALIDA
+        assert _saldos_e_historiales(bancos[0]) == _saldos_e_historiales(bancos[1])
+        assert bancos[0].obtener_total_depositado() == bancos[1].obtener_total_depositado()
+
+    def test_recuperacion_desde_wal_y_snapshot(self, tmp_path):
+        """
+        GIVEN: Un banco en modo céntimos con WAL y operaciones
+        WHEN: Se recupera desde el WAL y se guarda y carga una instantánea
+        THEN: Ambos reproducen el estado exacto del banco
+        """
+        # Given
+        ruta_wal = str(tmp_path / "banco.wal")
+        ruta_snapshot = str(tmp_path / "banco.snap")
+        banco = Banco("Banco Nacional", centavos=True,
+                      wal=RegistroWAL(ruta_wal, sincronizacion=SINCRONIZAR_NUNCA))
+        banco.crear_cuenta("1", "Juan Pérez", 100.1)
+        banco.crear_cuenta("2", "Ana López", 0.2)
+        banco.transferir("1", "2", 0.1)
+        banco.retirar("2", 0.05)
+        banco.transferir_lote(["1", "2"], ["2", "1"], [1.01, 0.25])
+        banco.wal.cerrar()
+
+        # When
+        recuperado = Banco.recuperar("Banco Nacional", RegistroWAL(ruta_wal), centavos=True)
+        banco.guardar_snapshot(ruta_snapshot)
+        cargado = Banco.cargar_snapshot("Banco Nacional", ruta_snapshot)
+
+        # Then
+        assert _estado(recuperado) == _estado(banco)
+        assert cargado.centavos
+        assert _estado(cargado) == _estado(banco)
+        assert isinstance(cargado.obtener_cuenta("1"), CuentaCentavos)
+        recuperado.wal.cerrar()
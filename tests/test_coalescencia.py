@@ -0,0 +1,169 @@
+"""
+Tests de coalescencia de validaciones concurrentes
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.banco import Banco, ServicioExternoError
+from src.coalescencia import GrupoVuelos, GrupoVuelosAsync
+
+
+def _validar_desde_hilos(banco, numero_cuenta, num_hilos):
+    """Lanza num_hilos validaciones simultáneas y devuelve resultados o errores"""
+    barrera = threading.Barrier(num_hilos)
+    resultados = [None] * num_hilos
+
+    def trabajador(indice):
+        barrera.wait()
+        try:
+            resultados[indice] = banco.validar_cuenta_con_servicio_externo(numero_cuenta)
+        except ServicioExternoError as error:
+            resultados[indice] = error
+
+    hilos = [threading.Thread(target=trabajador, args=(i,)) for i in range(num_hilos)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+
+class TestCoalescencia:
+    """Tests de una sola consulta por cuenta en vuelo"""
+
+    def test_hilos_concurrentes_comparten_una_consulta(self):
+        """
+        GIVEN: Diez hilos que validan la misma cuenta a la vez
+        WHEN: Se ejecutan las validaciones
+        THEN: El servicio externo recibe una sola consulta
+        """
+        # Given
+        banco = Banco("Banco Nacional")
+        banco.crear_cuenta("123456", "Juan Pérez", 100.0)
+
+        # When
+        with patch('src.banco.random.random', return_value=0.5) as servicio:
+            resultados = _validar_desde_hilos(banco, "123456", 10)
+
+        # Then
+        assert resultados == [True] * 10
+        assert servicio.call_count == 1
+        assert banco.vuelos_validacion.compartidas == 9
+
+    def test_hilos_concurrentes_comparten_el_error(self):
+        """
+        GIVEN: Un servicio externo que falla
+        WHEN: Varios hilos validan la misma cuenta a la vez
+        THEN: Todos reciben ServicioExternoError de una sola consulta
+        """
+        banco = Banco("Banco Nacional")
+        banco.crear_cuenta("123456", "Juan Pérez", 100.0)
+
+        with patch('src.banco.random.random', return_value=0.05) as servicio:
+            resultados = _validar_desde_hilos(banco, "123456", 5)
+
+        assert all(isinstance(resultado, ServicioExternoError) for resultado in resultados)
+        assert servicio.call_count == 1
+        assert banco.vuelos_validacion.en_curso() == 0
+
+    def test_corrutinas_concurrentes_comparten_una_consulta(self):
+        """
+        GIVEN: Muchas corrutinas que validan la misma cuenta
+        WHEN: Se esperan juntas
+        THEN: El servicio externo recibe una consulta por cuenta distinta
+        """
+        banco = Banco("Banco Nacional")
+        banco.crear_cuenta("123456", "Juan Pérez", 100.0)
+
+        async def validar_todas():
+            return await asyncio.gather(
+                *(banco.avalidar_cuenta(numero) for numero in ["123456"] * 20 + ["999"] * 5))
+
+        with patch('src.banco.random.random', return_value=0.5) as servicio:
+            resultados = asyncio.run(validar_todas())
+
+        assert resultados == [True] * 20 + [False] * 5
+        assert servicio.call_count == 2
+        assert banco.vuelos_validacion_async.compartidas == 23
+
+    def test_llamadas_sucesivas_no_se_agrupan(self):
+        """
+        GIVEN: Un grupo de vuelos
+        WHEN: Se hacen dos llamadas seguidas con la misma clave
+        THEN: Se ejecutan las dos
+        """
+        grupo = GrupoVuelos()
+        llamadas = []
+
+        grupo.ejecutar("a", llamadas.append, 1)
+        grupo.ejecutar("a", llamadas.append, 2)
+
+        assert llamadas == [1, 2]
+        assert grupo.compartidas == 0
+
+    def test_cancelar_al_lider_no_cancela_a_los_demas(self):
+        """
+        GIVEN: Una llamada asíncrona en curso iniciada con un wait_for y otra que la comparte
+        WHEN: Vence el wait_for de la primera
+        THEN: La segunda recibe el resultado de la misma y única consulta
+        """
+        # Given
+        llamadas = []
+
+        async def escenario():
+            liberar = asyncio.Event()
+            grupo = GrupoVuelosAsync()
+
+            async def consultar(numero):
+                llamadas.append(numero)
+                await liberar.wait()
+                return numero * 2
+
+            lider = asyncio.create_task(asyncio.wait_for(grupo.ejecutar("a", consultar, 21), 0.01))
+            await asyncio.sleep(0)
+            seguidor = asyncio.create_task(grupo.ejecutar("a", consultar, 21))
+
+            # When
+            with pytest.raises(asyncio.TimeoutError):
+                await lider
+            liberar.set()
+            return await seguidor, grupo.en_curso()
+
+        resultado, en_curso = asyncio.run(escenario())
+
+        # Then
+        assert resultado == 42
+        assert llamadas == [21]
+        assert en_curso == 0
+
+    def test_la_consulta_se_cancela_si_nadie_la_espera(self):
+        """
+        GIVEN: Una llamada asíncrona en curso esperada por dos corrutinas
+        WHEN: Se cancelan las dos
+        THEN: Se cancela también la consulta compartida
+        """
+        async def escenario():
+            grupo = GrupoVuelosAsync()
+            cancelada = asyncio.Event()
+
+            async def consultar():
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelada.set()
+                    raise
+
+            esperas = [asyncio.create_task(grupo.ejecutar("a", consultar)) for _ in range(2)]
+            await asyncio.sleep(0)
+            for espera in esperas:
+                espera.cancel()
+            await asyncio.gather(*esperas, return_exceptions=True)
+            await asyncio.wait_for(cancelada.wait(), 1)
+            await asyncio.sleep(0)
+            return grupo.en_curso()
+
+        assert asyncio.run(escenario()) == 0
@@ -0,0 +1,158 @@
+"""
+Tests de uso concurrente del banco
+"""
+
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.banco import Banco
+from src.cuenta import SaldoInsuficienteError
+
+
+@pytest.fixture
+def cambio_de_hilo_frecuente():
+    """Fuerza cambios de hilo muy frecuentes para provocar carreras"""
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(intervalo)
+
+
+class TestConcurrencia:
+    """Tests de transferencias desde varios hilos"""
+
+    def test_transferencias_concurrentes_sin_actualizaciones_perdidas(self, cambio_de_hilo_frecuente):
+        """
+        GIVEN: Un banco con pocas cuentas compartidas por varios hilos
+        WHEN: Los hilos hacen transferencias cruzadas a la vez
+        THEN: El dinero se conserva y el contador refleja cada transferencia
+        """
+        # Given
+        banco = Banco("Banco Nacional", num_franjas=4)
+        for i in range(6):
+            banco.crear_cuenta(str(i), f"Titular {i}", 1000.0)
+        exitosas = []
+
+        def trabajador(semilla):
+            generador = random.Random(semilla)
+            realizadas = 0
+            for _ in range(2000):
+                origen, destino = generador.sample(range(6), 2)
+                try:
+                    banco.transferir(str(origen), str(destino), float(generador.randint(1, 50)))
+                    realizadas += 1
+                except SaldoInsuficienteError:
+                    pass
+            exitosas.append(realizadas)
+
+        # When
+        hilos = [threading.Thread(target=trabajador, args=(semilla,)) for semilla in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(timeout=30)
+
+        # Then
+        assert not any(hilo.is_alive() for hilo in hilos)
+        assert banco.obtener_total_depositado() == 6000.0
+        assert banco.contador_transacciones == sum(exitosas)
+        assert all(cuenta.obtener_saldo() >= 0 for cuenta in banco.cuentas.values())
+        assert sum(len(cuenta.obtener_historial()) for cuenta in banco.cuentas.values()) == 2 * sum(exitosas)
+
+    def test_depositos_concurrentes_en_la_misma_cuenta(self, cambio_de_hilo_frecuente):
+        """
+        GIVEN: Una cuenta compartida por varios hilos
+        WHEN: Todos depositan a la vez a través del banco
+        THEN: No se pierde ningún depósito
+        """
+        # Given
+        banco = Banco("Banco Nacional")
+        banco.crear_cuenta("123456", "Juan Pérez", 0.0)
+
+        # When
+        with ThreadPoolExecutor(max_workers=8) as ejecutor:
+            list(ejecutor.map(lambda _: banco.depositar("123456", 1.0), range(5000)))
+
+        # Then
+        assert banco.obtener_cuenta("123456").obtener_saldo() == 5000.0
+        assert banco.obtener_total_depositado() == 5000.0
+
+    def test_creacion_concurrente_de_la_misma_cuenta(self):
+        """
+        GIVEN: Varios hilos que intentan crear la misma cuenta
+        WHEN: Compiten por crearla
+        THEN: Solo uno lo consigue
+        """
+        # Given
+        banco = Banco("Banco Nacional")
+
+        def crear(_):
+            try:
+                banco.crear_cuenta("123456", "Juan Pérez", 100.0)
+                return True
+            except ValueError:
+                return False
+
+        # When
+        with ThreadPoolExecutor(max_workers=8) as ejecutor:
+            resultados = list(ejecutor.map(crear, range(64)))
+
+        # Then
+        assert resultados.count(True) == 1
+        assert banco.obtener_total_depositado() == 100.0
+
+    def test_movimientos_directos_en_cuentas_mezclados_con_transferencias(self, cambio_de_hilo_frecuente):
+        """
+        GIVEN: Un banco de una sola franja sin WAL
+        WHEN: Unos hilos depositan y retiran directamente en las cuentas mientras otros transfieren
+        THEN: El total del banco coincide con la suma de los saldos y con los movimientos hechos
+        """
+        # Given
+        banco = Banco("Banco Nacional", num_franjas=1)
+        for i in range(4):
+            banco.crear_cuenta(str(i), f"Titular {i}", 1000.0)
+        cuentas = [banco.obtener_cuenta(str(i)) for i in range(4)]
+        netos = []
+
+        def directo(semilla):
+            generador = random.Random(semilla)
+            neto = 0.0
+            for _ in range(2000):
+                cuenta = generador.choice(cuentas)
+                cantidad = float(generador.randint(1, 20))
+                if generador.random() < 0.5:
+                    cuenta.depositar(cantidad)
+                    neto += cantidad
+                else:
+                    try:
+                        cuenta.retirar(cantidad)
+                        neto -= cantidad
+                    except SaldoInsuficienteError:
+                        pass
+            netos.append(neto)
+
+        def transferencias(semilla):
+            generador = random.Random(semilla)
+            for _ in range(2000):
+                origen, destino = generador.sample(range(4), 2)
+                try:
+                    banco.transferir(str(origen), str(destino), float(generador.randint(1, 50)))
+                except SaldoInsuficienteError:
+                    pass
+
+        # When
+        hilos = [threading.Thread(target=directo, args=(semilla,)) for semilla in range(2)]
+        hilos += [threading.Thread(target=transferencias, args=(semilla,)) for semilla in range(2, 4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(timeout=30)
+
+        # Then
+        assert not any(hilo.is_alive() for hilo in hilos)
+        saldos = sum(cuenta.obtener_saldo() for cuenta in cuentas)
+        assert banco.obtener_total_depositado() == saldos == 4000.0 + sum(netos)
@@ -0,0 +1,165 @@
+"""
+Tests del cortacircuitos del servicio externo
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.banco import Banco, CircuitoAbiertoError, ServicioExternoError
+from src.circuito import ABIERTO, CERRADO, SEMIABIERTO, Cortacircuitos
+
+
+@pytest.fixture
+def banco_con_circuito(reloj_falso):
+    circuito = Cortacircuitos(umbral_fallos=3, tiempo_apertura=10.0, reintentos=1, reloj=reloj_falso)
+    banco = Banco("Banco Nacional", cortacircuitos=circuito)
+    banco.crear_cuenta("123456", "Juan Pérez", 100.0)
+    return banco
+
+
+class TestCortacircuitos:
+    """Tests de estados, reintentos y rechazo inmediato"""
+
+    def test_reintenta_con_espera_y_se_recupera(self, banco_con_circuito):
+        """
+        GIVEN: Un servicio que falla una vez y luego responde
+        WHEN: Se valida una cuenta
+        THEN: Se reintenta tras una espera acotada y se obtiene el resultado
+        """
+        with patch('src.banco.random.random', side_effect=[0.05, 0.5]), \
+                patch('src.banco.time.sleep') as dormir:
+            resultado = banco_con_circuito.validar_cuenta_con_servicio_externo("123456")
+
+        assert resultado is True
+        esperas = [llamada.args[0] for llamada in dormir.call_args_list]
+        assert len(esperas) == 3  # latencia, espera de reintento, latencia
+        assert 0 <= esperas[1] <= banco_con_circuito.cortacircuitos.espera_base
+        assert banco_con_circuito.cortacircuitos.estado == CERRADO
+
+    def test_abre_tras_el_umbral_y_falla_sin_esperar(self, banco_con_circuito):
+        """
+        GIVEN: Un servicio caído
+        WHEN: Se superan los fallos permitidos
+        THEN: El circuito se abre y las llamadas fallan sin consultar el servicio
+        """
+        # Given
+        circuito = banco_con_circuito.cortacircuitos
+        transiciones = []
+        circuito.suscribir(lambda anterior, nuevo: transiciones.append((anterior, nuevo)))
+
+        with patch('src.banco.random.random', return_value=0.05), \
+                patch('src.banco.time.sleep') as dormir:
+            # When
+            with pytest.raises(ServicioExternoError):
+                banco_con_circuito.validar_cuenta_con_servicio_externo("123456")
+            with pytest.raises(CircuitoAbiertoError):
+                banco_con_circuito.validar_cuenta_con_servicio_externo("123456")
+            llamadas_antes = dormir.call_count
+            with pytest.raises(CircuitoAbiertoError):
+                banco_con_circuito.validar_cuenta_con_servicio_externo("123456")
+
+        # Then
+        assert dormir.call_count == llamadas_antes
+        assert circuito.estado == ABIERTO
+        assert transiciones == [(CERRADO, ABIERTO)]
+        assert circuito.rechazos >= 1
+
+    def test_semiabierto_cierra_con_prueba_exitosa(self, banco_con_circuito, reloj_falso):
+        """
+        GIVEN: Un circuito abierto
+        WHEN: Pasa el tiempo de apertura y la prueba tiene éxito
+        THEN: El circuito vuelve a cerrarse
+        """
+        # Given
+        circuito = banco_con_circuito.cortacircuitos
+        for _ in range(3):
+            circuito.registrar_fallo()
+        assert circuito.estado == ABIERTO
+
+        # When
+        reloj_falso.ahora = 10.0
+        assert circuito.estado == SEMIABIERTO
+        with patch('src.banco.random.random', return_value=0.5), patch('src.banco.time.sleep'):
+            resultado = banco_con_circuito.validar_cuenta_con_servicio_externo("123456")
+
+        # Then
+        assert resultado is True
+        assert circuito.estado == CERRADO
+
+    def test_semiabierto_vuelve_a_abrir_si_la_prueba_falla(self, reloj_falso):
+        """
+        GIVEN: Un circuito semiabierto
+        WHEN: La llamada de prueba falla
+        THEN: El circuito se abre otra vez y rechaza más pruebas
+        """
+        circuito = Cortacircuitos(umbral_fallos=1, tiempo_apertura=5.0, reloj=reloj_falso)
+        circuito.registrar_fallo()
+        reloj_falso.ahora = 5.0
+
+        assert circuito.permitir() is True
+        assert circuito.permitir() is False
+        circuito.registrar_fallo()
+
+        assert circuito.estado == ABIERTO
+        assert circuito.aperturas == 2
+
+    def test_suscriptor_puede_consultar_el_estado(self, reloj_falso):
+        """
+        GIVEN: Un suscriptor que lee el estado del cortacircuitos en cada cambio
+        WHEN: Un fallo abre el circuito y, vencida la apertura, se consulta el estado
+        THEN: No se bloquea y el suscriptor ve el estado nuevo
+        """
+        # Given
+        circuito = Cortacircuitos(umbral_fallos=1, tiempo_apertura=5.0, reloj=reloj_falso)
+        vistos = []
+        circuito.suscribir(lambda anterior, nuevo: vistos.append((nuevo, circuito.estado)))
+
+        def operar():
+            circuito.registrar_fallo()
+            reloj_falso.ahora = 5.0
+            circuito.permitir()
+
+        # When
+        hilo = threading.Thread(target=operar, daemon=True)
+        hilo.start()
+        hilo.join(timeout=5)
+
+        # Then
+        assert not hilo.is_alive()
+        assert vistos == [(ABIERTO, ABIERTO), (SEMIABIERTO, SEMIABIERTO)]
+
+    def test_validacion_asincrona_respeta_el_circuito(self, banco_con_circuito):
+        """
+        GIVEN: Un circuito abierto
+        WHEN: Se valida de forma asíncrona
+        THEN: Falla al instante con CircuitoAbiertoError
+        """
+        for _ in range(3):
+            banco_con_circuito.cortacircuitos.registrar_fallo()
+
+        with pytest.raises(CircuitoAbiertoError):
+            asyncio.run(banco_con_circuito.avalidar_cuenta("123456"))
+
+    def test_prueba_cancelada_libera_su_hueco(self, banco_con_circuito, reloj_falso):
+        """
+        GIVEN: Un circuito semiabierto
+        WHEN: La validación asíncrona de prueba se cancela por un timeout
+        THEN: El hueco de prueba se libera y la siguiente llamada puede probar
+        """
+        # Given
+        circuito = banco_con_circuito.cortacircuitos
+        for _ in range(3):
+            circuito.registrar_fallo()
+        reloj_falso.ahora = 10.0
+
+        # When
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(banco_con_circuito.avalidar_cuenta("123456"), 0.01))
+
+        # Then
+        assert circuito.estado == SEMIABIERTO
+        assert circuito._pruebas_en_curso == 0
+        assert circuito.permitir() is True
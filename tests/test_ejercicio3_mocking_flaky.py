@@ -46,23 +46,21 @@ class TestMockingBasico:
             with pytest.raises(ServicioExternoError):
                 banco.validar_cuenta_con_servicio_externo("123456")
     
-    def test_stub_datetime_para_comportamiento_determinista(self):
+    def test_reloj_manual_para_comportamiento_determinista(self):
         """
-        GIVEN: Una cuenta que usa datetime.now()
-        WHEN: Se stubea datetime para tener un comportamiento determinístico
+        GIVEN: Una cuenta que toma la hora de un reloj inyectable
+        WHEN: Se le inyecta un reloj manual para tener un comportamiento determinístico
         THEN: Las fechas deben ser predecibles
         """
         from datetime import datetime
+        from src.reloj import RelojManual
         
         # Given
         fecha_fija = datetime(2023, 12, 25, 10, 30, 0)
         
-        # When - Stubear datetime.now()
-        with patch('src.cuenta.datetime') as mock_datetime:
-            mock_datetime.now.return_value = fecha_fija
-            
-            cuenta = Cuenta("123456", "Juan Pérez", 1000.0)
-            cuenta.depositar(100.0)
+        # When - Inyectar un reloj parado en la fecha fija
+        cuenta = Cuenta("123456", "Juan Pérez", 1000.0, reloj=RelojManual(fecha_fija))
+        cuenta.depositar(100.0)
         
         # Then
         assert cuenta.fecha_creacion == fecha_fija
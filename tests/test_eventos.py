@@ -0,0 +1,209 @@
+"""
+Tests del bus de eventos de transacciones
+"""
+
+import threading
+
+import pytest
+
+from src import banco as modulo_banco
+from src.banco import Banco
+from src.cuenta import Cuenta
+from src.eventos import (DEPOSITO, DESCARTAR_NUEVOS, RETIRO, TRANSFERENCIA, BusEventos)
+from src.wal import RegistroWAL
+
+
+def _resumen(eventos):
+    return [(e.tipo, e.numero_cuenta, e.cantidad, e.saldo, e.contraparte) for e in eventos]
+
+
+def _banco_con_bus(**opciones):
+    bus = BusEventos()
+    banco = Banco("Banco Nacional", eventos=bus, **opciones)
+    for numero in ("1", "2", "3"):
+        banco.crear_cuenta(numero, f"Titular {numero}", 100.0)
+    return bus, banco
+
+
+class TestBusEventos:
+    """Tests de los suscriptores síncronos"""
+
+    @pytest.mark.parametrize("centavos", [False, True])
+    def test_movimientos_y_transferencias_en_orden(self, centavos):
+        """
+        GIVEN: Un banco con bus y un suscriptor síncrono
+        WHEN: Se deposita, se retira y se transfiere
+        THEN: Llega cada movimiento con su saldo, en unidades de moneda, y la transferencia
+        """
+        # Given
+        bus, banco = _banco_con_bus(centavos=centavos)
+        recibidos = []
+        bus.suscribir(recibidos.append)
+
+        # When
+        banco.depositar("1", 10.25)
+        banco.retirar("2", 0.25)
+        banco.transferir("1", "3", 50.0)
+
+        # Then
+        assert _resumen(recibidos) == [
+            (DEPOSITO, "1", 10.25, 110.25, None),
+            (RETIRO, "2", 0.25, 99.75, None),
+            (RETIRO, "1", 50.0, 60.25, None),
+            (DEPOSITO, "3", 50.0, 150.0, None),
+            (TRANSFERENCIA, "1", 50.0, None, "3"),
+        ]
+        assert all(type(e.cantidad) is float for e in recibidos)
+
+    def test_filtro_por_tipo_y_cancelacion(self):
+        """
+        GIVEN: Un suscriptor solo de transferencias
+        WHEN: Se hacen dos transferencias cancelando la suscripción entre ambas
+        THEN: Solo recibe la primera transferencia
+        """
+        bus, banco = _banco_con_bus()
+        recibidos = []
+        suscripcion = bus.suscribir(recibidos.append, tipos=[TRANSFERENCIA])
+
+        banco.transferir("1", "2", 5.0)
+        suscripcion.cancelar()
+        banco.transferir("1", "2", 5.0)
+
+        assert _resumen(recibidos) == [(TRANSFERENCIA, "1", 5.0, None, "2")]
+
+    def test_error_del_suscriptor_no_interrumpe_la_operacion(self):
+        """
+        GIVEN: Un suscriptor que falla con cada evento
+        WHEN: Se transfiere
+        THEN: La transferencia se completa y los errores quedan contados
+        """
+        bus, banco = _banco_con_bus()
+
+        def fallar(evento):
+            raise RuntimeError("auditoría caída")
+
+        suscripcion = bus.suscribir(fallar)
+        banco.transferir("1", "2", 30.0)
+
+        assert banco.obtener_cuenta("2").obtener_saldo() == 130.0
+        assert banco.obtener_total_depositado() == 300.0
+        assert suscripcion.errores == 3
+        assert isinstance(suscripcion.ultimo_error, RuntimeError)
+
+    @pytest.mark.parametrize("con_numpy", [True, False])
+    def test_lote_publica_lo_mismo_que_transferir(self, monkeypatch, con_numpy):
+        """
+        GIVEN: Dos bancos iguales con bus, uno que transfiere fila a fila y otro en lote
+        WHEN: Se aplica el mismo lote, con filas inválidas
+        THEN: Ambos publican los mismos eventos en el mismo orden
+        """
+        # Given
+        if not con_numpy:
+            monkeypatch.setattr(modulo_banco, "np", None)
+        filas = [("1", "2", 30.0), ("2", "3", 500.0), ("3", "1", 0.1), ("9", "1", 1.0), ("2", "2", 0.2)]
+        bus_uno, uno = _banco_con_bus()
+        bus_lote, lote = _banco_con_bus()
+        eventos_uno, eventos_lote = [], []
+        bus_uno.suscribir(eventos_uno.append)
+        bus_lote.suscribir(eventos_lote.append)
+
+        # When
+        for origen, destino, cantidad in filas:
+            try:
+                uno.transferir(origen, destino, cantidad)
+            except Exception:
+                pass
+        lote.transferir_lote(*zip(*filas))
+
+        # Then
+        assert len(eventos_lote) == 9
+        assert _resumen(eventos_lote) == _resumen(eventos_uno)
+
+    def test_recuperar_del_wal_no_vuelve_a_publicar(self, tmp_path):
+        """
+        GIVEN: Un banco con WAL y algunas operaciones
+        WHEN: Se recupera con un bus y se opera después
+        THEN: Solo se publican las operaciones posteriores a la recuperación
+        """
+        ruta = str(tmp_path / "banco.wal")
+        banco = Banco("Banco Nacional", wal=RegistroWAL(ruta))
+        banco.crear_cuenta("1", "Juan Pérez", 100.0)
+        banco.depositar("1", 5.0)
+        banco.wal.cerrar()
+        bus = BusEventos()
+        recibidos = []
+        bus.suscribir(recibidos.append)
+
+        recuperado = Banco.recuperar("Banco Nacional", RegistroWAL(ruta), eventos=bus)
+        recuperado.retirar("1", 1.0)
+
+        assert _resumen(recibidos) == [(RETIRO, "1", 1.0, 104.0, None)]
+
+    def test_cuenta_suelta_sin_bus_no_publica(self):
+        """
+        GIVEN: Una cuenta creada fuera de un banco
+        WHEN: Se deposita
+        THEN: No tiene bus propio y el historial funciona igual
+        """
+        cuenta = Cuenta("1", "Juan Pérez")
+        cuenta.depositar(10.0)
+
+        assert "_bus" not in vars(cuenta)
+        assert cuenta.obtener_saldo() == 10.0
+
+
+class TestSuscripcionLotes:
+    """Tests de los suscriptores asíncronos por lotes"""
+
+    def test_lotes_en_orden_sin_perder_eventos(self):
+        """
+        GIVEN: Un suscriptor por lotes con cola pequeña y política de bloqueo
+        WHEN: Se hacen 200 depósitos
+        THEN: Llegan los 200 en orden, agrupados en lotes de como mucho el tamaño indicado
+        """
+        # Given
+        bus, banco = _banco_con_bus()
+        lotes = []
+        suscripcion = bus.suscribir_lotes(lambda lote: lotes.append(list(lote)), capacidad=16, tamano_lote=8)
+
+        # When
+        for i in range(200):
+            banco.depositar("1", 1.0)
+        assert suscripcion.vaciar(espera_maxima=5)
+
+        # Then
+        saldos = [e.saldo for lote in lotes for e in lote]
+        assert saldos == [101.0 + i for i in range(200)]
+        assert max(len(lote) for lote in lotes) <= 8
+        assert suscripcion.entregados == 200 and suscripcion.descartados == 0
+        bus.cerrar()
+
+    def test_suscriptor_lento_no_bloquea_con_descarte(self):
+        """
+        GIVEN: Un suscriptor por lotes bloqueado y política de descartar nuevos con capacidad 10
+        WHEN: Se hacen 50 transferencias
+        THEN: Las transferencias terminan, se descartan las que no caben y al liberarlo llegan el resto
+        """
+        # Given
+        bus, banco = _banco_con_bus()
+        liberar = threading.Event()
+        recibidos = []
+
+        def lento(lote):
+            liberar.wait()
+            recibidos.extend(lote)
+
+        suscripcion = bus.suscribir_lotes(lento, tipos=[TRANSFERENCIA], capacidad=10,
+                                          politica=DESCARTAR_NUEVOS)
+
+        # When
+        for _ in range(50):
+            banco.transferir("1", "2", 1.0)
+        liberar.set()
+        bus.cerrar()
+
+        # Then
+        assert banco.obtener_cuenta("2").obtener_saldo() == 150.0
+        assert suscripcion.descartados > 0
+        assert len(recibidos) + suscripcion.descartados == 50
+        assert suscripcion.pendientes == 0
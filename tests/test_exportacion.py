@@ -0,0 +1,159 @@
+"""
+Tests de la exportación columnar del historial
+"""
+
+import random
+from datetime import datetime
+
+import pytest
+
+from src import exportacion
+from src.banco import Banco
+from src.exportacion import EscritorHistorial, HistorialInvalidoError, LectorHistorial
+from src.historial import fecha_a_ns
+from src.reloj import RelojManual
+from src.retencion import PoliticaRetencion
+
+
+def _banco_con_movimientos(**opciones):
+    generador = random.Random(2)
+    banco = Banco("Banco Nacional", **opciones)
+    for i in range(20):
+        banco.crear_cuenta(str(i), f"Titular {i}", 1000.0)
+    for _ in range(500):
+        origen, destino = (str(n) for n in generador.sample(range(20), 2))
+        banco.transferir(origen, destino, round(generador.uniform(0.01, 10), 2))
+    return banco
+
+
+def _filas_esperadas(banco):
+    """(cuenta, tipo, cantidad, fecha, saldo) de todo el historial, recorriendo los diccionarios"""
+    return [(numero, entrada["tipo"], entrada["cantidad"], fecha_a_ns(entrada["fecha"]), entrada["saldo_nuevo"])
+            for numero, cuenta in banco.cuentas.items() for entrada in cuenta.obtener_historial()]
+
+
+def _filas_leidas(lector, escala=1):
+    """Lo mismo a partir de las columnas leídas (la vista como diccionario tiene precisión de µs)"""
+    columnas = lector.leer()
+    tipos = ("DEPOSITO", "RETIRO")
+    return [(lector.cuentas[cuenta], tipos[tipo], cantidad / escala, fecha // 1000 * 1000, saldo / escala)
+            for cuenta, tipo, cantidad, fecha, saldo in zip(*(columnas[nombre].tolist()
+                                                              for nombre in exportacion.COLUMNAS))]
+
+
+class TestExportacion:
+    """Tests de EscritorHistorial, LectorHistorial y Banco.exportar_historial"""
+
+    @pytest.mark.parametrize("comprimir", [False, True])
+    def test_ida_y_vuelta(self, tmp_path, comprimir):
+        """
+        GIVEN: Un banco con cientos de transferencias
+        WHEN: Se exporta su historial en bloques pequeños y se lee
+        THEN: Las columnas reproducen cada entrada del historial
+        """
+        # Given
+        banco = _banco_con_movimientos()
+        ruta = str(tmp_path / "historial.bin")
+
+        # When
+        filas = banco.exportar_historial(ruta, comprimir=comprimir, tamano_bloque=128)
+
+        # Then
+        with LectorHistorial(ruta) as lector:
+            assert filas == lector.num_filas == 1000
+            assert lector.num_bloques == 8
+            assert lector.comprimido is comprimir
+            assert _filas_leidas(lector) == _filas_esperadas(banco)
+
+    def test_centimos_y_historial_archivado(self, tmp_path):
+        """
+        GIVEN: Un banco en modo céntimos con parte del historial archivada en disco
+        WHEN: Se exporta y se lee
+        THEN: Los importes son enteros de céntimos e incluyen lo archivado
+        """
+        # Given
+        politica = PoliticaRetencion(str(tmp_path / "archivo"), max_entradas=10, lote=5)
+        banco = _banco_con_movimientos(centavos=True, retencion=politica)
+        assert banco.obtener_cuenta("0").historial_transacciones.archivadas > 0
+        ruta = str(tmp_path / "historial.bin")
+
+        # When
+        banco.exportar_historial(ruta, comprimir=True)
+
+        # Then
+        with LectorHistorial(ruta) as lector:
+            assert lector.escala == 100
+            assert _filas_leidas(lector, escala=100) == _filas_esperadas(banco)
+
+    def test_bloques_leen_solo_las_columnas_pedidas(self, tmp_path):
+        """
+        GIVEN: Un historial exportado en varios bloques
+        WHEN: Se recorren los bloques pidiendo solo la columna de saldos
+        THEN: Cada bloque trae solo esa columna y juntos suman todas las filas
+        """
+        ruta = str(tmp_path / "historial.bin")
+        _banco_con_movimientos().exportar_historial(ruta, tamano_bloque=300)
+
+        with LectorHistorial(ruta) as lector:
+            bloques = list(lector.bloques(["saldo"]))
+
+        assert [list(bloque) for bloque in bloques] == [["saldo"]] * 4
+        assert sum(len(bloque["saldo"]) for bloque in bloques) == 1000
+
+    def test_sin_numpy_devuelve_arrays(self, tmp_path, monkeypatch):
+        """
+        GIVEN: Un historial exportado y NumPy no disponible
+        WHEN: Se leen las columnas
+        THEN: Son array.array con los mismos valores
+        """
+        ruta = str(tmp_path / "historial.bin")
+        banco = _banco_con_movimientos()
+        banco.exportar_historial(ruta)
+        monkeypatch.setattr(exportacion, "np", None)
+
+        with LectorHistorial(ruta) as lector:
+            assert lector.leer(["fecha"])["fecha"].typecode == "q"
+            assert _filas_leidas(lector) == _filas_esperadas(banco)
+
+    def test_archivo_incompleto_o_danado(self, tmp_path):
+        """
+        GIVEN: Una exportación interrumpida por un error y otra con un byte cambiado
+        WHEN: Se intentan leer
+        THEN: Se lanza HistorialInvalidoError
+        """
+        # Given
+        interrumpida = str(tmp_path / "interrumpida.bin")
+        with pytest.raises(RuntimeError):
+            with EscritorHistorial(interrumpida, tamano_bloque=2) as escritor:
+                escritor.agregar("1", *_banco_con_movimientos().obtener_cuenta("1").historial_transacciones.columnas())
+                raise RuntimeError("fallo a mitad")
+        danada = tmp_path / "danada.bin"
+        _banco_con_movimientos().exportar_historial(str(danada))
+        datos = bytearray(danada.read_bytes())
+        datos[100] ^= 0xFF
+        danada.write_bytes(bytes(datos))
+
+        # When/Then
+        with pytest.raises(HistorialInvalidoError):
+            LectorHistorial(interrumpida)
+        with LectorHistorial(str(danada)) as lector:
+            with pytest.raises(HistorialInvalidoError):
+                lector.leer()
+
+    def test_fechas_como_datetime64(self, tmp_path):
+        """
+        GIVEN: Un banco con un reloj manual
+        WHEN: Se exporta y se leen las fechas con NumPy
+        THEN: Se pueden ver como datetime64[ns] sin conversión por fila
+        """
+        np = pytest.importorskip("numpy")
+        banco = Banco("Banco Nacional", reloj=RelojManual(datetime(2024, 5, 1, 12, 30)))
+        banco.crear_cuenta("1", "Juan Pérez", 10.0)
+        banco.depositar("1", 5.0)
+        ruta = str(tmp_path / "historial.bin")
+        banco.exportar_historial(ruta)
+
+        with LectorHistorial(ruta) as lector:
+            fechas = lector.leer(["fecha"])["fecha"].view("datetime64[ns]")
+
+        assert fechas[0] == np.datetime64("2024-05-01T12:30")
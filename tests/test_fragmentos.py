@@ -0,0 +1,227 @@
+"""
+Tests del banco fragmentado en varios procesos
+"""
+
+import random
+import threading
+
+import pytest
+
+import src.fragmentos as modulo_fragmentos
+from src.banco import Banco, CuentaNoEncontradaError, LOTE_OK
+from src.cuenta import SaldoInsuficienteError
+from src.fragmentos import BancoFragmentado, indice_fragmento
+
+
+@pytest.fixture(scope="module")
+def fragmentado():
+    with BancoFragmentado("Banco Nacional", num_fragmentos=3) as banco:
+        yield banco
+
+
+def _crear_cuentas(banco, prefijo, n, saldo=100.0):
+    numeros = [f"{prefijo}-{i}" for i in range(n)]
+    for numero in numeros:
+        banco.crear_cuenta(numero, f"Titular {numero}", saldo)
+    return numeros
+
+
+def _par_entre_fragmentos(banco, numeros):
+    """Un origen y un destino de fragmentos distintos"""
+    for destino in numeros[1:]:
+        if banco.fragmento_de(destino) != banco.fragmento_de(numeros[0]):
+            return numeros[0], destino
+    raise AssertionError("Todas las cuentas caen en el mismo fragmento")
+
+
+class TestBancoFragmentado:
+    """Tests del reparto de cuentas y las operaciones entre fragmentos"""
+
+    def test_reparto_estable_por_crc32(self):
+        """
+        GIVEN: Muchos números de cuenta
+        WHEN: Se calcula su fragmento dos veces
+        THEN: Es siempre el mismo y se usan todos los fragmentos
+        """
+        numeros = [str(i) for i in range(1000)]
+
+        fragmentos = [indice_fragmento(numero, 4) for numero in numeros]
+
+        assert fragmentos == [indice_fragmento(numero, 4) for numero in numeros]
+        assert set(fragmentos) == {0, 1, 2, 3}
+
+    def test_transferencia_entre_fragmentos(self, fragmentado):
+        """
+        GIVEN: Dos cuentas en fragmentos distintos
+        WHEN: Se transfiere entre ellas
+        THEN: Ambas cambian y el total no varía
+        """
+        # Given
+        origen, destino = _par_entre_fragmentos(fragmentado, _crear_cuentas(fragmentado, "a", 6))
+        total = fragmentado.obtener_total_depositado()
+
+        # When
+        resultado = fragmentado.transferir(origen, destino, 30.0)
+
+        # Then
+        assert resultado is True
+        assert fragmentado.obtener_cuenta(origen).obtener_saldo() == 70.0
+        assert fragmentado.obtener_cuenta(destino).obtener_saldo() == 130.0
+        assert fragmentado.obtener_total_depositado() == total
+
+    def test_transferencia_fallida_no_deja_cambios(self, fragmentado):
+        """
+        GIVEN: Dos cuentas en fragmentos distintos
+        WHEN: Se transfiere más que el saldo o hacia una cuenta inexistente
+        THEN: Se lanza el error y ninguna cuenta cambia
+        """
+        # Given
+        origen, destino = _par_entre_fragmentos(fragmentado, _crear_cuentas(fragmentado, "b", 6))
+        inexistente = next(f"nadie-{i}" for i in range(100)
+                           if fragmentado.fragmento_de(f"nadie-{i}") != fragmentado.fragmento_de(origen))
+
+        # When/Then
+        with pytest.raises(SaldoInsuficienteError):
+            fragmentado.transferir(origen, destino, 1000.0)
+        with pytest.raises(CuentaNoEncontradaError):
+            fragmentado.transferir(origen, inexistente, 10.0)
+        assert fragmentado.obtener_cuenta(origen).obtener_saldo() == 100.0
+        assert fragmentado.obtener_cuenta(destino).obtener_saldo() == 100.0
+        assert fragmentado.obtener_cuenta(origen).historial_transacciones == []
+
+    def test_agregados_combinan_todos_los_fragmentos(self):
+        """
+        GIVEN: Un banco fragmentado y uno normal con las mismas operaciones
+        WHEN: Se consultan total, número de cuentas y contador
+        THEN: Coinciden exactamente
+        """
+        # Given
+        generador = random.Random(3)
+        with BancoFragmentado("Banco Nacional", num_fragmentos=4) as fragmentado:
+            normal = Banco("Banco Nacional")
+            saldos = [generador.uniform(0, 1000) for _ in range(60)]
+            for i, saldo in enumerate(saldos):
+                fragmentado.crear_cuenta(str(i), f"Titular {i}", saldo)
+                normal.crear_cuenta(str(i), f"Titular {i}", saldo)
+
+            # When
+            for _ in range(200):
+                origen, destino = (str(n) for n in generador.sample(range(60), 2))
+                cantidad = generador.uniform(0.01, 5)
+                if normal.obtener_cuenta(origen).obtener_saldo() >= cantidad:
+                    normal.transferir(origen, destino, cantidad)
+                    fragmentado.transferir(origen, destino, cantidad)
+
+            # Then
+            assert fragmentado.obtener_numero_cuentas() == 60
+            assert fragmentado.contador_transacciones == normal.contador_transacciones
+            assert fragmentado.obtener_total_depositado() == normal.obtener_total_depositado()
+
+    def test_lote_mezcla_filas_internas_y_entre_fragmentos(self, fragmentado):
+        """
+        GIVEN: Cuentas con saldo de sobra repartidas entre fragmentos
+        WHEN: Se transfiere un lote con importes enteros
+        THEN: Todas las filas se aplican y los saldos coinciden con un banco normal
+        """
+        # Given
+        generador = random.Random(9)
+        numeros = _crear_cuentas(fragmentado, "c", 40, saldo=10_000.0)
+        normal = Banco("Banco Nacional")
+        _crear_cuentas(normal, "c", 40, saldo=10_000.0)
+        filas = [(generador.choice(numeros), generador.choice(numeros), float(generador.randint(1, 50)))
+                 for _ in range(500)]
+
+        # When
+        estados = fragmentado.transferir_lote(*zip(*filas))
+        normal.transferir_lote(*zip(*filas))
+
+        # Then
+        assert estados == [LOTE_OK] * 500
+        assert [fragmentado.obtener_cuenta(n).obtener_saldo() for n in numeros] == \
+            [normal.obtener_cuenta(n).obtener_saldo() for n in numeros]
+
+    def test_lote_entre_fragmentos_con_saldo_justo_equivale_a_aplicarlo_en_orden(self, fragmentado):
+        """
+        GIVEN: Cuentas con poco saldo en distintos fragmentos
+        WHEN: Se transfiere un lote de filas entre fragmentos que dependen de ingresos de filas
+              anteriores, con cuentas inexistentes y cantidades no válidas
+        THEN: Estados y saldos son los de un banco normal que aplica las filas en orden
+        """
+        # Given
+        generador = random.Random(12)
+        numeros = _crear_cuentas(fragmentado, "f", 30, saldo=20.0)
+        normal = Banco("Banco Nacional")
+        _crear_cuentas(normal, "f", 30, saldo=20.0)
+        filas = []
+        while len(filas) < 400:
+            origen, destino = generador.choice(numeros), generador.choice(numeros + ["f-no-existe"])
+            if fragmentado.fragmento_de(origen) != fragmentado.fragmento_de(destino):
+                filas.append((origen, destino, float(generador.choice([-1, 5, 10, 15, 25]))))
+
+        # When
+        estados = fragmentado.transferir_lote(*zip(*filas))
+        esperados = normal.transferir_lote(*zip(*filas))
+
+        # Then
+        assert estados == list(esperados)
+        assert len(set(estados)) == 4
+        assert [fragmentado.obtener_cuenta(n).obtener_saldo() for n in numeros] == \
+            [normal.obtener_cuenta(n).obtener_saldo() for n in numeros]
+
+    def test_transferencias_concurrentes_conservan_el_total(self, fragmentado):
+        """
+        GIVEN: Varias cuentas repartidas entre fragmentos
+        WHEN: Varios hilos transfieren entre ellas a la vez en ambos sentidos
+        THEN: El total no cambia y ningún saldo queda negativo
+        """
+        # Given
+        numeros = _crear_cuentas(fragmentado, "d", 8, saldo=50.0)
+        total = fragmentado.obtener_total_depositado()
+
+        def trabajador(semilla):
+            generador = random.Random(semilla)
+            for _ in range(100):
+                origen, destino = generador.sample(numeros, 2)
+                try:
+                    fragmentado.transferir(origen, destino, 7.0)
+                except SaldoInsuficienteError:
+                    pass
+
+        # When
+        hilos = [threading.Thread(target=trabajador, args=(semilla,)) for semilla in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        # Then
+        assert fragmentado.obtener_total_depositado() == total
+        assert all(fragmentado.obtener_cuenta(n).obtener_saldo() >= 0 for n in numeros)
+
+    def test_error_al_confirmar_no_desincroniza_las_respuestas(self, monkeypatch):
+        """
+        GIVEN: Un banco fragmentado cuyo origen falla al confirmar un retiro
+        WHEN: Se transfiere entre fragmentos y después se consulta el destino
+        THEN: Se lanza el error y la consulta recibe su propia respuesta
+        """
+        # Given
+        confirmar = modulo_fragmentos._Fragmento.confirmar
+
+        def confirmar_con_fallo(fragmento, id_transaccion):
+            if fragmento.reservas[id_transaccion][0] == "retiro":
+                fragmento._liberar(id_transaccion)
+                raise RuntimeError("Fallo al confirmar")
+            confirmar(fragmento, id_transaccion)
+
+        monkeypatch.setattr(modulo_fragmentos._Fragmento, "confirmar", confirmar_con_fallo)
+        with BancoFragmentado("Banco Nacional", num_fragmentos=3, contexto="fork") as fragmentado:
+            origen, destino = _par_entre_fragmentos(fragmentado, _crear_cuentas(fragmentado, "e", 6))
+
+            # When
+            with pytest.raises(RuntimeError):
+                fragmentado.transferir(origen, destino, 10.0)
+            cuenta = fragmentado.obtener_cuenta(destino)
+
+            # Then
+            assert cuenta.numero_cuenta == destino
+            assert fragmentado.obtener_numero_cuentas() == 6
@@ -0,0 +1,248 @@
+"""
+Tests del historial columnar de transacciones
+"""
+
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from src.cuenta import Cuenta, CuentaCentavos
+from src.historial import HistorialTransacciones, VistaHistorial, fecha_a_ns, ns_a_fecha
+
+
+class TestHistorialColumnar:
+    """Tests del almacenamiento compacto del historial"""
+
+    def test_vista_diccionario_identica_al_formato_original(self):
+        """
+        GIVEN: Una cuenta con un depósito y un retiro
+        WHEN: Se obtiene el historial
+        THEN: Cada entrada tiene las mismas claves y valores que antes
+        """
+        # Given
+        cuenta = Cuenta("12345", "Juan Pérez", 100.0)
+
+        # When
+        cuenta.depositar(50.0)
+        cuenta.retirar(30.0)
+        historial = cuenta.obtener_historial()
+
+        # Then
+        assert isinstance(historial, list)
+        assert set(historial[0]) == {"tipo", "cantidad", "fecha", "saldo_anterior", "saldo_nuevo"}
+        assert historial[0]["saldo_anterior"] == 100.0
+        assert historial[0]["saldo_nuevo"] == 150.0
+        assert historial[1]["tipo"] == "RETIRO"
+        assert historial[1]["saldo_anterior"] == 150.0
+        assert historial[1]["saldo_nuevo"] == 120.0
+        assert isinstance(historial[1]["fecha"], datetime)
+
+    def test_fechas_se_conservan_con_precision_de_microsegundos(self):
+        """
+        GIVEN: Una fecha con microsegundos
+        WHEN: Se codifica y decodifica
+        THEN: Se recupera exactamente la misma fecha
+        """
+        fecha = datetime(2023, 12, 25, 10, 30, 0, 123456)
+
+        assert ns_a_fecha(fecha_a_ns(fecha)) == fecha
+
+    def test_memoria_por_entrada_un_orden_de_magnitud_menor(self):
+        """
+        GIVEN: El mismo historial como columnas y como lista de diccionarios
+        WHEN: Se compara la memoria por entrada
+        THEN: Las columnas ocupan al menos 10 veces menos
+        """
+        # Given
+        historial = HistorialTransacciones()
+        for i in range(1000):
+            historial.agregar("DEPOSITO", 1.0, datetime.now(), float(i))
+
+        # When
+        por_entrada_columnas = historial.memoria_bytes() / len(historial)
+        entrada = historial[0]
+        por_entrada_dict = (sys.getsizeof(entrada) + sys.getsizeof(entrada["fecha"])
+                            + 3 * sys.getsizeof(entrada["cantidad"]))
+
+        # Then
+        assert por_entrada_columnas * 10 <= por_entrada_dict
+
+    def test_historial_vacio_se_compara_con_lista_vacia(self):
+        """
+        GIVEN: Una cuenta recién creada
+        WHEN: Se compara su historial con una lista vacía
+        THEN: Son iguales
+        """
+        cuenta = Cuenta("12345", "Juan Pérez")
+
+        assert cuenta.historial_transacciones == []
+        assert len(cuenta.historial_transacciones) == 0
+
+
+def _cuenta_con_dias(clase=Cuenta, dias=100, por_dia=24):
+    """Cuenta con un depósito de 1.0 cada hora durante varios días"""
+    cuenta = clase("12345", "Juan Pérez", 10.0)
+    inicio = datetime(2024, 1, 1)
+    for i in range(dias * por_dia):
+        cuenta.depositar(1.0, inicio + timedelta(hours=i))
+    return cuenta, inicio
+
+
+class TestConsultasPorFecha:
+    """Tests de las consultas del historial por rango de fechas"""
+
+    def test_transacciones_de_un_dia(self):
+        """
+        GIVEN: Una cuenta con 100 días de movimientos horarios
+        WHEN: Se piden las transacciones de un día
+        THEN: Se obtienen solo las 24 de ese día sin construir las demás
+        """
+        # Given
+        cuenta, inicio = _cuenta_con_dias()
+        desde = inicio + timedelta(days=40)
+
+        # When
+        with patch.object(HistorialTransacciones, "_vista", autospec=True,
+                          side_effect=HistorialTransacciones._vista) as entrada:
+            transacciones = cuenta.obtener_historial_entre(desde, desde + timedelta(days=1))
+
+        # Then
+        assert len(transacciones) == 24
+        assert transacciones[0]["fecha"] == desde
+        assert transacciones[-1]["fecha"] == desde + timedelta(hours=23)
+        assert entrada.call_count == 24
+
+    def test_saldo_en_una_fecha(self):
+        """
+        GIVEN: Una cuenta con movimientos horarios desde un saldo de 10.0
+        WHEN: Se consulta el saldo en distintos momentos
+        THEN: Es el saldo tras la última transacción hasta ese momento
+        """
+        # Given
+        cuenta, inicio = _cuenta_con_dias(dias=2)
+
+        # When/Then
+        assert cuenta.saldo_en(inicio - timedelta(days=1)) == 10.0
+        assert cuenta.saldo_en(inicio) == 11.0
+        assert cuenta.saldo_en(inicio + timedelta(minutes=90)) == 12.0
+        assert cuenta.saldo_en(inicio + timedelta(days=30)) == cuenta.obtener_saldo() == 58.0
+
+    def test_saldo_en_cuenta_sin_historial_es_el_actual(self):
+        """
+        GIVEN: Una cuenta sin transacciones
+        WHEN: Se consulta el saldo en una fecha
+        THEN: Es el saldo actual
+        """
+        cuenta = Cuenta("12345", "Juan Pérez", 75.0)
+
+        assert cuenta.saldo_en(datetime(2000, 1, 1)) == 75.0
+
+    def test_consultas_en_modo_centimos(self):
+        """
+        GIVEN: Una cuenta en céntimos con movimientos horarios
+        WHEN: Se consultan saldo y transacciones por fecha
+        THEN: Los importes se devuelven en moneda
+        """
+        # Given
+        cuenta, inicio = _cuenta_con_dias(CuentaCentavos, dias=1)
+
+        # When
+        saldo = cuenta.saldo_en(inicio + timedelta(hours=2))
+        transacciones = cuenta.obtener_historial_entre(inicio, inicio + timedelta(hours=1))
+
+        # Then
+        assert saldo == 13.0
+        assert transacciones[0]["saldo_anterior"] == 10.0
+
+
+class TestVistaHistorial:
+    """Tests de la vista paginada del historial"""
+
+    def test_paginas_de_lo_mas_reciente_a_lo_mas_antiguo(self):
+        """
+        GIVEN: Una cuenta con 120 depósitos
+        WHEN: Se recorre el historial por páginas de 50
+        THEN: Se obtienen 50, 50 y 20 entradas en orden inverso y sin cursor final
+        """
+        # Given
+        cuenta = Cuenta("12345", "Juan Pérez")
+        for i in range(1, 121):
+            cuenta.depositar(float(i))
+
+        # When
+        paginas = []
+        cursor = None
+        while True:
+            entradas, cursor = cuenta.pagina_historial(cursor)
+            paginas.append(entradas)
+            if cursor is None:
+                break
+
+        # Then
+        assert [len(pagina) for pagina in paginas] == [50, 50, 20]
+        cantidades = [t["cantidad"] for pagina in paginas for t in pagina]
+        assert cantidades == [float(i) for i in range(120, 0, -1)]
+
+    def test_pagina_no_depende_de_la_longitud_del_historial(self):
+        """
+        GIVEN: Una cuenta con 10000 transacciones
+        WHEN: Se pide la página más reciente
+        THEN: Solo se construyen las entradas de esa página
+        """
+        # Given
+        cuenta, _ = _cuenta_con_dias(dias=1, por_dia=10000)
+
+        # When
+        with patch.object(HistorialTransacciones, "_vista", autospec=True,
+                          side_effect=HistorialTransacciones._vista) as entrada:
+            entradas, cursor = cuenta.pagina_historial(limite=50)
+
+        # Then
+        assert entrada.call_count == 50
+        assert cursor == 9950
+
+    def test_vista_no_permite_modificar_el_historial(self):
+        """
+        GIVEN: Una vista del historial de una cuenta
+        WHEN: Se intenta modificar la vista o una entrada leída
+        THEN: El historial de la cuenta no cambia
+        """
+        # Given
+        cuenta = Cuenta("12345", "Juan Pérez", 100.0)
+        cuenta.depositar(50.0)
+        vista = cuenta.vista_historial()
+
+        # When
+        vista[0]["cantidad"] = 1e9
+        with pytest.raises(TypeError):
+            vista[0] = {}
+        with pytest.raises(AttributeError):
+            vista.append({})
+
+        # Then
+        assert cuenta.obtener_historial()[0]["cantidad"] == 50.0
+
+    def test_cortes_devuelven_vistas_fijas(self):
+        """
+        GIVEN: Una vista del historial
+        WHEN: Se corta y después se añaden transacciones a la cuenta
+        THEN: El corte es otra vista con el tramo original
+        """
+        # Given
+        cuenta = Cuenta("12345", "Juan Pérez")
+        for i in range(1, 6):
+            cuenta.depositar(float(i))
+        vista = cuenta.vista_historial()
+
+        # When
+        ultimas = vista[-2:]
+        cuenta.depositar(6.0)
+
+        # Then
+        assert isinstance(ultimas, VistaHistorial)
+        assert [t["cantidad"] for t in ultimas] == [4.0, 5.0]
+        assert len(vista) == 5
+        assert vista == cuenta.obtener_historial()[:5]
+
@@ -0,0 +1,149 @@
+"""
+Tests de la importación masiva de cuentas
+"""
+
+import csv
+import gc
+from datetime import datetime
+
+from src.banco import Banco
+from src.reloj import RelojManual
+from src.wal import RegistroWAL
+
+
+class TestImportacion:
+    """Tests de crear_cuentas_lote e importar_cuentas_csv"""
+
+    def test_lote_por_bloques_equivale_a_crear_una_a_una(self):
+        """
+        GIVEN: Un generador de filas y un banco con reloj manual
+        WHEN: Se importan por bloques pequeños
+        THEN: Cuentas, total, índice por titular y fechas son los de crear_cuenta
+        """
+        # Given
+        reloj = RelojManual(datetime(2024, 3, 1))
+        filas = ((str(i), f"Titular {i % 7}", i * 0.1) for i in range(1000))
+        normal = Banco("Banco Nacional")
+        for i in range(1000):
+            normal.crear_cuenta(str(i), f"Titular {i % 7}", i * 0.1)
+        banco = Banco("Banco Nacional", reloj=reloj)
+
+        # When
+        errores = banco.crear_cuentas_lote(filas, tamano_bloque=64)
+
+        # Then
+        assert errores == []
+        assert banco.obtener_numero_cuentas() == 1000
+        assert banco.obtener_total_depositado() == normal.obtener_total_depositado()
+        assert banco.obtener_total_por_titular("Titular 3") == normal.obtener_total_por_titular("Titular 3")
+        assert len(banco.obtener_cuentas_por_titular("Titular 3")) == 143
+        assert banco.obtener_cuenta("999").fecha_creacion == datetime(2024, 3, 1)
+        banco.transferir("999", "0", 50.0)
+        assert banco.obtener_cuenta("0").obtener_saldo() == 50.0
+        assert gc.isenabled()
+
+    def test_pausa_del_recolector_solapada_y_opcional(self):
+        """
+        GIVEN: Una importación cuyas filas lanzan otra importación a mitad de camino
+        WHEN: Termina la importación interior, la exterior y una sin pausar el recolector
+        THEN: El recolector sigue en pausa hasta que acaba la exterior y la última no lo toca
+        """
+        # Given
+        banco = Banco("Banco Nacional")
+        estados = []
+
+        def filas_exteriores():
+            yield "1", "Juan Pérez", 100.0
+            estados.append(gc.isenabled())
+            banco.crear_cuentas_lote([("2", "Ana López", 50.0)])
+            estados.append(gc.isenabled())
+            yield "3", "Juan Pérez", 25.0
+
+        def filas_sin_pausa():
+            estados.append(gc.isenabled())
+            yield "4", "Ana López", 10.0
+
+        # When
+        banco.crear_cuentas_lote(filas_exteriores(), tamano_bloque=1)
+        estados.append(gc.isenabled())
+        banco.crear_cuentas_lote(filas_sin_pausa(), pausar_recolector=False)
+
+        # Then
+        assert estados == [False, False, True, True]
+        assert banco.obtener_numero_cuentas() == 4
+
+    def test_errores_por_fila_sin_interrumpir_la_importacion(self):
+        """
+        GIVEN: Un banco con una cuenta y filas con errores de todo tipo
+        WHEN: Se importan
+        THEN: Se crean solo las filas válidas y cada error indica su fila
+        """
+        # Given
+        banco = Banco("Banco Nacional", centavos=True)
+        banco.crear_cuenta("1", "Juan Pérez", 10.0)
+        filas = [
+            ("2", "Ana López", "20.50"),
+            ("1", "Juan Pérez", 5.0),
+            ("3", "Luis Gómez", "mucho"),
+            ("4", "Eva Ruiz"),
+            ("5", "", 1.0),
+            ("6", "Pablo Gil", -3.0),
+            ("7", "Sara Díaz", float("nan")),
+            ("8", "Marta Sanz", 0.001),
+            ("2", "Ana López", 1.0),
+            ("9", "Rosa Vera", 0.0),
+        ]
+
+        # When
+        errores = banco.crear_cuentas_lote(filas)
+
+        # Then
+        assert [fila for fila, _ in errores] == [1, 2, 3, 4, 5, 6, 7, 8]
+        assert "ya existe" in dict(errores)[1]
+        assert "repetida" in dict(errores)[8]
+        assert sorted(banco.cuentas) == ["1", "2", "9"]
+        assert banco.obtener_total_depositado() == 30.5
+
+    def test_importar_csv_con_encabezado(self, tmp_path):
+        """
+        GIVEN: Un CSV con encabezado y tres cuentas, una duplicada
+        WHEN: Se importa
+        THEN: Se crean dos cuentas y el error cuenta las filas sin el encabezado
+        """
+        # Given
+        ruta = tmp_path / "cuentas.csv"
+        with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(["numero_cuenta", "titular", "saldo_inicial"])
+            escritor.writerows([["111", "Juan Pérez", "100.5"], ["222", "Ana López", "7"],
+                                ["111", "Juan Pérez", "1"]])
+        banco = Banco("Banco Nacional")
+
+        # When
+        errores = banco.importar_cuentas_csv(str(ruta))
+
+        # Then
+        assert [fila for fila, _ in errores] == [2]
+        assert banco.obtener_cuenta("111").obtener_saldo() == 100.5
+        assert banco.obtener_cuenta("222").titular == "Ana López"
+
+    def test_importacion_se_recupera_del_wal(self, tmp_path):
+        """
+        GIVEN: Un banco con WAL que importa cuentas en varios bloques
+        WHEN: Se reconstruye a partir del WAL
+        THEN: Las cuentas, sus saldos y fechas de creación coinciden
+        """
+        # Given
+        ruta = str(tmp_path / "banco.wal")
+        banco = Banco("Banco Nacional", wal=RegistroWAL(ruta))
+        banco.crear_cuentas_lote([(str(i), f"Titular {i}", i + 0.5) for i in range(25)], tamano_bloque=10)
+        banco.transferir("3", "4", 1.0)
+        banco.wal.cerrar()
+
+        # When
+        recuperado = Banco.recuperar("Banco Nacional", RegistroWAL(ruta))
+
+        # Then
+        assert {n: (c.obtener_saldo(), c.fecha_creacion) for n, c in recuperado.cuentas.items()} == \
+            {n: (c.obtener_saldo(), c.fecha_creacion) for n, c in banco.cuentas.items()}
+        assert recuperado.obtener_total_depositado() == banco.obtener_total_depositado()
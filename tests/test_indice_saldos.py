@@ -0,0 +1,200 @@
+"""
+Tests del índice ordenado por saldo
+"""
+
+import random
+import threading
+
+import pytest
+
+from src.banco import Banco
+from src.indice_saldos import IndiceSaldos
+
+
+def _banco_aleatorio(generador, num_cuentas=300, **opciones):
+    banco = Banco("Banco Nacional", **opciones)
+    for i in range(num_cuentas):
+        banco.crear_cuenta(str(i), f"Titular {i}", round(generador.uniform(0, 1000), 2))
+    return banco
+
+
+def _ordenadas(banco):
+    """Claves (saldo, número) ordenando todas las cuentas, como referencia"""
+    return sorted((cuenta.obtener_saldo(), numero) for numero, cuenta in banco.cuentas.items())
+
+
+class TestIndiceSaldos:
+    """Tests de la estructura ordenada"""
+
+    def test_altas_bajas_y_cambios_mantienen_el_orden(self):
+        """
+        GIVEN: Un índice con cubos pequeños
+        WHEN: Se hacen miles de altas, bajas y cambios de saldo al azar
+        THEN: Sus consultas coinciden siempre con ordenar todas las claves
+        """
+        generador = random.Random(4)
+        indice = IndiceSaldos(carga=4)
+        saldos = {}
+
+        for paso in range(5000):
+            numero = str(generador.randrange(200))
+            saldo = float(generador.randrange(40))
+            if numero not in saldos:
+                indice.agregar(saldo, numero)
+            elif generador.random() < 0.3:
+                indice.quitar(saldos.pop(numero), numero)
+                continue
+            else:
+                indice.cambiar(numero, saldos[numero], saldo)
+            saldos[numero] = saldo
+
+            if paso % 250 == 0:
+                claves = sorted((s, n) for n, s in saldos.items())
+                assert list(indice) == claves
+                assert [indice.clave(k) for k in range(len(claves))] == claves
+                assert indice.mayores(10) == claves[::-1][:10]
+                assert list(indice.entre(10.0, 20.0)) == [c for c in claves if 10.0 <= c[0] <= 20.0]
+                assert indice.contar_hasta(15.0) == sum(s <= 15.0 for s, _ in claves)
+                assert indice.contar_menores(15.0) == sum(s < 15.0 for s, _ in claves)
+
+    def test_quitar_una_clave_ausente(self):
+        """
+        GIVEN: Un índice con una cuenta
+        WHEN: Se quita con un saldo distinto del suyo
+        THEN: Se lanza KeyError
+        """
+        indice = IndiceSaldos([(10.0, "1")])
+
+        with pytest.raises(KeyError):
+            indice.quitar(20.0, "1")
+
+
+class TestConsultasPorSaldo:
+    """Tests de las consultas por saldo del banco"""
+
+    def test_consultas_tras_operaciones(self):
+        """
+        GIVEN: Un banco con cuentas de saldos aleatorios cuyo índice ya existe
+        WHEN: Se deposita, se retira, se transfiere y se crean cuentas
+        THEN: Top-N, rangos, posiciones y percentiles coinciden con ordenar todo
+        """
+        # Given
+        generador = random.Random(8)
+        banco = _banco_aleatorio(generador)
+        banco.obtener_mayores_saldos(1)
+
+        # When
+        for i in range(2000):
+            numero = str(generador.randrange(300))
+            cantidad = round(generador.uniform(0.01, 50), 2)
+            operacion = i % 4
+            if operacion == 0:
+                banco.depositar(numero, cantidad)
+            elif operacion == 1 and banco.obtener_cuenta(numero).obtener_saldo() >= cantidad:
+                banco.retirar(numero, cantidad)
+            elif operacion == 2 and banco.obtener_cuenta(numero).obtener_saldo() >= cantidad:
+                banco.transferir(numero, str(generador.randrange(300)), cantidad)
+        banco.transferir_lote(["1", "2"], ["3", "4"], [0.5, 0.25])
+        banco.crear_cuenta("nueva", "Ana López", 5000.0)
+
+        # Then
+        claves = _ordenadas(banco)
+        assert [c.numero_cuenta for c in banco.obtener_mayores_saldos(5)] == \
+            [numero for _, numero in claves[::-1][:5]]
+        assert banco.obtener_mayores_saldos(1)[0].numero_cuenta == "nueva"
+        assert [c.numero_cuenta for c in banco.obtener_cuentas_por_saldo(100.0, 200.0)] == \
+            [numero for saldo, numero in claves if 100.0 <= saldo <= 200.0]
+        saldo = banco.obtener_cuenta("7").obtener_saldo()
+        assert banco.obtener_posicion_saldo("7") == 1 + sum(s > saldo for s, _ in claves)
+        assert banco.obtener_percentil_saldo(50) == claves[(len(claves) + 1) // 2 - 1][0]
+        assert banco.obtener_percentil_saldo(0) == claves[0][0]
+        assert banco.obtener_percentil_saldo(100) == claves[-1][0]
+
+    def test_cambios_de_saldo_no_esperan_al_indice(self):
+        """
+        GIVEN: Un banco cuyo índice por saldo ya existe y una consulta en curso que lo tiene tomado
+        WHEN: Otros hilos transfieren mientras tanto y después se vuelve a consultar
+        THEN: Las transferencias no esperan a la consulta y el índice acaba reflejándolas todas
+        """
+        # Given
+        generador = random.Random(9)
+        banco = _banco_aleatorio(generador, num_cuentas=50)
+        banco.obtener_mayores_saldos(1)
+
+        def transferir(semilla):
+            generador_hilo = random.Random(semilla)
+            for _ in range(500):
+                origen, destino = generador_hilo.sample(range(50), 2)
+                if banco.obtener_cuenta(str(origen)).obtener_saldo() >= 1.0:
+                    banco.transferir(str(origen), str(destino), 1.0)
+                    banco.obtener_posicion_saldo(str(destino))
+
+        # When
+        with banco._candado_indice:
+            durante_consulta = threading.Thread(target=banco.transferir, args=("0", "1", 0.5))
+            durante_consulta.start()
+            durante_consulta.join(timeout=5)
+            sin_esperar = not durante_consulta.is_alive()
+        hilos = [threading.Thread(target=transferir, args=(semilla,)) for semilla in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos + [durante_consulta]:
+            hilo.join(timeout=30)
+
+        # Then
+        assert sin_esperar
+        assert not any(hilo.is_alive() for hilo in hilos)
+        claves = _ordenadas(banco)
+        assert [c.numero_cuenta for c in banco.obtener_cuentas_por_saldo(0.0, 1e9)] == \
+            [numero for _, numero in claves]
+
+    def test_saldos_iguales_comparten_posicion(self):
+        """
+        GIVEN: Tres cuentas, dos de ellas con el mismo saldo
+        WHEN: Se pide la posición de cada una
+        THEN: Las empatadas comparten posición y la siguiente salta una
+        """
+        banco = Banco("Banco Nacional")
+        banco.crear_cuenta("1", "Juan Pérez", 100.0)
+        banco.crear_cuenta("2", "Ana López", 100.0)
+        banco.crear_cuenta("3", "Luis Gómez", 50.0)
+
+        assert [banco.obtener_posicion_saldo(n) for n in ("1", "2", "3")] == [1, 1, 3]
+
+    def test_centimos_e_instantanea(self, tmp_path):
+        """
+        GIVEN: Un banco en modo céntimos guardado en una instantánea
+        WHEN: Se carga, se transfiere y se consulta por saldo
+        THEN: Los saldos del índice son los que devuelve cada cuenta
+        """
+        # Given
+        generador = random.Random(15)
+        original = _banco_aleatorio(generador, num_cuentas=50, centavos=True)
+        ruta = str(tmp_path / "banco.snap")
+        original.guardar_snapshot(ruta)
+        banco = Banco.cargar_snapshot("Banco Nacional", ruta)
+
+        # When
+        banco.obtener_percentil_saldo(90)
+        banco.transferir("3", "4", 0.1)
+        banco.transferir("4", "5", 0.2)
+
+        # Then
+        claves = _ordenadas(banco)
+        assert [c.numero_cuenta for c in banco.obtener_cuentas_por_saldo(0.0, 1000.0)] == \
+            [numero for _, numero in claves]
+        assert banco.obtener_percentil_saldo(90) == claves[45 - 1][0]
+
+    def test_percentil_fuera_de_rango_o_banco_vacio(self):
+        """
+        GIVEN: Un banco sin cuentas
+        WHEN: Se pide un percentil inválido o cualquier percentil
+        THEN: Se lanza ValueError
+        """
+        banco = Banco("Banco Nacional")
+
+        with pytest.raises(ValueError):
+            banco.obtener_percentil_saldo(101)
+        with pytest.raises(ValueError):
+            banco.obtener_percentil_saldo(50)
+        assert banco.obtener_mayores_saldos(3) == []
@@ -0,0 +1,142 @@
+"""
+Tests del índice secundario por titular
+"""
+
+import math
+import random
+import threading
+import time
+
+from src.banco import Banco
+
+
+class _IndiceLento(dict):
+    """Índice que cede el hilo en cada consulta, para ensanchar las carreras"""
+
+    def get(self, *argumentos):
+        resultado = super().get(*argumentos)
+        time.sleep(0.0005)
+        return resultado
+
+
+def _banco_con_clientes(**opciones):
+    banco = Banco("Banco Nacional", **opciones)
+    banco.crear_cuenta("1", "Juan Pérez", 100.0)
+    banco.crear_cuenta("2", "Ana López", 50.0)
+    banco.crear_cuenta("3", "Juan Pérez", 25.5)
+    return banco
+
+
+class TestIndiceTitular:
+    """Tests de consultas y agregados por titular"""
+
+    def test_cuentas_por_titular(self):
+        """
+        GIVEN: Un banco con dos cuentas de un mismo titular
+        WHEN: Se piden las cuentas de cada titular
+        THEN: Se obtienen solo las suyas, y ninguna para un titular desconocido
+        """
+        banco = _banco_con_clientes()
+
+        assert [c.numero_cuenta for c in banco.obtener_cuentas_por_titular("Juan Pérez")] == ["1", "3"]
+        assert [c.numero_cuenta for c in banco.obtener_cuentas_por_titular("Ana López")] == ["2"]
+        assert banco.obtener_cuentas_por_titular("Nadie") == []
+        assert banco.obtener_total_por_titular("Nadie") == 0.0
+
+    def test_total_por_titular_se_actualiza_en_cada_operacion(self):
+        """
+        GIVEN: Un banco con cuentas de dos titulares
+        WHEN: Se deposita, se retira, se transfiere y se opera sobre la cuenta directamente
+        THEN: El total de cada titular refleja todos los cambios
+        """
+        # Given
+        banco = _banco_con_clientes()
+
+        # When
+        banco.depositar("1", 10.0)
+        banco.retirar("3", 5.5)
+        banco.transferir("1", "2", 30.0)
+        banco.transferir_lote(["2"], ["3"], [20.0])
+        banco.obtener_cuenta("3").depositar(1.0)
+
+        # Then
+        assert banco.obtener_total_por_titular("Juan Pérez") == 100.0 + 10.0 + 25.5 - 5.5 - 30.0 + 20.0 + 1.0
+        assert banco.obtener_total_por_titular("Ana López") == 50.0 + 30.0 - 20.0
+
+    def test_total_por_titular_exacto_con_muchas_operaciones(self):
+        """
+        GIVEN: Un banco con muchas cuentas de pocos titulares
+        WHEN: Se hacen miles de transferencias con decimales
+        THEN: El total de cada titular es la suma exacta de sus saldos
+        """
+        # Given
+        generador = random.Random(21)
+        banco = Banco("Banco Nacional")
+        titulares = [f"Cliente {i}" for i in range(5)]
+        for i in range(100):
+            banco.crear_cuenta(str(i), titulares[i % 5], generador.uniform(0, 500))
+
+        # When
+        for _ in range(3000):
+            origen, destino = (str(n) for n in generador.sample(range(100), 2))
+            cantidad = generador.uniform(0.01, 20)
+            if banco.obtener_cuenta(origen).obtener_saldo() >= cantidad:
+                banco.transferir(origen, destino, cantidad)
+
+        # Then
+        for titular in titulares:
+            saldos = [c.obtener_saldo() for c in banco.obtener_cuentas_por_titular(titular)]
+            assert len(saldos) == 20
+            assert banco.obtener_total_por_titular(titular) == math.fsum(saldos)
+
+    def test_primeras_cuentas_de_un_titular_desde_varios_hilos(self):
+        """
+        GIVEN: Ocho hilos que crean a la vez la primera cuenta de un mismo titular, en franjas distintas
+        WHEN: Se repite con 30 titulares nuevos
+        THEN: El índice por titular conserva todas las cuentas
+        """
+        # Given
+        banco = Banco("Banco Nacional")
+        banco._cuentas_por_titular = _IndiceLento()
+
+        # When
+        for ronda in range(30):
+            barrera = threading.Barrier(8)
+
+            def crear(hilo):
+                barrera.wait()
+                banco.crear_cuenta(f"{ronda}-{hilo}", f"Cliente {ronda}", 1.0)
+
+            hilos = [threading.Thread(target=crear, args=(hilo,)) for hilo in range(8)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+
+        # Then
+        for ronda in range(30):
+            assert len(banco.obtener_cuentas_por_titular(f"Cliente {ronda}")) == 8
+            assert banco.obtener_total_por_titular(f"Cliente {ronda}") == 8.0
+
+    def test_indice_tras_cargar_instantanea_y_en_centimos(self, tmp_path):
+        """
+        GIVEN: Un banco en modo céntimos guardado en una instantánea
+        WHEN: Se carga y se consulta por titular
+        THEN: Cuentas y totales coinciden con los del banco original
+        """
+        # Given
+        banco = _banco_con_clientes(centavos=True)
+        for _ in range(10):
+            banco.depositar("3", 0.1)
+        ruta = str(tmp_path / "banco.snap")
+        banco.guardar_snapshot(ruta)
+
+        # When
+        cargado = Banco.cargar_snapshot("Banco Nacional", ruta)
+
+        # Then
+        assert cargado.obtener_total_por_titular("Juan Pérez") == 126.5
+        assert sorted(c.numero_cuenta for c in cargado.obtener_cuentas_por_titular("Juan Pérez")) == ["1", "3"]
+        cargado.transferir("2", "1", 0.3)
+        assert cargado.obtener_total_por_titular("Juan Pérez") == 126.8
+        assert cargado.obtener_total_por_titular("Ana López") == 49.7
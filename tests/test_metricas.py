@@ -0,0 +1,175 @@
+"""
+Tests de las métricas de latencia y errores
+"""
+
+import threading
+
+import pytest
+
+from src.banco import Banco, CuentaNoEncontradaError, ServicioExternoError
+from src.cuenta import Cuenta, SaldoInsuficienteError
+from src.metricas import HistogramaLatencia, Metricas, indice_cubo, limites_cubo
+from src.simulacion import ServicioSimulado, latencia_constante
+
+
+class TestHistogramaLatencia:
+    """Tests de los cubos fijos y los percentiles"""
+
+    def test_cada_duracion_cae_dentro_de_los_limites_de_su_cubo(self):
+        """
+        GIVEN: Duraciones desde 0 ns hasta varios segundos
+        WHEN: Se calcula su cubo
+        THEN: Cae entre los límites del cubo y los cubos consecutivos no se solapan
+        """
+        for duracion in list(range(200)) + [10 ** e + d for e in range(3, 11) for d in (-1, 0, 1, 12345)]:
+            minimo, maximo = limites_cubo(indice_cubo(duracion))
+            assert minimo <= duracion < maximo
+        for indice in range(1, 150):
+            assert limites_cubo(indice - 1)[1] == limites_cubo(indice)[0]
+
+    def test_percentiles_y_reinicio_con_varios_hilos(self):
+        """
+        GIVEN: Un histograma en el que cuatro hilos registran 900 duraciones de 1 µs y 100 de 1 ms
+        WHEN: Se toma una instantánea reiniciando y después otra
+        THEN: La primera cuenta todas las llamadas con p50 ~1 µs y p99 ~1 ms; la segunda, ninguna
+        """
+        # Given
+        histograma = HistogramaLatencia()
+
+        def registrar():
+            for i in range(1000):
+                histograma.registrar(1_000_000 if i % 10 == 0 else 1_000)
+
+        hilos = [threading.Thread(target=registrar) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        # When
+        resumen = histograma.instantanea(reiniciar=True)
+        despues = histograma.instantanea()
+
+        # Then
+        assert resumen["llamadas"] == 4000
+        assert resumen["total_ns"] == 4 * (900 * 1_000 + 100 * 1_000_000)
+        assert 1_000 <= resumen["p50_ns"] < 1_250
+        assert 1_000_000 <= resumen["p99_ns"] < 1_250_000
+        assert sum(cantidad for _, cantidad in resumen["cubos"]) == 4000
+        assert despues["llamadas"] == 0
+        with pytest.raises(ValueError):
+            histograma.percentil(101)
+
+
+class TestMetricasBanco:
+    """Tests de un banco con métricas"""
+
+    def test_sin_metricas_los_metodos_no_se_envuelven(self):
+        """
+        GIVEN: Un banco creado sin métricas
+        WHEN: Se crea una cuenta
+        THEN: Ni el banco ni la cuenta tienen envolturas
+        """
+        banco = Banco("Banco Nacional")
+        cuenta = banco.crear_cuenta("1", "Juan Pérez", 10.0)
+
+        assert banco.metricas is None
+        assert "transferir" not in vars(banco)
+        assert banco._cronometro_transferir is None
+        assert type(cuenta) is Cuenta
+
+    def test_latencias_y_errores_por_operacion(self):
+        """
+        GIVEN: Un banco con métricas y dos cuentas
+        WHEN: Se hacen transferencias, algunas fallidas, y se consulta un historial
+        THEN: Cada operación cuenta sus llamadas y sus errores por tipo
+        """
+        # Given
+        metricas = Metricas()
+        banco = Banco("Banco Nacional", metricas=metricas)
+        banco.crear_cuenta("1", "Juan Pérez", 100.0)
+        banco.crear_cuenta("2", "Ana López", 0.0)
+
+        # When
+        for _ in range(5):
+            banco.transferir("1", "2", 10.0)
+        with pytest.raises(SaldoInsuficienteError):
+            banco.transferir("2", "1", 1000.0)
+        with pytest.raises(CuentaNoEncontradaError):
+            banco.transferir("1", "9", 1.0)
+        banco.obtener_cuenta("2").obtener_historial()
+
+        # Then
+        resumen = metricas.instantanea()
+        assert resumen["banco.transferir"]["llamadas"] == 7
+        assert resumen["banco.transferir"]["errores"] == {"SaldoInsuficienteError": 1, "CuentaNoEncontradaError": 1}
+        assert resumen["banco.crear_cuenta"]["llamadas"] == 2
+        assert resumen["cuenta.obtener_historial"]["llamadas"] == 1
+        assert resumen["banco.transferir"]["p50_ns"] > 0
+        assert "banco.depositar" not in resumen
+        assert banco.obtener_cuenta("2").obtener_saldo() == 50.0
+
+        metricas.reiniciar()
+        assert metricas.instantanea() == {}
+
+    def test_validacion_asincrona_y_cuentas_de_instantanea(self, tmp_path):
+        """
+        GIVEN: Un banco con métricas y servicio simulado, y otro cargado de una instantánea
+        WHEN: Se validan cuentas de forma asíncrona y se lee el historial de una cuenta cargada
+        THEN: Se miden las corrutinas con sus errores y las cuentas cargadas también se miden
+        """
+        # Given
+        servicio = ServicioSimulado(semilla=1, latencia=latencia_constante(0.1), probabilidad_fallo=0.5)
+        metricas = Metricas()
+        banco = Banco("Banco Nacional", servicio=servicio, metricas=metricas)
+        for i in range(20):
+            banco.crear_cuenta(str(i), f"Titular {i}", 10.0)
+        ruta = str(tmp_path / "banco.snap")
+        banco.guardar_snapshot(ruta)
+
+        # When
+        resultados = servicio.reloj.ejecutar(
+            banco.avalidar_cuentas([str(i) for i in range(20)], return_exceptions=True))
+        cargado = Banco.cargar_snapshot("Banco Nacional", ruta, metricas=metricas)
+        cargado.obtener_cuenta("3").obtener_historial()
+
+        # Then
+        resumen = metricas.instantanea()
+        fallos = sum(isinstance(resultado, ServicioExternoError) for resultado in resultados)
+        assert resumen["banco.avalidar_cuenta"]["llamadas"] == 20
+        assert resumen["banco.avalidar_cuenta"]["errores"].get("ServicioExternoError", 0) == fallos > 0
+        assert resumen["cuenta.obtener_historial"]["llamadas"] == 1
+        assert resumen["banco.guardar_snapshot"]["llamadas"] == 1
+
+    def test_muestreo_mide_una_de_cada_n_llamadas(self, monkeypatch):
+        """
+        GIVEN: Un banco con métricas que miden una de cada cuatro llamadas
+        WHEN: Se hacen 40 depósitos y 3 retiros fallidos
+        THEN: Las llamadas se estiman a partir de la muestra y los errores se cuentan todos
+        """
+        # Given
+        medidas = []
+        registrar = HistogramaLatencia.registrar
+        monkeypatch.setattr(HistogramaLatencia, "registrar",
+                            lambda histograma, duracion, peso: medidas.append(peso) or
+                            registrar(histograma, duracion, peso))
+        metricas = Metricas(muestreo=4)
+        banco = Banco("Banco Nacional", metricas=metricas)
+        banco.crear_cuenta("1", "Juan Pérez", 0.0)
+
+        # When
+        for _ in range(40):
+            banco.depositar("1", 1.0)
+        for _ in range(3):
+            with pytest.raises(SaldoInsuficienteError):
+                banco.retirar("1", 1000.0)
+
+        # Then
+        resumen = metricas.instantanea()
+        # La primera de cada cuatro: crear_cuenta, 10 depósitos y el primer retiro
+        assert medidas == [4] * (1 + 10 + 1)
+        assert resumen["banco.depositar"]["llamadas"] == 40
+        assert resumen["banco.retirar"]["errores"] == {"SaldoInsuficienteError": 3}
+        assert banco.obtener_cuenta("1").obtener_saldo() == 40.0
+        with pytest.raises(ValueError):
+            Metricas(muestreo=0)
@@ -0,0 +1,202 @@
+"""
+Tests de la conciliación de historiales
+"""
+
+import pytest
+
+from src import reconciliacion
+from src.banco import Banco
+from src.retencion import PoliticaRetencion
+from src.reconciliacion import CADENA, SALDO_FINAL, SALDO_NEGATIVO, TOTAL, conciliar
+
+
+def _banco(centavos=False):
+    banco = Banco("Banco Nacional", centavos=centavos)
+    for numero in ("1", "2", "3"):
+        banco.crear_cuenta(numero, f"Titular {numero}", 100.0)
+    banco.depositar("1", 10.25)
+    banco.retirar("2", 0.25)
+    banco.transferir("1", "3", 50.0)
+    banco.transferir_lote(["3", "2"], ["2", "1"], [20.0, 0.1])
+    return banco
+
+
+def _resumen(informe):
+    return [(d.tipo, d.numero_cuenta, d.indice, d.esperado, d.registrado) for d in informe.discrepancias]
+
+
+class TestConciliacion:
+    """Tests del motor de conciliación"""
+
+    @pytest.mark.parametrize("centavos", [False, True])
+    @pytest.mark.parametrize("con_numpy", [True, False])
+    def test_banco_coherente(self, monkeypatch, centavos, con_numpy):
+        """
+        GIVEN: Un banco con depósitos, retiros y transferencias
+        WHEN: Se concilia, con y sin NumPy
+        THEN: No hay discrepancias y los totales coinciden
+        """
+        # Given
+        if not con_numpy:
+            monkeypatch.setattr(reconciliacion, "np", None)
+        banco = _banco(centavos)
+
+        # When
+        informe = conciliar(banco, cuentas_por_bloque=2)
+
+        # Then
+        assert informe.correcto, informe.discrepancias
+        assert informe.cuentas == 3
+        assert informe.transacciones == sum(len(c.historial_transacciones) for c in banco.cuentas.values())
+        assert informe.total_saldos == informe.total_depositado == banco.obtener_total_depositado()
+
+    @pytest.mark.parametrize("centavos", [False, True])
+    @pytest.mark.parametrize("con_numpy", [True, False])
+    def test_localiza_entradas_alteradas(self, monkeypatch, centavos, con_numpy):
+        """
+        GIVEN: Un banco con un saldo_nuevo alterado en el historial y un saldo cambiado a mano
+        WHEN: Se concilia
+        THEN: Se informa cada discrepancia con su cuenta, su entrada y los importes
+        """
+        # Given
+        if not con_numpy:
+            monkeypatch.setattr(reconciliacion, "np", None)
+        banco = _banco(centavos)
+        escala = banco._clase_cuenta.ESCALA or 1
+        historial = banco.obtener_cuenta("2").historial_transacciones
+        historial.saldos[1] += 5 * escala
+        banco.obtener_cuenta("3")._saldo -= 200 * escala
+
+        # When
+        informe = conciliar(banco)
+
+        # Then
+        assert _resumen(informe) == [
+            (CADENA, "2", 1, 119.75, 124.75),
+            (CADENA, "2", 2, pytest.approx(124.65), pytest.approx(119.65)),
+            (SALDO_FINAL, "3", None, 130.0, -70.0),
+            (SALDO_NEGATIVO, "3", None, 0, -70.0),
+            (TOTAL, None, None, 110.0, 310.0),
+        ]
+        assert informe.discrepancias[0].fecha == historial[1]["fecha"]
+        assert not informe.correcto
+
+    @pytest.mark.parametrize("con_numpy", [True, False])
+    def test_la_primera_entrada_tambien_se_comprueba(self, monkeypatch, con_numpy):
+        """
+        GIVEN: Un banco con la cantidad de la primera entrada de una cuenta alterada
+               y el saldo_nuevo de la primera entrada de otra
+        WHEN: Se concilia
+        THEN: Ambas se localizan en la entrada 0, partiendo del saldo inicial de la cuenta
+        """
+        # Given
+        if not con_numpy:
+            monkeypatch.setattr(reconciliacion, "np", None)
+        banco = _banco()
+        banco.obtener_cuenta("1").historial_transacciones.cantidades[0] += 1.0
+        banco.obtener_cuenta("2").historial_transacciones.saldos[0] += 3.0
+
+        # When
+        informe = conciliar(banco)
+
+        # Then
+        assert _resumen(informe) == [
+            (CADENA, "1", 0, 111.25, 110.25),
+            (SALDO_FINAL, "1", None, pytest.approx(61.35), pytest.approx(60.35)),
+            (CADENA, "2", 0, 99.75, 102.75),
+            (CADENA, "2", 1, pytest.approx(122.75), pytest.approx(119.75)),
+        ]
+
+    def test_instantanea_sin_historial_parte_del_saldo_guardado(self, tmp_path):
+        """
+        GIVEN: Un banco con movimientos guardado en una instantánea sin historial
+        WHEN: Se concilia el banco cargado
+        THEN: No hay discrepancias: el saldo guardado es el nuevo saldo de apertura
+        """
+        ruta = str(tmp_path / "banco.snap")
+        _banco().guardar_snapshot(ruta, con_historial=False)
+
+        informe = conciliar(Banco.cargar_snapshot("Banco Nacional", ruta))
+
+        assert informe.correcto, informe.discrepancias
+        assert informe.transacciones == 0
+
+    def test_varios_procesos_dan_el_mismo_informe(self):
+        """
+        GIVEN: Un banco con una entrada alterada y bloques de una cuenta
+        WHEN: Se concilia en un proceso y en dos
+        THEN: Ambos informes son iguales
+        """
+        banco = _banco()
+        banco.obtener_cuenta("1").historial_transacciones.cantidades[1] += 1.0
+
+        secuencial = conciliar(banco, cuentas_por_bloque=1)
+        paralelo = conciliar(banco, procesos=2, cuentas_por_bloque=1)
+
+        assert _resumen(secuencial) and _resumen(paralelo) == _resumen(secuencial)
+        assert paralelo.transacciones == secuencial.transacciones
+
+    def test_historial_archivado_e_instantanea_diferida(self, tmp_path):
+        """
+        GIVEN: Un banco con retención, cargado de una instantánea sin materializar sus cuentas
+        WHEN: Se concilia
+        THEN: Se reproduce el historial completo, también la parte archivada en disco
+        """
+        # Given
+        politica = PoliticaRetencion(str(tmp_path / "historial"), max_entradas=30, lote=10)
+        banco = Banco("Banco Nacional", retencion=politica)
+        banco.crear_cuenta("1", "Juan Pérez", 1000.0)
+        banco.crear_cuenta("2", "Ana López", 1000.0)
+        for _ in range(200):
+            banco.transferir("1", "2", 1.5)
+        ruta = str(tmp_path / "banco.snap")
+        banco.guardar_snapshot(ruta)
+        cargado = Banco.cargar_snapshot("Banco Nacional", ruta)
+
+        # When
+        original = conciliar(banco)
+        informe = conciliar(cargado)
+
+        # Then
+        assert banco.obtener_cuenta("1").historial_transacciones.archivadas > 0
+        assert original.correcto and informe.correcto
+        assert original.transacciones == informe.transacciones == 400
+
+    def test_copia_cada_franja_con_su_candado(self, monkeypatch):
+        """
+        GIVEN: Un banco que recibe depósitos justo después de que se lean saldos y longitudes
+        WHEN: Se concilia
+        THEN: Los historiales se copian sin tener las franjas bloqueadas y hasta la longitud leída
+        """
+        # Given
+        banco = _banco()
+        transacciones = sum(len(c.historial_transacciones) for c in banco.cuentas.values())
+        total = banco.obtener_total_depositado()
+        desbloquear, indice_franja = banco._desbloquear, banco._indice_franja
+        fase = ["lectura"]
+        bloqueadas = []
+
+        def desbloquear_y_depositar(indices):
+            desbloquear(indices)
+            if fase[0] == "lectura":
+                fase[0] = "escritura"
+                for numero in ("1", "2", "3"):
+                    banco.depositar(numero, 1.0)
+                fase[0] = "copia"
+
+        def contar_bloqueadas(numero_cuenta):
+            if fase[0] == "copia":
+                bloqueadas.append(sum(franja.candado.locked() for franja in banco._franjas))
+            return indice_franja(numero_cuenta)
+
+        monkeypatch.setattr(banco, "_desbloquear", desbloquear_y_depositar)
+        monkeypatch.setattr(banco, "_indice_franja", contar_bloqueadas)
+
+        # When
+        informe = conciliar(banco)
+
+        # Then
+        assert bloqueadas == [0, 0, 0]
+        assert informe.correcto, informe.discrepancias
+        assert informe.transacciones == transacciones
+        assert informe.total_saldos == informe.total_depositado == total
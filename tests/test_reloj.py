@@ -0,0 +1,106 @@
+"""
+Tests de los relojes inyectables
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.banco import Banco
+from src.cuenta import Cuenta
+from src.reloj import Reloj, RelojManual, RelojSistema
+from src.wal import RegistroWAL, SINCRONIZAR_NUNCA
+
+
+class TestReloj:
+    """Tests de las fuentes de tiempo"""
+
+    def test_reloj_sistema_sigue_la_hora_de_pared_y_no_retrocede(self):
+        """
+        GIVEN: Un reloj del sistema recién anclado
+        WHEN: Se lee varias veces
+        THEN: Está cerca de datetime.now() y nunca retrocede
+        """
+        # Given
+        reloj = RelojSistema()
+
+        # When
+        lecturas = [reloj.ahora_ns() for _ in range(1000)]
+
+        # Then
+        assert lecturas == sorted(lecturas)
+        assert abs(reloj.ahora() - datetime.now()) < timedelta(seconds=1)
+
+    def test_reloj_sin_ahora_ns_no_se_puede_crear(self):
+        """
+        GIVEN: Reloj y una subclase que no implementa ahora_ns
+        WHEN: Se intenta crear cualquiera de los dos
+        THEN: Falla al crearlos, no al leer la hora
+        """
+        class RelojIncompleto(Reloj):
+            pass
+
+        with pytest.raises(TypeError):
+            Reloj()
+        with pytest.raises(TypeError):
+            RelojIncompleto()
+
+    def test_reloj_manual_avanza_solo_cuando_se_indica(self):
+        """
+        GIVEN: Un reloj manual con paso de un segundo
+        WHEN: Se lee, se avanza y se fija
+        THEN: Devuelve exactamente las fechas esperadas
+        """
+        # Given
+        inicio = datetime(2024, 3, 1, 12, 0)
+        reloj = RelojManual(inicio, paso=timedelta(seconds=1))
+
+        # When/Then
+        assert reloj.ahora() == inicio
+        assert reloj.ahora() == inicio + timedelta(seconds=1)
+        reloj.avanzar(timedelta(hours=1))
+        assert reloj.ahora() == inicio + timedelta(hours=1, seconds=2)
+        reloj.fijar(datetime(2025, 1, 1))
+        assert reloj.ahora() == datetime(2025, 1, 1)
+
+    def test_cuenta_fecha_sus_transacciones_con_su_reloj(self):
+        """
+        GIVEN: Una cuenta con un reloj manual
+        WHEN: Se opera con ella
+        THEN: Creación e historial usan las fechas del reloj
+        """
+        # Given
+        inicio = datetime(2024, 1, 1)
+        cuenta = Cuenta("1", "Juan Pérez", 100.0, reloj=RelojManual(inicio, paso=timedelta(minutes=1)))
+
+        # When
+        cuenta.depositar(10.0)
+        cuenta.retirar(5.0)
+
+        # Then
+        assert cuenta.fecha_creacion == inicio
+        assert [t["fecha"] for t in cuenta.obtener_historial()] == [
+            inicio + timedelta(minutes=1), inicio + timedelta(minutes=2)]
+
+    def test_banco_con_reloj_manual_es_reproducible(self, tmp_path):
+        """
+        GIVEN: Dos bancos con WAL y relojes manuales iguales
+        WHEN: Hacen las mismas operaciones
+        THEN: Sus WAL son idénticos byte a byte
+        """
+        # Given
+        rutas = [str(tmp_path / f"banco{i}.wal") for i in range(2)]
+
+        # When
+        for ruta in rutas:
+            banco = Banco("Banco Nacional", reloj=RelojManual(paso=timedelta(milliseconds=1)),
+                          wal=RegistroWAL(ruta, sincronizacion=SINCRONIZAR_NUNCA))
+            banco.crear_cuenta("1", "Juan Pérez", 100.0)
+            banco.crear_cuenta("2", "Ana López", 0.0)
+            banco.transferir("1", "2", 25.0)
+            banco.transferir_lote(["2"], ["1"], [5.0])
+            banco.wal.cerrar()
+
+        # Then
+        with open(rutas[0], "rb") as primero, open(rutas[1], "rb") as segundo:
+            assert primero.read() == segundo.read()
@@ -0,0 +1,140 @@
+"""
+Tests de la retención del historial con segmentos en disco
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.banco import Banco
+from src.cuenta import Cuenta
+from src.retencion import PoliticaRetencion
+
+
+def _operar(cuenta, n, inicio=datetime(2024, 1, 1)):
+    """Alterna depósitos y retiros con una fecha por hora"""
+    for i in range(n):
+        fecha = inicio + timedelta(hours=i)
+        if i % 3 == 2:
+            cuenta.retirar(0.5, fecha)
+        else:
+            cuenta.depositar(1.25, fecha)
+
+
+class TestRetencion:
+    """Tests del historial acotado en memoria"""
+
+    def test_memoria_acotada_con_historial_completo(self, tmp_path):
+        """
+        GIVEN: Una cuenta que conserva 100 entradas en memoria y otra sin límite
+        WHEN: Ambas hacen las mismas 5000 operaciones
+        THEN: La primera tiene como mucho 100 + lote en memoria y el mismo historial
+        """
+        # Given
+        acotada = Cuenta("1", "Juan Pérez", 10.0)
+        acotada.historial_transacciones.configurar_retencion(
+            PoliticaRetencion(str(tmp_path), max_entradas=100, lote=20, tamano_segmento=1000),
+            str(tmp_path / "1"))
+        completa = Cuenta("2", "Juan Pérez", 10.0)
+
+        # When
+        _operar(acotada, 5000)
+        _operar(completa, 5000)
+
+        # Then
+        historial = acotada.historial_transacciones
+        assert 100 <= len(historial.tipos) < 120
+        assert len(historial) == 5000
+        assert len(historial.archivo.segmentos()) == 5
+        assert acotada.obtener_historial() == completa.obtener_historial()
+        assert historial == completa.historial_transacciones
+
+    def test_consultas_cruzan_memoria_y_disco(self, tmp_path):
+        """
+        GIVEN: Una cuenta con la mayor parte del historial archivado
+        WHEN: Se consultan un rango, un saldo pasado, una página y un índice
+        THEN: Los resultados coinciden con los de una cuenta sin retención
+        """
+        # Given
+        acotada = Cuenta("1", "Juan Pérez", 10.0)
+        acotada.historial_transacciones.configurar_retencion(
+            PoliticaRetencion(str(tmp_path), max_entradas=50, lote=10, tamano_segmento=64),
+            str(tmp_path / "1"))
+        completa = Cuenta("2", "Juan Pérez", 10.0)
+        _operar(acotada, 1000)
+        _operar(completa, 1000)
+        desde = datetime(2024, 1, 5, 7)
+        hasta = datetime(2024, 2, 11)
+
+        # When/Then
+        assert acotada.obtener_historial_entre(desde, hasta) == completa.obtener_historial_entre(desde, hasta)
+        assert acotada.saldo_en(desde) == completa.saldo_en(desde)
+        assert acotada.saldo_en(datetime(2023, 1, 1)) == 10.0
+        assert acotada.pagina_historial(cursor=70, limite=40) == completa.pagina_historial(cursor=70, limite=40)
+        assert acotada.historial_transacciones[3] == completa.historial_transacciones[3]
+        assert acotada.vista_historial()[100:900] == completa.vista_historial()[100:900]
+
+    def test_retencion_por_dias(self, tmp_path):
+        """
+        GIVEN: Una cuenta que conserva en memoria los últimos 2 días
+        WHEN: Opera cada hora durante 10 días
+        THEN: Solo se archivan entradas de más de 2 días antes de la última
+        """
+        # Given
+        cuenta = Cuenta("1", "Juan Pérez", 10.0)
+        cuenta.historial_transacciones.configurar_retencion(
+            PoliticaRetencion(str(tmp_path), max_dias=2, lote=4), str(tmp_path / "1"))
+
+        # When
+        _operar(cuenta, 240)
+
+        # Then
+        historial = cuenta.historial_transacciones
+        en_memoria = historial[historial.archivadas:]
+        assert len(historial) == 240
+        assert 49 <= len(en_memoria) <= 49 + 3
+        ultima_archivada = historial[historial.archivadas - 1]
+        assert en_memoria[-1]["fecha"] - ultima_archivada["fecha"] > timedelta(days=2)
+
+    def test_politica_sin_limites_debe_fallar(self, tmp_path):
+        """
+        GIVEN: Una política sin máximo de entradas ni de días
+        WHEN: Se crea
+        THEN: Se lanza ValueError
+        """
+        with pytest.raises(ValueError):
+            PoliticaRetencion(str(tmp_path))
+
+
+class TestRetencionBanco:
+    """Tests de la retención configurada en el banco"""
+
+    def test_banco_archiva_y_guarda_instantanea_completa(self, tmp_path):
+        """
+        GIVEN: Un banco con retención y muchas transferencias
+        WHEN: Se guarda y carga una instantánea
+        THEN: El historial cargado está completo y vuelve a quedar acotado
+        """
+        # Given
+        politica = PoliticaRetencion(str(tmp_path / "historial"), max_entradas=30, lote=10)
+        banco = Banco("Banco Nacional", retencion=politica)
+        banco.crear_cuenta("1", "Juan Pérez", 1000.0)
+        banco.crear_cuenta("2", "Ana López", 1000.0)
+        for _ in range(200):
+            banco.transferir("1", "2", 1.5)
+        banco.transferir_lote(["2"] * 100, ["1"] * 100, [0.5] * 100)
+        ruta = str(tmp_path / "banco.snap")
+        esperado = banco.obtener_cuenta("1").obtener_historial()
+
+        # When
+        banco.guardar_snapshot(ruta)
+        cargado = Banco.cargar_snapshot("Banco Nacional", ruta,
+                                        retencion=PoliticaRetencion(str(tmp_path / "cargado"),
+                                                                    max_entradas=30, lote=10))
+
+        # Then
+        assert len(banco.obtener_cuenta("1").historial_transacciones.tipos) < 40
+        cuenta = cargado.obtener_cuenta("1")
+        assert len(cuenta.historial_transacciones) == 300
+        assert len(cuenta.historial_transacciones.tipos) < 40
+        assert cuenta.obtener_historial() == esperado
@@ -0,0 +1,135 @@
+"""
+Tests del servicio externo simulado con tiempo virtual
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.banco import Banco, ServicioExternoError
+from src.circuito import Cortacircuitos
+from src.reloj import RelojVirtual
+from src.simulacion import ServicioSimulado, latencia_constante, latencia_uniforme
+
+
+def _banco_simulado(servicio, num_cuentas=100, **opciones):
+    banco = Banco("Banco Nacional", servicio=servicio, **opciones)
+    for i in range(num_cuentas):
+        banco.crear_cuenta(str(i), f"Titular {i}", 100.0)
+    return banco
+
+
+def _validar(banco, numero):
+    try:
+        return banco.validar_cuenta_con_servicio_externo(numero)
+    except ServicioExternoError:
+        return None
+
+
+class TestServicioSimulado:
+    """Tests del modelo de latencia y fallos"""
+
+    def test_miles_de_validaciones_sin_dormir(self):
+        """
+        GIVEN: Un banco con un servicio simulado de latencia uniforme
+        WHEN: Se hacen 5000 validaciones síncronas
+        THEN: Tardan menos de un segundo real y el tiempo simulado es la suma de latencias
+        """
+        # Given
+        servicio = ServicioSimulado(semilla=1, latencia=latencia_uniforme(0.05, 0.15))
+        banco = _banco_simulado(servicio)
+
+        # When
+        inicio = time.perf_counter()
+        for i in range(5000):
+            _validar(banco, str(i % 200))
+        transcurrido = time.perf_counter() - inicio
+
+        # Then
+        assert transcurrido < 1.0
+        assert servicio.llamadas == 5000
+        assert servicio.reloj.monotonic() == pytest.approx(sum(servicio.latencias), rel=1e-6)
+        assert 0.05 <= servicio.percentil(50) <= 0.15
+        assert 0.08 < servicio.fallos / 5000 < 0.12
+
+    def test_misma_semilla_mismos_resultados(self):
+        """
+        GIVEN: Dos bancos con servicios simulados con la misma semilla
+        WHEN: Validan las mismas cuentas
+        THEN: Obtienen los mismos resultados, fallos y latencias
+        """
+        # Given
+        servicios = [ServicioSimulado(semilla=42) for _ in range(2)]
+        bancos = [_banco_simulado(servicio) for servicio in servicios]
+
+        # When
+        resultados = [[_validar(banco, str(i)) for i in range(150)] for banco in bancos]
+
+        # Then
+        assert resultados[0] == resultados[1]
+        assert servicios[0].latencias == servicios[1].latencias
+        assert None in resultados[0] and False in resultados[0]
+
+    def test_validaciones_asincronas_se_solapan_en_tiempo_virtual(self):
+        """
+        GIVEN: Un servicio simulado de latencia constante 0.1 s
+        WHEN: Se validan 1000 cuentas con concurrencia 100 en el reloj virtual
+        THEN: El tiempo simulado es de unos 10 turnos de 0.1 s y el real, mínimo
+        """
+        # Given
+        servicio = ServicioSimulado(semilla=3, latencia=latencia_constante(0.1), probabilidad_fallo=0.0)
+        banco = _banco_simulado(servicio, num_cuentas=1000)
+        numeros = [str(i) for i in range(1000)]
+
+        # When
+        inicio = time.perf_counter()
+        resultados = servicio.reloj.ejecutar(banco.avalidar_cuentas(numeros, concurrencia=100))
+        transcurrido = time.perf_counter() - inicio
+
+        # Then
+        assert resultados == [True] * 1000
+        assert servicio.reloj.monotonic() == pytest.approx(1.0)
+        assert transcurrido < 1.0
+
+    def test_asincrono_fuera_del_bucle_virtual_falla(self):
+        """
+        GIVEN: Un servicio simulado con latencia de una hora
+        WHEN: Se valida una cuenta con asyncio.run en lugar de en el reloj virtual
+        THEN: Falla con RuntimeError sin adelantar el reloj
+        """
+        # Given
+        servicio = ServicioSimulado(latencia=latencia_constante(3600.0), probabilidad_fallo=0.0)
+        banco = _banco_simulado(servicio, num_cuentas=1)
+
+        # When
+        with pytest.raises(RuntimeError):
+            asyncio.run(banco.avalidar_cuenta("0"))
+
+        # Then
+        assert servicio.reloj.monotonic() == 0.0
+
+    def test_cortacircuitos_con_reloj_virtual(self):
+        """
+        GIVEN: Un servicio que siempre falla y un cortacircuitos con el reloj virtual
+        WHEN: Se abre el circuito y pasa su tiempo de apertura simulado
+        THEN: El circuito deja pasar una prueba sin esperar tiempo real
+        """
+        # Given
+        reloj = RelojVirtual()
+        servicio = ServicioSimulado(semilla=5, probabilidad_fallo=1.0, reloj=reloj)
+        circuito = Cortacircuitos(umbral_fallos=3, tiempo_apertura=30.0, reintentos=0,
+                                  reloj=reloj.monotonic, aleatorio=servicio.generador.random)
+        banco = _banco_simulado(servicio, num_cuentas=1, cortacircuitos=circuito)
+        for _ in range(3):
+            _validar(banco, "0")
+        llamadas = servicio.llamadas
+
+        # When
+        _validar(banco, "0")
+        reloj.dormir(30.0)
+        _validar(banco, "0")
+
+        # Then
+        assert circuito.rechazos == 1
+        assert servicio.llamadas == llamadas + 1
@@ -0,0 +1,195 @@
+"""
+Tests de las instantáneas binarias del banco
+"""
+
+import struct
+
+import pytest
+
+from src.banco import Banco, CuentaNoEncontradaError
+from src.snapshot import Snapshot, SnapshotInvalidoError
+from src.wal import RegistroWAL, SINCRONIZAR_NUNCA
+
+
+@pytest.fixture
+def banco():
+    banco = Banco("Banco Nacional")
+    for i in range(100):
+        banco.crear_cuenta(f"{i:06d}", f"Titular {i} ñ", 100.0 + i / 3)
+    banco.transferir("000001", "000002", 10.1)
+    banco.depositar("000003", 0.7)
+    banco.obtener_cuenta("000004").retirar(4.4)
+    return banco
+
+
+def _estado(banco):
+    return {numero: (cuenta.titular, cuenta.obtener_saldo(), cuenta.fecha_creacion, cuenta.obtener_historial())
+            for numero, cuenta in banco.cuentas.items()}
+
+
+class TestSnapshot:
+    """Tests de guardado y carga diferida"""
+
+    def test_carga_reproduce_el_banco(self, banco, tmp_path):
+        """
+        GIVEN: Un banco con cuentas e historial guardado en una instantánea
+        WHEN: Se carga en otro banco
+        THEN: Cuentas, historiales, total y contador coinciden
+        """
+        # Given
+        ruta = str(tmp_path / "banco.snap")
+        banco.guardar_snapshot(ruta)
+
+        # When
+        cargado = Banco.cargar_snapshot("Banco Nacional", ruta)
+
+        # Then
+        assert cargado.obtener_numero_cuentas() == 100
+        assert cargado.obtener_total_depositado() == banco.obtener_total_depositado()
+        assert cargado.contador_transacciones == 1
+        assert _estado(cargado) == _estado(banco)
+
+    def test_cuentas_se_materializan_bajo_demanda(self, banco, tmp_path):
+        """
+        GIVEN: Una instantánea cargada
+        WHEN: Se pide una cuenta y se opera con ella
+        THEN: Solo esa cuenta se construye y el total sigue siendo exacto
+        """
+        # Given
+        ruta = str(tmp_path / "banco.snap")
+        banco.guardar_snapshot(ruta)
+        cargado = Banco.cargar_snapshot("Banco Nacional", ruta, verificar_total=True)
+
+        # When
+        cuenta = cargado.obtener_cuenta("000050")
+        cargado.transferir("000050", "000051", 50.0)
+
+        # Then
+        assert cuenta.obtener_saldo() == banco.obtener_cuenta("000050").obtener_saldo() - 50.0
+        assert dict.__len__(cargado.cuentas) == 2
+        assert cargado.obtener_total_depositado() == banco.obtener_total_depositado()
+        with pytest.raises(CuentaNoEncontradaError):
+            cargado.obtener_cuenta("999999")
+
+    def test_nuevas_cuentas_tras_la_carga(self, banco, tmp_path):
+        """
+        GIVEN: Una instantánea cargada
+        WHEN: Se crea una cuenta nueva y se intenta duplicar una existente
+        THEN: La nueva se añade y la duplicada se rechaza
+        """
+        ruta = str(tmp_path / "banco.snap")
+        banco.guardar_snapshot(ruta)
+        cargado = Banco.cargar_snapshot("Banco Nacional", ruta)
+
+        cargado.crear_cuenta("nueva", "Ana López", 5.0)
+        with pytest.raises(ValueError):
+            cargado.crear_cuenta("000007", "Duplicada", 1.0)
+
+        assert cargado.obtener_numero_cuentas() == 101
+        assert cargado.obtener_total_depositado() == banco.obtener_total_depositado() + 5.0
+
+    def test_sin_historial(self, banco, tmp_path):
+        """
+        GIVEN: Una instantánea guardada sin historial
+        WHEN: Se carga una cuenta con movimientos
+        THEN: Conserva el saldo pero no el historial
+        """
+        ruta = str(tmp_path / "banco.snap")
+        banco.guardar_snapshot(ruta, con_historial=False)
+
+        cuenta = Banco.cargar_snapshot("Banco Nacional", ruta).obtener_cuenta("000003")
+
+        assert cuenta.obtener_saldo() == banco.obtener_cuenta("000003").obtener_saldo()
+        assert cuenta.obtener_historial() == []
+
+    def test_crc_y_version_se_verifican(self, banco, tmp_path):
+        """
+        GIVEN: Instantáneas dañadas o de otra versión
+        WHEN: Se abren
+        THEN: Debe lanzarse SnapshotInvalidoError
+        """
+        ruta = tmp_path / "banco.snap"
+        banco.guardar_snapshot(str(ruta))
+        contenido = bytearray(ruta.read_bytes())
+
+        danado = tmp_path / "danado.snap"
+        contenido[-1] ^= 0xFF
+        danado.write_bytes(bytes(contenido))
+        with pytest.raises(SnapshotInvalidoError):
+            Snapshot(str(danado))
+
+        otra_version = tmp_path / "version.snap"
+        contenido[-1] ^= 0xFF
+        contenido[8] = 99
+        otra_version.write_bytes(bytes(contenido))
+        with pytest.raises(SnapshotInvalidoError):
+            Snapshot(str(otra_version))
+
+    @pytest.mark.parametrize("desplazamiento, valor", [(16, 3), (24, 999)])
+    def test_la_cabecera_tambien_se_verifica(self, banco, tmp_path, desplazamiento, valor):
+        """
+        GIVEN: Una instantánea con el nº de cuentas o el contador de transacciones alterado
+        WHEN: Se abre, incluso sin verificar el CRC de los datos
+        THEN: Debe lanzarse SnapshotInvalidoError
+        """
+        ruta = tmp_path / "banco.snap"
+        banco.guardar_snapshot(str(ruta))
+        contenido = bytearray(ruta.read_bytes())
+        struct.pack_into("<Q", contenido, desplazamiento, valor)
+        ruta.write_bytes(bytes(contenido))
+
+        with pytest.raises(SnapshotInvalidoError):
+            Snapshot(str(ruta), verificar=False)
+
+
+class TestRecuperacionDesdeSnapshot:
+    """Tests de recuperación a partir de una instantánea y la cola del WAL"""
+
+    def test_solo_se_reproduce_la_cola_del_wal(self, tmp_path, monkeypatch):
+        """
+        GIVEN: Un banco con WAL, una instantánea a mitad de su vida y más operaciones después
+        WHEN: Se recupera desde la instantánea y el WAL
+        THEN: Queda igual que el original y solo se reproducen los registros posteriores
+        """
+        # Given
+        ruta_wal = str(tmp_path / "banco.wal")
+        ruta_snapshot = str(tmp_path / "banco.snap")
+        banco = Banco("Banco Nacional", wal=RegistroWAL(ruta_wal, SINCRONIZAR_NUNCA))
+        for i in range(50):
+            banco.crear_cuenta(f"{i:06d}", f"Titular {i % 7}", 100.0 + i)
+        banco.transferir("000001", "000002", 10.1)
+        banco.guardar_snapshot(ruta_snapshot)
+        banco.depositar("000003", 0.7)
+        banco.obtener_cuenta("000004").retirar(4.4)
+        banco.transferir_lote(["000005", "000006"], ["000007", "000008"], [1.0, 2.0])
+        banco.crear_cuenta("nueva", "Ana López", 5.0)
+        banco.wal.cerrar()
+        reproducidos = []
+        original = Banco._reproducir
+        monkeypatch.setattr(Banco, "_reproducir",
+                            lambda self, registro: reproducidos.append(registro["op"]) or original(self, registro))
+
+        # When
+        recuperado = Banco.recuperar("Banco Nacional", RegistroWAL(ruta_wal), snapshot=ruta_snapshot)
+
+        # Then
+        assert reproducidos == ["deposito", "retiro", "lote", "crear"]
+        assert _estado(recuperado) == _estado(banco)
+        assert recuperado.contador_transacciones == banco.contador_transacciones
+        assert recuperado.obtener_total_depositado() == banco.obtener_total_depositado()
+        recuperado.obtener_cuenta("000009").depositar(1.0)
+        recuperado.wal.cerrar()
+        assert _estado(Banco.recuperar("Banco Nacional", RegistroWAL(ruta_wal))) == _estado(recuperado)
+
+    def test_instantanea_sin_wal_se_rechaza(self, banco, tmp_path):
+        """
+        GIVEN: Una instantánea guardada por un banco sin WAL
+        WHEN: Se intenta recuperar a partir de ella y un WAL
+        THEN: Debe lanzarse ValueError
+        """
+        ruta = str(tmp_path / "banco.snap")
+        banco.guardar_snapshot(ruta)
+
+        with RegistroWAL(str(tmp_path / "banco.wal")) as wal:
+            with pytest.raises(ValueError):
+                Banco.recuperar("Banco Nacional", wal, snapshot=ruta)
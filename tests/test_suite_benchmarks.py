@@ -0,0 +1,57 @@
+"""
+Tests de la suite de benchmarks
+"""
+
+import json
+
+from benchmarks import suite
+
+
+class TestSuiteBenchmarks:
+    """Tests de la comparación con un resultado base y de la salida en JSON"""
+
+    def test_comparar_respeta_el_sentido_de_cada_metrica(self):
+        """
+        GIVEN: Un resultado base y otro con una latencia y un rendimiento peores y otros mejores
+        WHEN: Se comparan con una tolerancia del 10 %
+        THEN: Solo se marcan como regresión los empeoramientos que superan la tolerancia
+        """
+        # Given
+        base = {"metricas": {
+            "latencia.a.p50": suite.metrica(1000, "ns", "menor"),
+            "latencia.b.p50": suite.metrica(1000, "ns", "menor"),
+            "rendimiento.c": suite.metrica(1000, "ops/s", "mayor"),
+            "rendimiento.d": suite.metrica(1000, "ops/s", "mayor"),
+            "memoria.e": suite.metrica(100, "bytes", "menor"),
+        }}
+        actual = {"metricas": {
+            "latencia.a.p50": suite.metrica(1200, "ns", "menor"),
+            "latencia.b.p50": suite.metrica(500, "ns", "menor"),
+            "rendimiento.c": suite.metrica(800, "ops/s", "mayor"),
+            "rendimiento.d": suite.metrica(1050, "ops/s", "mayor"),
+            "nueva": suite.metrica(1, "ns", "menor"),
+        }}
+
+        # When
+        filas = suite.comparar(actual, base, tolerancia=0.10)
+
+        # Then
+        assert {fila["metrica"]: fila["regresion"] for fila in filas} == {
+            "latencia.a.p50": True, "latencia.b.p50": False, "rendimiento.c": True, "rendimiento.d": False}
+
+    def test_ejecucion_reducida_produce_json_comparable(self):
+        """
+        GIVEN: Los escenarios de latencia y memoria con tamaños mínimos
+        WHEN: Se ejecutan, se serializan a JSON y se comparan consigo mismos
+        THEN: Hay percentiles por operación, memoria por cuenta y ninguna regresión
+        """
+        # Given/When
+        resultado = json.loads(json.dumps(suite.ejecutar(["latencia", "memoria"], tamanos=[100],
+                                                         operaciones=100, iteraciones=200)))
+
+        # Then
+        metricas = resultado["metricas"]
+        for operacion in ("depositar", "retirar", "transferir", "obtener_total_depositado"):
+            assert metricas[f"latencia.{operacion}.p50"]["valor"] <= metricas[f"latencia.{operacion}.p99"]["valor"]
+        assert metricas["memoria.bytes_por_cuenta"]["valor"] > 0
+        assert not any(fila["regresion"] for fila in suite.comparar(resultado, resultado))
@@ -0,0 +1,97 @@
+"""
+Tests del total incremental del banco
+"""
+
+import math
+import random
+
+import pytest
+
+from src.agregados import SumaExacta
+from src.banco import Banco, TotalInconsistenteError
+
+
+class TestTotalIncremental:
+    """Tests del agregado mantenido en cada operación"""
+
+    def test_total_coincide_exactamente_con_la_suma_completa(self):
+        """
+        GIVEN: Un banco con cuentas y muchas operaciones con decimales
+        WHEN: Se consulta el total depositado
+        THEN: Es exactamente igual a la suma completa de los saldos
+        """
+        # Given
+        generador = random.Random(7)
+        banco = Banco("Banco Nacional")
+        for i in range(50):
+            banco.crear_cuenta(str(i), f"Titular {i}", generador.uniform(0, 1000))
+
+        # When
+        for _ in range(2000):
+            origen, destino = generador.sample(range(50), 2)
+            cantidad = generador.uniform(0.01, 50)
+            if banco.obtener_cuenta(str(origen)).obtener_saldo() >= cantidad:
+                banco.transferir(str(origen), str(destino), cantidad)
+            banco.depositar(str(destino), generador.uniform(0.01, 5))
+
+        # Then
+        saldos = [cuenta.obtener_saldo() for cuenta in banco.cuentas.values()]
+        assert banco.obtener_total_depositado() == math.fsum(saldos)
+
+    def test_cambiar_es_exacto_con_magnitudes_muy_distintas(self):
+        """
+        GIVEN: Una suma exacta de valores de magnitudes muy distintas
+        WHEN: Se reemplazan sumandos por otros cuya diferencia no es representable
+        THEN: El valor sigue siendo igual a math.fsum de los sumandos actuales
+        """
+        # Given
+        generador = random.Random(3)
+        valores = [generador.uniform(0, 1) * 10 ** generador.randint(-8, 16) for _ in range(100)]
+        suma = SumaExacta()
+        for valor in valores:
+            suma.agregar(valor)
+
+        # When
+        for _ in range(2000):
+            posicion = generador.randrange(len(valores))
+            nuevo = generador.uniform(0, 1) * 10 ** generador.randint(-8, 16)
+            suma.cambiar(valores[posicion], nuevo)
+            valores[posicion] = nuevo
+
+        # Then
+        assert suma.valor() == math.fsum(valores)
+
+    def test_operaciones_directas_sobre_la_cuenta_actualizan_el_total(self):
+        """
+        GIVEN: Una cuenta creada a través del banco
+        WHEN: Se opera directamente sobre la cuenta
+        THEN: El total del banco se actualiza
+        """
+        # Given
+        banco = Banco("Banco Nacional")
+        cuenta = banco.crear_cuenta("123456", "María García", 500.0)
+
+        # When
+        cuenta.depositar(200.0)
+        cuenta.retirar(100.0)
+        cuenta.saldo = 1000.0
+
+        # Then
+        assert banco.obtener_total_depositado() == 1000.0
+
+    def test_modo_verificacion_detecta_inconsistencias(self):
+        """
+        GIVEN: Un banco en modo verificación con una cuenta agregada a mano
+        WHEN: Se consulta el total depositado
+        THEN: Se lanza TotalInconsistenteError
+        """
+        # Given
+        banco = Banco("Banco Nacional", verificar_total=True)
+        banco.crear_cuenta("111111", "Juan Pérez", 100.0)
+        assert banco.obtener_total_depositado() == 100.0
+        otro = Banco("Otro Banco")
+        banco.cuentas["222222"] = otro.crear_cuenta("222222", "Ana López", 50.0)
+
+        # When/Then
+        with pytest.raises(TotalInconsistenteError):
+            banco.obtener_total_depositado()
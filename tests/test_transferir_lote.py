@@ -0,0 +1,155 @@
+"""
+Tests de transferencias en lote
+"""
+
+import random
+
+import pytest
+
+import src.banco as modulo_banco
+from src.banco import (Banco, CuentaNoEncontradaError, LOTE_CANTIDAD_INVALIDA,
+                       LOTE_CUENTA_NO_ENCONTRADA, LOTE_OK, LOTE_SALDO_INSUFICIENTE)
+from src.cuenta import SaldoInsuficienteError
+
+
+def _crear_banco(saldos):
+    banco = Banco("Banco Nacional")
+    for i, saldo in enumerate(saldos):
+        banco.crear_cuenta(str(i), f"Titular {i}", saldo)
+    return banco
+
+
+def _estado_por_llamada(banco, origen, destino, cantidad):
+    try:
+        banco.transferir(origen, destino, cantidad)
+        return LOTE_OK
+    except ValueError:
+        return LOTE_CANTIDAD_INVALIDA
+    except CuentaNoEncontradaError:
+        return LOTE_CUENTA_NO_ENCONTRADA
+    except SaldoInsuficienteError:
+        return LOTE_SALDO_INSUFICIENTE
+
+
+def _estado_banco(banco):
+    return {
+        numero: (cuenta.obtener_saldo(),
+                 [(t["tipo"], t["cantidad"], t["saldo_anterior"], t["saldo_nuevo"])
+                  for t in cuenta.obtener_historial()])
+        for numero, cuenta in banco.cuentas.items()
+    }
+
+
+class TestTransferirLote:
+    """Tests del API de transferencias en lote"""
+
+    def test_estados_por_fila_sin_lanzar_excepciones(self, modo_lote):
+        """
+        GIVEN: Un lote con filas válidas y con cada tipo de error
+        WHEN: Se transfiere el lote
+        THEN: Cada fila recibe su código de estado y solo se aplican las válidas
+        """
+        # Given
+        banco = _crear_banco([100.0, 50.0])
+
+        # When
+        estados = banco.transferir_lote(
+            ["0", "0", "9", "1", "0"],
+            ["1", "1", "1", "0", "1"],
+            [30.0, -5.0, 10.0, 500.0, 70.0],
+        )
+
+        # Then
+        assert list(estados) == [LOTE_OK, LOTE_CANTIDAD_INVALIDA, LOTE_CUENTA_NO_ENCONTRADA,
+                                 LOTE_SALDO_INSUFICIENTE, LOTE_OK]
+        assert banco.obtener_cuenta("0").obtener_saldo() == 0.0
+        assert banco.obtener_cuenta("1").obtener_saldo() == 150.0
+        assert banco.contador_transacciones == 2
+        assert banco.obtener_total_depositado() == 150.0
+
+    def test_mismo_resultado_que_transferir_fila_a_fila(self, modo_lote):
+        """
+        GIVEN: Un lote aleatorio donde el saldo de unas filas depende de otras
+        WHEN: Se aplica como lote y como llamadas sucesivas a transferir
+        THEN: Estados, saldos e historiales coinciden exactamente
+        """
+        # Given
+        generador = random.Random(11)
+        saldos = [generador.choice([0.0, 5.0, generador.uniform(0, 300)]) for _ in range(40)]
+        filas = [(str(generador.randrange(42)), str(generador.randrange(42)),
+                  generador.choice([generador.uniform(0.01, 40), 0.0, 12.5]))
+                 for _ in range(3000)]
+        banco_lote = _crear_banco(saldos)
+        banco_llamadas = _crear_banco(saldos)
+
+        # When
+        estados = banco_lote.transferir_lote(*zip(*filas))
+        esperados = [_estado_por_llamada(banco_llamadas, *fila) for fila in filas]
+
+        # Then
+        assert list(estados) == esperados
+        assert _estado_banco(banco_lote) == _estado_banco(banco_llamadas)
+        assert banco_lote.contador_transacciones == banco_llamadas.contador_transacciones
+
+    def test_lote_con_saldo_suficiente_coincide_con_transferir(self, modo_lote):
+        """
+        GIVEN: Un lote con una cuenta muy activa y saldo suficiente en todas
+        WHEN: Se aplica como lote y como llamadas sucesivas a transferir
+        THEN: Saldos e historiales coinciden exactamente
+        """
+        # Given
+        generador = random.Random(5)
+        saldos = [1e6 + i * 0.37 for i in range(600)]
+        filas = [("0" if generador.random() < 0.3 else str(generador.randrange(600)),
+                  str(generador.randrange(600)), generador.uniform(0.01, 20))
+                 for _ in range(5000)]
+        banco_lote = _crear_banco(saldos)
+        banco_llamadas = _crear_banco(saldos)
+
+        # When
+        estados = banco_lote.transferir_lote(*zip(*filas))
+        for fila in filas:
+            banco_llamadas.transferir(*fila)
+
+        # Then
+        assert all(estado == LOTE_OK for estado in estados)
+        assert _estado_banco(banco_lote) == _estado_banco(banco_llamadas)
+
+    def test_longitudes_distintas_debe_fallar(self):
+        """
+        GIVEN: Un lote con columnas de distinta longitud
+        WHEN: Se intenta transferir
+        THEN: Debe lanzarse ValueError
+        """
+        banco = _crear_banco([100.0, 50.0])
+
+        with pytest.raises(ValueError):
+            banco.transferir_lote(["0"], ["1", "0"], [1.0])
+
+    def test_pocas_filas_sin_saldo_no_recalculan_todo_el_lote(self, monkeypatch):
+        """
+        GIVEN: Un lote grande en el que solo dos retiros no tienen saldo suficiente
+        WHEN: Se transfiere con NumPy
+        THEN: Coincide con transferir fila a fila sin pasar por el camino secuencial
+        """
+        # Given
+        if modulo_banco.np is None:
+            pytest.skip("NumPy no está instalado")
+        generador = random.Random(3)
+        saldos = [5.0, 1.0] + [1e6 + i * 0.37 for i in range(998)]
+        filas = [(str(generador.randrange(2, 1000)), str(generador.randrange(2, 1000)), generador.uniform(0.01, 20))
+                 for _ in range(4000)]
+        filas[1500] = ("0", "7", 6.0)
+        filas[2500] = ("1", "8", 2.0)
+        banco_lote = _crear_banco(saldos)
+        banco_llamadas = _crear_banco(saldos)
+        monkeypatch.setattr(Banco, "_transferir_lote_secuencial", None)
+
+        # When
+        estados = banco_lote.transferir_lote(*zip(*filas))
+        esperados = [_estado_por_llamada(banco_llamadas, *fila) for fila in filas]
+
+        # Then
+        assert esperados.count(LOTE_SALDO_INSUFICIENTE) == 2
+        assert list(estados) == esperados
+        assert _estado_banco(banco_lote) == _estado_banco(banco_llamadas)
@@ -0,0 +1,80 @@
+"""
+Tests de la validación asíncrona con el servicio externo
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.banco import Banco, ServicioExternoError
+
+
+@pytest.fixture
+def banco():
+    banco = Banco("Banco Nacional")
+    for i in range(20):
+        banco.crear_cuenta(str(i), f"Titular {i}", 100.0)
+    return banco
+
+
+class TestValidacionAsincrona:
+    """Tests de avalidar_cuenta y avalidar_cuentas"""
+
+    def test_avalidar_cuenta_existente_e_inexistente(self, banco):
+        """
+        GIVEN: Un servicio externo que responde sin fallos
+        WHEN: Se valida una cuenta existente y otra inexistente
+        THEN: Los resultados son True y False
+        """
+        with patch('src.banco.random.random', return_value=0.5):
+            assert asyncio.run(banco.avalidar_cuenta("1")) is True
+            assert asyncio.run(banco.avalidar_cuenta("999")) is False
+
+    def test_avalidar_cuenta_propaga_error_del_servicio(self, banco):
+        """
+        GIVEN: Un servicio externo que falla
+        WHEN: Se valida una cuenta de forma asíncrona
+        THEN: Se lanza ServicioExternoError
+        """
+        with patch('src.banco.random.random', return_value=0.05):
+            with pytest.raises(ServicioExternoError):
+                asyncio.run(banco.avalidar_cuenta("1"))
+
+    def test_lote_solapa_la_latencia_con_concurrencia_acotada(self, banco):
+        """
+        GIVEN: 20 cuentas y concurrencia 10
+        WHEN: Se validan en lote
+        THEN: Tarda unas 2 latencias en vez de 20 y respeta el orden de entrada
+        """
+        # Given
+        numeros = [str(i) for i in range(19)] + ["999"]
+
+        # When
+        with patch('src.banco.random.random', return_value=0.5):
+            inicio = time.perf_counter()
+            resultados = asyncio.run(banco.avalidar_cuentas(numeros, concurrencia=10))
+            duracion = time.perf_counter() - inicio
+
+        # Then
+        assert resultados == [True] * 19 + [False]
+        assert duracion < 1.0
+
+    def test_lote_con_fallos(self, banco):
+        """
+        GIVEN: Un servicio que falla en la segunda llamada
+        WHEN: Se valida un lote con y sin return_exceptions
+        THEN: El error se devuelve en su posición o se lanza
+        """
+        respuestas = [0.5, 0.05, 0.5]
+        with patch('src.banco.random.random', side_effect=respuestas):
+            resultados = asyncio.run(
+                banco.avalidar_cuentas(["1", "2", "3"], concurrencia=1, return_exceptions=True))
+        assert resultados[0] is True
+        assert isinstance(resultados[1], ServicioExternoError)
+        assert resultados[2] is True
+
+        with patch('src.banco.random.random', side_effect=respuestas):
+            with pytest.raises(ServicioExternoError):
+                asyncio.run(banco.avalidar_cuentas(["1", "2", "3"], concurrencia=1))
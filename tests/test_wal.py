@@ -0,0 +1,218 @@
+"""
+Tests del registro de escritura anticipada (WAL)
+"""
+
+import threading
+
+import pytest
+
+import src.banco as modulo_banco
+from src.banco import Banco
+from src.cuenta import SaldoInsuficienteError
+from src.wal import RegistroCorruptoError, RegistroWAL, SINCRONIZAR_NUNCA, leer_registros
+
+
+def _estado(banco):
+    return (
+        {numero: (cuenta.titular, cuenta.obtener_saldo(), cuenta.fecha_creacion, cuenta.obtener_historial())
+         for numero, cuenta in banco.cuentas.items()},
+        banco.contador_transacciones,
+        banco.obtener_total_depositado(),
+    )
+
+
+class TestWAL:
+    """Tests de escritura y recuperación del WAL"""
+
+    def test_recuperacion_reproduce_saldos_historial_y_contador(self, tmp_path):
+        """
+        GIVEN: Un banco con WAL que realiza operaciones de todo tipo
+        WHEN: Se reconstruye otro banco a partir del WAL
+        THEN: Saldos, historiales, fechas y contador son idénticos
+        """
+        # Given
+        ruta = str(tmp_path / "banco.wal")
+        banco = Banco("Banco Nacional", wal=RegistroWAL(ruta))
+        banco.crear_cuenta("111111", "Juan Pérez", 1000.0)
+        banco.crear_cuenta("222222", "Ana López", 500.0)
+        banco.depositar("111111", 0.1)
+        banco.retirar("222222", 0.2)
+        banco.transferir("111111", "222222", 300.3)
+        banco.transferir_lote(["222222", "111111", "111111"], ["111111", "222222", "333333"],
+                              [100.0, 5000.0, 1.0])
+        with pytest.raises(SaldoInsuficienteError):
+            banco.retirar("222222", 1e9)
+        banco.wal.cerrar()
+
+        # When
+        recuperado = Banco.recuperar("Banco Nacional", RegistroWAL(ruta))
+
+        # Then
+        assert _estado(recuperado) == _estado(banco)
+        assert recuperado.contador_transacciones == 2
+
+    def test_lote_recuperado_conserva_las_fechas_del_reloj_del_sistema(self, tmp_path, modo_lote):
+        """
+        GIVEN: Un banco con WAL y el reloj del sistema, con precisión de nanosegundos
+        WHEN: Transfiere lotes y se recupera del WAL
+        THEN: Las fechas guardadas en los historiales son exactamente las mismas
+        """
+        # Given
+        ruta = str(tmp_path / "banco.wal")
+        banco = Banco("Banco Nacional", wal=RegistroWAL(ruta))
+        banco.crear_cuenta("A", "Juan Pérez", 1000.0)
+        banco.crear_cuenta("B", "Ana López", 1000.0)
+        for _ in range(5):
+            banco.transferir_lote(["A", "B"], ["B", "A"], [10.0, 3.0])
+        banco.wal.cerrar()
+
+        # When
+        recuperado = Banco.recuperar("Banco Nacional", RegistroWAL(ruta))
+
+        # Then
+        for numero in ("A", "B"):
+            assert list(recuperado.obtener_cuenta(numero).historial_transacciones.fechas) == \
+                list(banco.obtener_cuenta(numero).historial_transacciones.fechas)
+
+    def test_movimientos_sobre_la_cuenta_tambien_se_recuperan(self, tmp_path):
+        """
+        GIVEN: Un banco con WAL y depósitos y retiros hechos directamente sobre sus cuentas
+        WHEN: Se recupera del WAL, y el recuperado vuelve a operar sobre una cuenta
+        THEN: Saldos e historiales coinciden, también tras una segunda recuperación
+        """
+        # Given
+        ruta = str(tmp_path / "banco.wal")
+        banco = Banco("Banco Nacional", wal=RegistroWAL(ruta))
+        cuenta = banco.crear_cuenta("A", "Juan Pérez", 100.0)
+        cuenta.depositar(50.0)
+        cuenta.retirar(20.0)
+        with pytest.raises(SaldoInsuficienteError):
+            cuenta.retirar(1e9)
+        banco.wal.cerrar()
+
+        # When
+        recuperado = Banco.recuperar("Banco Nacional", RegistroWAL(ruta))
+        iguales = _estado(recuperado) == _estado(banco)
+        recuperado.obtener_cuenta("A").depositar(0.5)
+        recuperado.wal.cerrar()
+        otra_vez = Banco.recuperar("Banco Nacional", RegistroWAL(ruta))
+
+        # Then
+        assert iguales
+        assert otra_vez.obtener_cuenta("A").obtener_saldo() == 130.5
+        assert _estado(otra_vez) == _estado(recuperado)
+        assert [t["tipo"] for t in otra_vez.obtener_cuenta("A").obtener_historial()] == \
+            ["DEPOSITO", "RETIRO", "DEPOSITO"]
+
+    def test_el_banco_recuperado_sigue_escribiendo_en_el_wal(self, tmp_path):
+        """
+        GIVEN: Un banco recuperado de un WAL
+        WHEN: Hace nuevas operaciones y se vuelve a recuperar
+        THEN: Las nuevas operaciones también se conservan
+        """
+        ruta = str(tmp_path / "banco.wal")
+        banco = Banco("Banco Nacional", wal=RegistroWAL(ruta))
+        banco.crear_cuenta("111111", "Juan Pérez", 10.0)
+        banco.wal.cerrar()
+
+        recuperado = Banco.recuperar("Banco Nacional", RegistroWAL(ruta))
+        recuperado.depositar("111111", 5.0)
+        recuperado.wal.cerrar()
+
+        assert Banco.recuperar("Banco Nacional", RegistroWAL(ruta)).obtener_total_depositado() == 15.0
+
+    def test_confirmacion_en_grupo_agrupa_fsyncs(self, tmp_path):
+        """
+        GIVEN: Un WAL en modo grupo y varios hilos operando a la vez
+        WHEN: Cada hilo hace muchas transferencias
+        THEN: Todas quedan en el WAL con menos fsyncs que operaciones
+        """
+        # Given
+        wal = RegistroWAL(str(tmp_path / "banco.wal"))
+        banco = Banco("Banco Nacional", wal=wal)
+        for hilo in range(8):
+            banco.crear_cuenta(f"{hilo}-a", "Titular", 1e6)
+            banco.crear_cuenta(f"{hilo}-b", "Titular", 1e6)
+
+        def trabajador(hilo):
+            for _ in range(50):
+                banco.transferir(f"{hilo}-a", f"{hilo}-b", 1.0)
+
+        # When
+        hilos = [threading.Thread(target=trabajador, args=(hilo,)) for hilo in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        wal.cerrar()
+
+        # Then
+        assert wal.operaciones == 16 + 8 * 50
+        assert wal.sincronizaciones < wal.operaciones
+        assert len(list(leer_registros(wal.ruta))) == wal.operaciones
+
+    @pytest.mark.parametrize("con_numpy", [True, False])
+    def test_fallo_del_wal_no_aplica_el_lote(self, tmp_path, monkeypatch, con_numpy):
+        """
+        GIVEN: Un banco con WAL cuya escritura falla
+        WHEN: Se transfiere un lote, también con filas sin saldo suficiente
+        THEN: Se propaga el error y ni saldos ni historiales ni el total cambian
+        """
+        # Given
+        if not con_numpy:
+            monkeypatch.setattr(modulo_banco, "np", None)
+        wal = RegistroWAL(str(tmp_path / "banco.wal"))
+        banco = Banco("Banco Nacional", wal=wal)
+        banco.crear_cuenta("A", "Juan Pérez", 100.0)
+        banco.crear_cuenta("B", "Ana López", 0.0)
+        antes = _estado(banco)
+
+        def fallar(registro):
+            raise OSError("disco lleno")
+
+        monkeypatch.setattr(wal, "escribir", fallar)
+
+        # When
+        for filas in ([("A", "B", 10.0)], [("A", "B", 10.0), ("B", "A", 500.0)]):
+            with pytest.raises(OSError):
+                banco.transferir_lote(*zip(*filas))
+
+        # Then
+        assert _estado(banco) == antes
+        assert banco.obtener_cuenta("A").obtener_historial() == []
+
+    def test_linea_final_incompleta_se_descarta(self, tmp_path):
+        """
+        GIVEN: Un WAL cuya última línea quedó a medias por una caída
+        WHEN: Se reabre y se recupera
+        THEN: Se ignora la línea incompleta y se puede seguir escribiendo
+        """
+        ruta = tmp_path / "banco.wal"
+        banco = Banco("Banco Nacional", wal=RegistroWAL(str(ruta), sincronizacion=SINCRONIZAR_NUNCA))
+        banco.crear_cuenta("111111", "Juan Pérez", 10.0)
+        banco.wal.cerrar()
+        with open(ruta, "ab") as archivo:
+            archivo.write(b'0badc0de {"op":"deposito"')
+
+        recuperado = Banco.recuperar("Banco Nacional", RegistroWAL(str(ruta)))
+        recuperado.depositar("111111", 1.0)
+        recuperado.wal.cerrar()
+
+        assert len(list(leer_registros(str(ruta)))) == 2
+
+    def test_linea_danada_en_medio_debe_fallar(self, tmp_path):
+        """
+        GIVEN: Un WAL con una línea dañada seguida de líneas válidas
+        WHEN: Se abre
+        THEN: Debe lanzarse RegistroCorruptoError
+        """
+        ruta = tmp_path / "banco.wal"
+        banco = Banco("Banco Nacional", wal=RegistroWAL(str(ruta)))
+        banco.crear_cuenta("111111", "Juan Pérez", 10.0)
+        banco.crear_cuenta("222222", "Ana López", 10.0)
+        banco.wal.cerrar()
+        contenido = ruta.read_bytes()
+        ruta.write_bytes(b"X" + contenido[1:])
+
+        with pytest.raises(RegistroCorruptoError):
+            RegistroWAL(str(ruta))